@@ -1,15 +1,34 @@
 # rci/admission/admin.py
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import path
+from django.utils import timezone
+from documents.admin import document_links
+from . import bulk, matching
 from .models import AdmissionApplication, TransfereeCredit
 
 
+class ApplicationImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV with a header row, or a JSON list of application objects')
+    skip_invalid = forms.BooleanField(
+        required=False,
+        help_text='Import the valid rows even when some rows fail validation'
+    )
+
+
 @admin.register(AdmissionApplication)
 class AdmissionApplicationAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'email', 'applicant_type', 'program', 'needs_registrar_review', 'generated_user', 'application_date']
     list_filter = ['applicant_type', 'needs_registrar_review', 'program', 'application_date']
     search_fields = ['first_name', 'last_name', 'email', 'phone']
-    readonly_fields = ['application_date', 'generated_user']
+    readonly_fields = ['application_date', 'generated_user', 'documents']
     ordering = ['-application_date']
+    # generated_user is nullable, so the admin would not join it by itself
+    list_select_related = ['program', 'generated_user']
+    change_list_template = 'admin/admission/admissionapplication/change_list.html'
+    change_form_template = 'admin/admission/admissionapplication/change_form.html'
 
     fieldsets = (
         ('Personal Information', {
@@ -19,22 +38,122 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
             'fields': ('applicant_type', 'program', 'previous_school', 'credits_earned')
         }),
         ('System Information', {
-            'fields': ('application_date', 'generated_user', 'needs_registrar_review', 'notes', 'documents_json')
+            'fields': ('application_date', 'generated_user', 'needs_registrar_review', 'notes', 'documents')
         }),
     )
 
+    def documents(self, obj):
+        return document_links(obj.documents_json)
+
     def has_delete_permission(self, request, obj=None):
         # Only admins can delete applications
         return request.user.is_superuser
 
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='admission_admissionapplication_import',
+            ),
+            path(
+                '<int:pk>/match-credits/',
+                self.admin_site.admin_view(self.match_credits_view),
+                name='admission_admissionapplication_match_credits',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a batch of applications; responds with the credentials CSV"""
+        if not self.has_add_permission(request):
+            return HttpResponse(status=403)
+
+        errors = []
+        if request.method == 'POST':
+            form = ApplicationImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                try:
+                    rows = bulk.read_rows(upload, name=upload.name)
+                except ValueError as exc:
+                    form.add_error('file', f'Could not read file: {exc}')
+                else:
+                    result = bulk.import_applications(
+                        rows,
+                        imported_by=request.user,
+                        skip_invalid=form.cleaned_data['skip_invalid'],
+                    )
+                    errors = result.errors
+                    if result.created:
+                        messages.success(request, f'Imported {result.created} applications.')
+                        response = HttpResponse(content_type='text/csv')
+                        response['Content-Disposition'] = (
+                            f'attachment; filename="admission_credentials_{timezone.now():%Y%m%d_%H%M%S}.csv"'
+                        )
+                        bulk.write_credentials(result.credentials, response)
+                        return response
+                    if not errors:
+                        messages.warning(request, 'The file contained no applications.')
+        else:
+            form = ApplicationImportForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import applications',
+            'form': form,
+            'errors': errors,
+            'columns': bulk.IMPORT_COLUMNS,
+        }
+        return render(request, 'admin/admission/admissionapplication/import.html', context)
+
+    def match_credits_view(self, request, pk):
+        """Paste a transferee's TOR, review ranked catalog equivalents, and credit the accepted ones"""
+        application = get_object_or_404(AdmissionApplication, pk=pk)
+        if not self.has_change_permission(request, application):
+            return HttpResponse(status=403)
+
+        tor_text = request.POST.get('tor', '')
+        lines = matching.match_tor(matching.parse_tor(tor_text)) if tor_text else []
+
+        if request.method == 'POST' and request.POST.get('action') == 'accept':
+            scores = {
+                (line.line_no, candidate.subject.id): candidate.score
+                for line in lines
+                for candidate in line.candidates
+            }
+            accepted = []
+            for line in lines:
+                choice = request.POST.get(f'line_{line.line_no}')
+                if choice and choice.isdigit():
+                    subject_id = int(choice)
+                    accepted.append((line, subject_id, scores.get((line.line_no, subject_id))))
+            credits = matching.accept_matches(application, accepted, credited_by=request.user)
+            messages.success(request, f'Credited {len(credits)} subjects to {application.full_name}.')
+            return redirect('admin:admission_admissionapplication_change', pk)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Match TOR credits: {application.full_name}',
+            'application': application,
+            'credited': application.credited_subjects.select_related('subject'),
+            'tor_text': tor_text,
+            'lines': lines,
+        }
+        return render(request, 'admin/admission/admissionapplication/match_credits.html', context)
+
 
 @admin.register(TransfereeCredit)
 class TransfereeCreditAdmin(admin.ModelAdmin):
-    list_display = ['application', 'subject_code', 'subject_title', 'units', 'grade', 'credited_date']
+    list_display = ['application', 'subject_code', 'subject_title', 'units', 'grade', 'subject', 'match_score', 'credited_date']
     list_filter = ['credited_date']
     search_fields = ['application__first_name', 'application__last_name', 'subject_code', 'subject_title']
-    readonly_fields = ['credited_date', 'credited_by']
+    autocomplete_fields = ['subject']
+    readonly_fields = ['credited_date', 'credited_by', 'match_score']
     ordering = ['-credited_date']
+    list_select_related = ['application', 'subject']
 
     fieldsets = (
         ('Application', {
@@ -44,7 +163,7 @@ class TransfereeCreditAdmin(admin.ModelAdmin):
             'fields': ('subject_code', 'subject_title', 'units', 'grade')
         }),
         ('Credit Information', {
-            'fields': ('credited_date', 'credited_by')
+            'fields': ('subject', 'match_score', 'credited_date', 'credited_by')
         }),
     )
 
@@ -0,0 +1,320 @@
+"""
+Bulk admission import: many walk-in applications in one pass.
+
+Rows are validated with the AdmissionApplicationForm rules first. Passwords
+are then hashed across CPU cores (see passwords.py; hashing one account at a
+time in the request thread was the bottleneck), and users, students and
+applications are inserted with bulk_create, one transaction per chunk. The generated credentials are returned for export.
+"""
+import csv
+import io
+import json
+import random
+import string
+
+from django.db import transaction
+from django.db.models import Count
+
+from academics.models import Curriculum, CurriculumSubject, Program
+from audit import outbox
+from enrollment import search as student_search, student_numbers
+from enrollment.models import Section, Student, StudentSubject, Term
+from rci import campus, pagination
+from settingsapp.snapshot import site_settings
+from users import dashboard, usernames
+from users.models import User
+from . import dedupe
+from .forms import AdmissionApplicationForm
+from .models import AdmissionApplication
+from .passwords import hash_passwords
+
+DEFAULT_CHUNK_SIZE = 500
+
+IMPORT_COLUMNS = [
+    'first_name', 'last_name', 'middle_name', 'email', 'phone', 'address', 'birth_date',
+    'applicant_type', 'program', 'previous_school', 'credits_earned',
+]
+
+CREDENTIAL_COLUMNS = ['application_id', 'full_name', 'email', 'program', 'applicant_type', 'username', 'password']
+
+
+class ImportResult:
+    """Outcome of an import: credentials for created accounts and per-row validation errors"""
+
+    def __init__(self):
+        self.credentials = []
+        self.errors = []
+        self.skipped = 0
+
+    @property
+    def created(self):
+        return len(self.credentials)
+
+
+# ==================== READING & VALIDATION ====================
+
+def read_rows(fileobj, fmt=None, name=''):
+    """Parse an uploaded/opened CSV or JSON file into a list of dicts"""
+    data = fileobj.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    fmt = fmt or ('json' if name.lower().endswith('.json') or data.lstrip().startswith('[') else 'csv')
+    if fmt == 'json':
+        rows = json.loads(data)
+        if not isinstance(rows, list):
+            raise ValueError('JSON import must be a list of application objects')
+        return rows
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+def _program_lookup():
+    """Programs by primary key and by lower-cased name, so files can use either"""
+    lookup = {}
+    for pk, name in Program.objects.values_list('id', 'name'):
+        lookup[str(pk)] = pk
+        lookup[name.lower()] = pk
+    return lookup
+
+
+def validate_rows(rows):
+    """
+    Run every row through AdmissionApplicationForm.
+    Returns (valid, errors): valid is [(line_no, cleaned_data)], errors is [(line_no, message)].
+    """
+    programs = _program_lookup()
+    curricula = active_curricula()
+    valid, errors = [], []
+
+    for line_no, row in enumerate(rows, start=1):
+        row = {key.strip(): (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+        program = row.get('program')
+        if program not in (None, ''):
+            row['program'] = programs.get(str(program).lower(), program)
+
+        form = AdmissionApplicationForm(data=row)
+        if not form.is_valid():
+            message = '; '.join(
+                f"{field}: {' '.join(field_errors)}" if field != '__all__' else ' '.join(field_errors)
+                for field, field_errors in form.errors.items()
+            )
+            errors.append((line_no, message))
+            continue
+        if form.cleaned_data['program'].id not in curricula:
+            errors.append((line_no, f"program: no active curriculum for {form.cleaned_data['program'].name}"))
+            continue
+        # Model fields only (the form also carries the optional document uploads)
+        valid.append((line_no, {field: form.cleaned_data[field] for field in form._meta.fields}))
+
+    return _reject_duplicates(valid, errors)
+
+
+def _reject_duplicates(valid, errors):
+    """Drop rows that repeat an existing application or an earlier row of the same file"""
+    keyed = [(line_no, data, dedupe.keys_for(data)[0]) for line_no, data in valid]
+    fingerprints = [fp for _, _, fp in keyed]
+    existing = {}
+    for start in range(0, len(fingerprints), 500):
+        existing.update(AdmissionApplication.objects.filter(
+            fingerprint__in=fingerprints[start:start + 500]
+        ).values_list('fingerprint', 'id'))
+
+    unique, seen = [], {}
+    for line_no, data, fp in keyed:
+        if fp in existing:
+            errors.append((line_no, f'duplicate of existing application #{existing[fp]}'))
+        elif fp in seen:
+            errors.append((line_no, f'same applicant as row {seen[fp]}'))
+        else:
+            seen[fp] = line_no
+            unique.append((line_no, data))
+    errors.sort()
+    return unique, errors
+
+
+def active_curricula():
+    """program_id -> active curriculum id (same pick as the admission form)"""
+    curricula = {}
+    for curriculum_id, program_id in Curriculum.objects.filter(active=True).values_list('id', 'program_id'):
+        curricula.setdefault(program_id, curriculum_id)
+    return curricula
+
+
+# ==================== PASSWORDS ====================
+
+def generate_password():
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=12))
+
+
+# ==================== FRESHMAN AUTO-ENROLLMENT ====================
+
+class FreshmanEnroller:
+    """
+    Batch version of views.auto_enroll_freshman: recommended subjects and section
+    fill counts are loaded once and tracked in memory instead of queried per student.
+    """
+
+    def __init__(self):
+        self.term = Term.objects.filter(is_active=True).first()
+        self.unit_cap = site_settings.freshman_unit_cap
+        self.recommended = {}
+        self.sections = {}
+
+    def _recommended(self, curriculum_id):
+        if curriculum_id not in self.recommended:
+            self.recommended[curriculum_id] = [
+                cs.subject for cs in CurriculumSubject.objects.filter(
+                    curriculum_id=curriculum_id, year_level=1, term_no=1, is_recommended=True
+                ).select_related('subject').order_by('subject__code')
+            ]
+            missing = [s.id for s in self.recommended[curriculum_id] if s.id not in self.sections]
+            if missing:
+                for section in Section.objects.filter(
+                    term=self.term, status='open', subject_id__in=missing
+                ).annotate(filled=Count('student_subjects')):
+                    # Same choice as the per-student path: the first open section by default ordering
+                    self.sections.setdefault(section.subject_id, section)
+                for subject_id in missing:
+                    self.sections.setdefault(subject_id, None)
+        return self.recommended[curriculum_id]
+
+    def plan(self, student):
+        """StudentSubject rows (unsaved) for one freshman"""
+        if not self.term:
+            return []
+        rows = []
+        total_units = 0
+        for subject in self._recommended(student.curriculum_id):
+            if total_units + subject.units > self.unit_cap:
+                continue
+            section = self.sections.get(subject.id)
+            if section is None or section.filled >= section.capacity:
+                continue
+            section.filled += 1
+            total_units += subject.units
+            rows.append(StudentSubject(
+                student=student,
+                subject=subject,
+                term=self.term,
+                section=section,
+                professor_id=section.professor_id,
+                status='enrolled',
+            ))
+        return rows
+
+
+# ==================== IMPORT ====================
+
+def retire_cached_views(students, enrollments):
+    """
+    What the users.signals and rci.pagination handlers do for each saved row, once per chunk:
+    one bump per version file rather than one per student and enrollment.
+    """
+    scopes = {dashboard.staff_scope(), *[dashboard.admission_scope(code) for code in campus.campuses()]}
+    scopes.update(dashboard.student_scope(student.pk) for student in students)
+    scopes.update(dashboard.professor_scope(row.professor_id) for row in enrollments)
+    # The campus transaction is the outer block, so everything in the chunk has committed by then
+    transaction.on_commit(lambda: dashboard.invalidate(*scopes), using=campus.alias())
+    pagination.retire(Student, StudentSubject, AdmissionApplication, using=campus.alias())
+
+
+def import_applications(rows, imported_by=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                        skip_invalid=False, dry_run=False, progress=None):
+    """
+    Validate and import application rows, creating a student account for each.
+
+    Nothing is written when any row is invalid, unless skip_invalid is set.
+    `progress(created_so_far)` is called after each committed chunk.
+    """
+    result = ImportResult()
+    valid, result.errors = validate_rows(rows)
+    if result.errors and not skip_invalid:
+        return result
+    result.skipped = len(result.errors)
+    if dry_run or not valid:
+        return result
+
+    curricula = active_curricula()
+    enroller = FreshmanEnroller()
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = [data for _, data in valid[start:start + chunk_size]]
+        passwords = [generate_password() for _ in chunk]
+        hashes = hash_passwords(passwords, workers=workers)
+
+        # Students go to the importing user's campus database. The main database (accounts) is
+        # the inner block, so it commits first; see rci/writer.py for why the shard commits last
+        with transaction.atomic(using=campus.alias()), transaction.atomic():
+            users = usernames.bulk_create_users(
+                [
+                    User(
+                        email=data['email'],
+                        password=password_hash,
+                        first_name=data['first_name'],
+                        last_name=data['last_name'],
+                        role='student',
+                        campus=campus.user_campus(),
+                    )
+                    for data, password_hash in zip(chunk, hashes)
+                ],
+                [usernames.base_username(data['first_name'], data['last_name']) for data in chunk],
+            )
+            # bulk_create skips the post_save handler that copies users into their campus database
+            campus.replicate_users(users)
+            students = student_numbers.bulk_create_students([
+                Student(
+                    user=user,
+                    program=data['program'],
+                    curriculum_id=curricula[data['program'].id],
+                    status='active',
+                )
+                for data, user in zip(chunk, users)
+            ])
+            # bulk_create skips the post_save handler that maintains the search index
+            student_search.index_students(students)
+            applications = AdmissionApplication.objects.bulk_create([
+                # bulk_create skips save(), so the duplicate-detection keys are set here
+                dedupe.assign_keys(AdmissionApplication(
+                    **data,
+                    needs_registrar_review=data['applicant_type'] == 'transferee',
+                    generated_user=user,
+                ))
+                for data, user in zip(chunk, users)
+            ])
+            enrollments = [
+                row
+                for data, student in zip(chunk, students)
+                if data['applicant_type'] == 'freshman'
+                for row in enroller.plan(student)
+            ]
+            StudentSubject.objects.bulk_create(enrollments)
+            # bulk_create skips the post_save handlers that retire dashboards and list totals
+            retire_cached_views(students, enrollments)
+
+        for application, user, password in zip(applications, users, passwords):
+            result.credentials.append({
+                'application_id': application.pk,
+                'full_name': application.full_name,
+                'email': application.email,
+                'program': application.program.name,
+                'applicant_type': application.applicant_type,
+                'username': user.username,
+                'password': password,
+            })
+        if progress:
+            progress(result.created)
+
+    outbox.record(
+        actor=imported_by,
+        action='bulk_import',
+        entity='AdmissionApplication',
+        new_value_json={'created': result.created, 'skipped': result.skipped},
+        notes=f'Imported {result.created} admission applications',
+    )
+    return result
+
+
+def write_credentials(credentials, fileobj):
+    """Credentials export as CSV"""
+    writer = csv.DictWriter(fileobj, fieldnames=CREDENTIAL_COLUMNS)
+    writer.writeheader()
+    writer.writerows(credentials)
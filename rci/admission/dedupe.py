@@ -0,0 +1,189 @@
+"""
+Applicant duplicate detection.
+
+Every application stores two indexed keys:
+- fingerprint: hash of the normalized name, birth date, email and phone. Equal
+  fingerprints are the same submission sent twice (refresh, retry).
+- blocking_key: Soundex of the last name plus birth date. Only applications
+  sharing a block are compared fuzzily, so near-duplicate detection never
+  compares every pair in the table.
+
+Within a block, a shared email or phone is a likely duplicate. A similar first
+name alone is not enough (twins share a surname and birth date and often have
+similar names): those matches are only flagged for a registrar to look at.
+
+Submit-time checks are one query (fingerprint OR blocking key, both indexed);
+`clusters()` groups the whole table in a single pass ordered by blocking key.
+"""
+import hashlib
+import re
+import unicodedata
+
+from django.db.models import Q
+
+from .matching import dice, trigrams
+from .models import AdmissionApplication
+
+# First-name similarity above which two applicants in the same block are the same person
+NAME_THRESHOLD = 0.7
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def normalize_name(value):
+    # "Dela Cruz", "dela-cruz" and "DÉLA CRUZ" all become "delacruz"
+    ascii_value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', ascii_value.lower())
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    # Compare the last 10 digits so +63 917..., 0917... and 917... agree
+    return re.sub(r'\D', '', value or '')[-10:]
+
+
+def soundex(name):
+    name = normalize_name(name)
+    name = re.sub(r'[^a-z]', '', name)
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def fingerprint(first_name, last_name, birth_date, email, phone):
+    parts = [
+        normalize_name(first_name),
+        normalize_name(last_name),
+        str(birth_date or ''),
+        normalize_email(email),
+        normalize_phone(phone),
+    ]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def blocking_key(last_name, birth_date):
+    return f"{soundex(last_name)}:{birth_date or ''}"
+
+
+def keys_for(values):
+    """(fingerprint, blocking_key) for an application instance or a dict of its fields"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    return (
+        fingerprint(get('first_name'), get('last_name'), get('birth_date'), get('email'), get('phone')),
+        blocking_key(get('last_name'), get('birth_date')),
+    )
+
+
+def assign_keys(application):
+    application.fingerprint, application.blocking_key = keys_for(application)
+    return application
+
+
+def same_contact(a, b):
+    """Two applicants from the same block share an email or phone number"""
+    if a['email'] and normalize_email(a['email']) == normalize_email(b['email']):
+        return True
+    return bool(normalize_phone(a['phone'])) and normalize_phone(a['phone']) == normalize_phone(b['phone'])
+
+
+def similar_first_name(a, b):
+    """Similar-sounding or similarly spelled first names"""
+    if soundex(a['first_name']) == soundex(b['first_name']):
+        # Transposed or misheard spellings (Juan/Jaun) sound alike
+        return True
+    return dice(trigrams(normalize_name(a['first_name'])), trigrams(normalize_name(b['first_name']))) >= NAME_THRESHOLD
+
+
+def is_near_duplicate(a, b):
+    """Two applicants from the same block worth a registrar's look (either signal)"""
+    return same_contact(a, b) or similar_first_name(a, b)
+
+
+MATCH_FIELDS = ['id', 'first_name', 'last_name', 'email', 'phone', 'birth_date', 'fingerprint',
+                'application_date', 'generated_user_id']
+
+
+def find_duplicates(values, exclude_pk=None):
+    """
+    Existing applications matching `values` (a form's cleaned_data or an instance).
+    Returns (exact, near, similar), lists of dicts with MATCH_FIELDS: the same submission,
+    the same block with the same email or phone, and the same block with only a similar name.
+    """
+    fp, block = keys_for(values)
+    candidates = AdmissionApplication.objects.filter(Q(fingerprint=fp) | Q(blocking_key=block))
+    if exclude_pk:
+        candidates = candidates.exclude(pk=exclude_pk)
+
+    probe = values if isinstance(values, dict) else {name: getattr(values, name) for name in MATCH_FIELDS[1:5]}
+    exact, near, similar = [], [], []
+    for row in candidates.values(*MATCH_FIELDS):
+        if row['fingerprint'] == fp:
+            exact.append(row)
+        elif same_contact(probe, row):
+            near.append(row)
+        elif similar_first_name(probe, row):
+            similar.append(row)
+    return exact, near, similar
+
+
+def clusters():
+    """
+    Groups of likely-duplicate applications across the whole table, in one ordered scan.
+    Returns a list of clusters, each a list of row dicts (MATCH_FIELDS), largest first.
+    """
+    found = []
+    block, rows = None, []
+
+    def flush():
+        if len(rows) > 1:
+            found.extend(_cluster_block(rows))
+
+    queryset = AdmissionApplication.objects.order_by('blocking_key', 'id').values('blocking_key', *MATCH_FIELDS)
+    for row in queryset.iterator(chunk_size=2000):
+        if row['blocking_key'] != block:
+            flush()
+            block, rows = row['blocking_key'], []
+        rows.append(row)
+    flush()
+
+    found.sort(key=lambda cluster: (-len(cluster), cluster[0]['id']))
+    return found
+
+
+def _cluster_block(rows):
+    """Union-find over the pairs of one block (blocks are small, so pairwise is fine here)"""
+    parent = list(range(len(rows)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(rows)):
+        for j in range(i + 1, len(rows)):
+            if rows[i]['fingerprint'] == rows[j]['fingerprint'] or is_near_duplicate(rows[i], rows[j]):
+                parent[root(j)] = root(i)
+
+    groups = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(root(i), []).append(row)
+    return [group for group in groups.values() if len(group) > 1]
@@ -1,11 +1,22 @@
 # rci/admission/forms.py
 from django import forms
+from django.conf import settings
 from .models import AdmissionApplication
 from academics.models import Program
+from documents.storage import DOCUMENT_KINDS
+
+DOCUMENT_CONTENT_TYPES = ['application/pdf', 'image/jpeg', 'image/png']
+FILE_INPUT_CLASS = 'w-full px-4 py-2 border border-gray-300 rounded-lg bg-white'
 
 
 class AdmissionApplicationForm(forms.ModelForm):
     """Form for admission applications"""
+    tor = forms.FileField(required=False, label='Transcript of Records',
+                          widget=forms.ClearableFileInput(attrs={'class': FILE_INPUT_CLASS}))
+    psa = forms.FileField(required=False, label='PSA Birth Certificate',
+                          widget=forms.ClearableFileInput(attrs={'class': FILE_INPUT_CLASS}))
+    valid_id = forms.FileField(required=False, label='Valid ID',
+                               widget=forms.ClearableFileInput(attrs={'class': FILE_INPUT_CLASS}))
 
     class Meta:
         model = AdmissionApplication
@@ -50,4 +61,17 @@ class AdmissionApplicationForm(forms.ModelForm):
             if not credits_earned:
                 self.add_error('credits_earned', 'Credits earned is required for transferees.')
 
+        for kind, label in DOCUMENT_KINDS:
+            upload = cleaned_data.get(kind)
+            if not upload:
+                continue
+            if upload.content_type not in DOCUMENT_CONTENT_TYPES:
+                self.add_error(kind, f'{label} must be a PDF, JPEG or PNG file.')
+            elif upload.size > settings.DOCUMENT_MAX_SIZE:
+                self.add_error(kind, f'{label} is larger than {settings.DOCUMENT_MAX_SIZE // (1024 * 1024)} MB.')
+
         return cleaned_data
+
+    def uploaded_documents(self):
+        """(kind, file) pairs for the documents attached to this submission"""
+        return [(kind, self.cleaned_data[kind]) for kind, _ in DOCUMENT_KINDS if self.cleaned_data.get(kind)]
@@ -0,0 +1,41 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from admission import dedupe
+
+
+class Command(BaseCommand):
+    help = 'Cluster likely-duplicate admission applications across the whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', help='Also write the clusters to this CSV file')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        clusters = dedupe.clusters()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'🔍 {len(clusters)} duplicate clusters found in {elapsed:.2f}s\n')
+        for number, cluster in enumerate(clusters, start=1):
+            self.stdout.write(f'Cluster {number} ({len(cluster)} applications):')
+            for row in cluster:
+                account = f"user #{row['generated_user_id']}" if row['generated_user_id'] else 'no account'
+                self.stdout.write(
+                    f"  • #{row['id']} {row['first_name']} {row['last_name']} "
+                    f"({row['birth_date']}) {row['email']} {row['phone']} "
+                    f"- {row['application_date']:%Y-%m-%d} - {account}"
+                )
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['cluster', *dedupe.MATCH_FIELDS])
+                for number, cluster in enumerate(clusters, start=1):
+                    for row in cluster:
+                        writer.writerow([number, *(row[field] for field in dedupe.MATCH_FIELDS)])
+            self.stdout.write(f'\n  📄 Written to {options["csv"]}')
+
+        duplicates = sum(len(cluster) - 1 for cluster in clusters)
+        self.stdout.write(self.style.SUCCESS(f'✓ {duplicates} applications look like repeats of another'))
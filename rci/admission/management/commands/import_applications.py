@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from admission import bulk
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Import admission applications from a CSV or JSON file, creating a student account for each'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (header row) or JSON (list of objects) file')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--credentials', help='Where to write the credentials CSV '
+                                                  '(default: admission_credentials_<timestamp>.csv)')
+        parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE,
+                            help='Applications inserted per transaction')
+        parser.add_argument('--workers', type=int, help='Password hashing processes (default: CPU count)')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Import the valid rows even when some rows fail validation')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+        parser.add_argument('--user', help='Username recorded as the importer')
+
+    def handle(self, *args, **options):
+        imported_by = None
+        if options['user']:
+            try:
+                imported_by = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        try:
+            with open(options['path'], 'rb') as fh:
+                rows = bulk.read_rows(fh, fmt=options['format'], name=options['path'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+
+        self.stdout.write(f'📥 Importing {len(rows)} applications from {options["path"]}')
+
+        def progress(created):
+            self.stdout.write(f'  • {created} accounts created')
+
+        started = time.perf_counter()
+        result = bulk.import_applications(
+            rows,
+            imported_by=imported_by,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            skip_invalid=options['skip_invalid'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+
+        for line_no, message in result.errors:
+            self.stdout.write(self.style.ERROR(f'  ✗ Row {line_no}: {message}'))
+
+        if result.errors and not options['skip_invalid']:
+            raise CommandError(f'{len(result.errors)} invalid rows; nothing was imported (use --skip-invalid)')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'Dry run: {len(rows) - len(result.errors)} rows valid, {len(result.errors)} invalid'
+            ))
+            return
+
+        if result.credentials:
+            path = options['credentials'] or f'admission_credentials_{timezone.now():%Y%m%d_%H%M%S}.csv'
+            with open(path, 'w', newline='', encoding='utf-8') as fh:
+                bulk.write_credentials(result.credentials, fh)
+            self.stdout.write(f'  🔑 Credentials written to {path} (hand out and delete it)')
+
+        rate = result.created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {result.created} applications in {elapsed:.2f}s ({rate:,.0f}/s)'
+            f'{f", skipped {result.skipped} invalid rows" if result.skipped else ""}'
+        ))
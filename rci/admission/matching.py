@@ -0,0 +1,252 @@
+"""
+Transferee credit matching: rank our Subjects against the lines of a transcript (TOR).
+
+Every active subject's code and title are indexed once per process into
+trigram and word postings. A TOR line only scores the subjects sharing the
+most trigrams with it, so a 60-line transcript against thousands of
+subjects stays in the millisecond range; trigrams common to much of the
+catalog are left out of candidate gathering.
+
+Score (0..1) = 0.6 * title trigram similarity + 0.2 * title word overlap
+             + 0.2 * code similarity, plus a small bonus when units agree.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from academics.models import Subject
+from .models import TransfereeCredit
+
+# Rebuild the index at least this often so other processes pick up catalog edits
+INDEX_MAX_AGE = 15 * 60
+
+# Subjects fully scored per TOR line (the rest share too few trigrams to rank)
+CANDIDATE_POOL = 40
+
+# A trigram posted on more than max(this, 10% of the catalog) subjects is too common to gather candidates
+COMMON_GRAM_FLOOR = 50
+
+DEFAULT_LIMIT = 5
+DEFAULT_MIN_SCORE = 0.3
+UNITS_BONUS = 0.05
+
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'to', 'in', 'for', 'on', 'with', 'into', 'intro', 'introduction'}
+ROMAN = {'i': '1', 'ii': '2', 'iii': '3', 'iv': '4', 'v': '5'}
+
+
+def normalize_title(text):
+    words = re.sub(r'[^a-z0-9]+', ' ', text.lower()).split()
+    return ' '.join(ROMAN.get(word, word) for word in words)
+
+
+def normalize_code(code):
+    return re.sub(r'[^A-Z0-9]', '', code.upper())
+
+
+def trigrams(text):
+    """Character trigrams of each word, padded so short words still produce some"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def words(title):
+    return {word for word in title.split() if word not in STOPWORDS}
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class IndexedSubject:
+    __slots__ = ('id', 'code', 'title', 'units', 'code_key', 'code_grams', 'title_grams', 'words')
+
+    def __init__(self, subject_id, code, title, units):
+        self.id = subject_id
+        self.code = code
+        self.title = title
+        self.units = units
+        self.code_key = normalize_code(code)
+        self.code_grams = trigrams(self.code_key.lower())
+        title_key = normalize_title(title)
+        self.title_grams = trigrams(title_key)
+        self.words = words(title_key)
+
+
+class Candidate:
+    """A ranked equivalent for one TOR line"""
+
+    def __init__(self, subject, score):
+        self.subject = subject
+        self.score = round(score, 3)
+
+    @property
+    def percent(self):
+        return round(self.score * 100)
+
+
+class SubjectIndex:
+    """Trigram and word postings over the active subject catalog"""
+
+    def __init__(self, subjects):
+        self.subjects = [IndexedSubject(*row) for row in subjects]
+        self.by_code = {}
+        self.postings = {}
+        for position, subject in enumerate(self.subjects):
+            self.by_code.setdefault(subject.code_key, position)
+            for gram in subject.title_grams | subject.code_grams:
+                self.postings.setdefault(gram, []).append(position)
+        self.common_limit = max(COMMON_GRAM_FLOOR, len(self.subjects) // 10)
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls):
+        return cls(Subject.objects.filter(active=True).values_list('id', 'code', 'title', 'units'))
+
+    def rank(self, code='', title='', units=None, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+        """Best-scoring subjects for one TOR line, highest first"""
+        code_key = normalize_code(code)
+        code_grams = trigrams(code_key.lower())
+        title_key = normalize_title(title)
+        title_grams = trigrams(title_key)
+        title_words = words(title_key)
+
+        # Grams shared by a large part of the catalog (' co', 'ing') say little and dominate
+        # the counting cost, so candidates are gathered from the rarer ones
+        postings = sorted(
+            (self.postings[gram] for gram in title_grams | code_grams if gram in self.postings),
+            key=len,
+        )
+        selective = [posting for posting in postings if len(posting) <= self.common_limit] or postings[:5]
+        overlap = Counter()
+        for posting in selective:
+            overlap.update(posting)
+        pool = {position for position, _ in overlap.most_common(CANDIDATE_POOL)}
+        if code_key in self.by_code:
+            pool.add(self.by_code[code_key])
+
+        candidates = []
+        for position in pool:
+            subject = self.subjects[position]
+            code_score = 1.0 if code_key and code_key == subject.code_key else dice(code_grams, subject.code_grams)
+            score = (
+                0.6 * dice(title_grams, subject.title_grams)
+                + 0.2 * jaccard(title_words, subject.words)
+                + 0.2 * code_score
+            )
+            if units is not None and subject.units == units:
+                score += UNITS_BONUS
+            score = min(score, 1.0)
+            if score >= min_score:
+                candidates.append(Candidate(subject, score))
+
+        candidates.sort(key=lambda candidate: (-candidate.score, candidate.subject.code))
+        return candidates[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide index, built on first use and refreshed when stale"""
+    global _index
+    index = _index
+    if index is None or time.monotonic() - index.built_at > INDEX_MAX_AGE:
+        with _index_lock:
+            if _index is None or time.monotonic() - _index.built_at > INDEX_MAX_AGE:
+                _index = SubjectIndex.build()
+            index = _index
+    return index
+
+
+def clear_index():
+    global _index
+    _index = None
+
+
+# ==================== TOR PARSING ====================
+
+class TorLine:
+    """One subject from a transferee's transcript"""
+
+    def __init__(self, line_no, code, title, units=None, grade=''):
+        self.line_no = line_no
+        self.code = code
+        self.title = title
+        self.units = units
+        self.grade = grade
+        self.candidates = []
+
+
+def _parse_units(text):
+    try:
+        return Decimal(text).quantize(Decimal('0.1'))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_tor(text):
+    """
+    TOR lines as pasted by the registrar: `code | title | units | grade`
+    (tabs or pipes as separators; units and grade optional). Blank lines are skipped.
+    """
+    lines = []
+    for line_no, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        parts = [part.strip() for part in re.split(r'\t|\|', raw)]
+        if len(parts) == 1:
+            # No separators: treat the first word as the code only if it contains a digit
+            first, _, rest = parts[0].partition(' ')
+            parts = [first, rest] if re.search(r'\d', first) and rest else ['', parts[0]]
+        parts += [''] * (4 - len(parts))
+        lines.append(TorLine(line_no, parts[0], parts[1], _parse_units(parts[2]), parts[3]))
+    return lines
+
+
+def match_tor(lines, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+    """Attach ranked candidates to every TorLine; returns the lines"""
+    index = get_index()
+    for line in lines:
+        line.candidates = index.rank(line.code, line.title, line.units, limit=limit, min_score=min_score)
+    return lines
+
+
+def accept_matches(application, accepted, credited_by=None):
+    """
+    Create TransfereeCredit rows for the accepted (TorLine, subject_id, score) triples.
+    Subjects already credited to this application are skipped. Returns the created credits.
+    """
+    already = set(application.credited_subjects.exclude(subject=None).values_list('subject_id', flat=True))
+    credits = []
+    for line, subject_id, score in accepted:
+        if subject_id in already:
+            continue
+        already.add(subject_id)
+        credits.append(TransfereeCredit(
+            application=application,
+            subject_id=subject_id,
+            match_score=score,
+            subject_code=line.code,
+            subject_title=line.title,
+            units=line.units if line.units is not None else Decimal('0'),
+            grade=line.grade,
+            credited_by=credited_by,
+        ))
+    with transaction.atomic():
+        return TransfereeCredit.objects.bulk_create(credits)
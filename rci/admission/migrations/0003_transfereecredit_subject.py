@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0001_initial'),
+        ('admission', '0002_remove_admissionapplication_processed_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transfereecredit',
+            name='match_score',
+            field=models.FloatField(blank=True, help_text='Matching engine score (0-1)', null=True),
+        ),
+        migrations.AddField(
+            model_name='transfereecredit',
+            name='subject',
+            field=models.ForeignKey(blank=True, help_text='Equivalent subject in our catalog; counts as completed for the student', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transferee_credits', to='academics.subject'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:02
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# The key functions as of this migration (admission.dedupe); later changes belong in later migrations
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def normalize_name(value):
+    ascii_value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', ascii_value.lower())
+
+
+def soundex(name):
+    name = re.sub(r'[^a-z]', '', normalize_name(name))
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def keys_for(application):
+    parts = [
+        normalize_name(application.first_name),
+        normalize_name(application.last_name),
+        str(application.birth_date or ''),
+        (application.email or '').strip().lower(),
+        re.sub(r'\D', '', application.phone or '')[-10:],
+    ]
+    return (
+        hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest(),
+        f"{soundex(application.last_name)}:{application.birth_date or ''}",
+    )
+
+
+def backfill_keys(apps, schema_editor):
+    AdmissionApplication = apps.get_model('admission', 'AdmissionApplication')
+    last_pk = 0
+    while True:
+        batch = list(AdmissionApplication.objects.filter(pk__gt=last_pk).order_by('pk')[:1000])
+        if not batch:
+            break
+        for application in batch:
+            application.fingerprint, application.blocking_key = keys_for(application)
+        AdmissionApplication.objects.bulk_update(batch, ['fingerprint', 'blocking_key'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admission', '0003_transfereecredit_subject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='blocking_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Last-name Soundex and birth date; near-duplicates share it', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='admissionapplication',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Hash of normalized name, birth date, email and phone', max_length=64),
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+    ]
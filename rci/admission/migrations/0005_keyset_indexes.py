@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0001_initial'),
+        ('admission', '0004_application_duplicate_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admissionapplication',
+            index=models.Index(fields=['application_date', 'id'], name='admission_a_applica_805fc0_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 # rci/admission/models.py
 from django.db import models
 from django.conf import settings
-from academics.models import Program, Curriculum
+from academics.models import Program, Curriculum, Subject
 
 
 class AdmissionApplication(models.Model):
@@ -47,6 +47,22 @@ class AdmissionApplication(models.Model):
         help_text="System-generated user account (created automatically)"
     )
 
+    # Duplicate detection keys (see dedupe.py), kept current by save()
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Hash of normalized name, birth date, email and phone"
+    )
+    blocking_key = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Last-name Soundex and birth date; near-duplicates share it"
+    )
+
     # Documents
     documents_json = models.JSONField(default=dict, blank=True, help_text='Uploaded documents')
     notes = models.TextField(blank=True)
@@ -54,6 +70,19 @@ class AdmissionApplication(models.Model):
     class Meta:
         db_table = 'admission_applications'
         ordering = ['-application_date']
+        indexes = [
+            # Keyset pagination of the staff list (rci.pagination)
+            models.Index(fields=['application_date', 'id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .dedupe import assign_keys
+
+        assign_keys(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'fingerprint', 'blocking_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         review_status = " [Needs Review]" if self.needs_registrar_review else ""
@@ -77,6 +106,15 @@ class TransfereeCredit(models.Model):
     subject_title = models.CharField(max_length=255)
     units = models.DecimalField(max_digits=3, decimal_places=1)
     grade = models.CharField(max_length=10, help_text="Grade from previous school")
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transferee_credits',
+        help_text="Equivalent subject in our catalog; counts as completed for the student"
+    )
+    match_score = models.FloatField(null=True, blank=True, help_text="Matching engine score (0-1)")
     credited_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -0,0 +1,61 @@
+"""
+Pre-rendered admission form page for anonymous visitors.
+
+The GET page is rendered once with a placeholder where the CSRF token goes and
+stored in the cache; each request only swaps in its own token. The cache key
+carries the stat() signatures of the Program and settings version files, so a
+Program change or toggling `admission_link_enabled` selects a fresh entry
+without any database query on the hit path.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from settingsapp.snapshot import VersionFile, site_settings
+
+CSRF_PLACEHOLDER = '__admission_csrf_token__'
+CACHE_TIMEOUT = 60 * 60
+
+_version_file = None
+
+
+def version_file():
+    global _version_file
+    if _version_file is None:
+        _version_file = VersionFile(settings.ADMISSION_PAGE_VERSION_FILE)
+    return _version_file
+
+
+def can_serve_cached(request):
+    """Only cookie-less visitors get the shared page: a session may carry a user or flash messages"""
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def page_key():
+    signatures = f'{version_file().signature()}|{site_settings.version_file.signature()}'
+    # Hashed so the key is safe for every cache backend (stat tuples contain spaces)
+    return f"admission:apply:{hashlib.md5(signatures.encode('utf-8')).hexdigest()}"
+
+
+def serve(request, render_page):
+    """
+    Cached page for this version, with the request's CSRF token filled in.
+    `render_page(csrf_token)` renders the page on a miss.
+    """
+    key = page_key()
+    html = cache.get(key)
+    if html is None:
+        html = render_page(CSRF_PLACEHOLDER)
+        cache.set(key, html, CACHE_TIMEOUT)
+    return HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+def invalidate():
+    version_file().bump()
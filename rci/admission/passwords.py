@@ -0,0 +1,36 @@
+"""
+Parallel password hashing for the bulk admission import.
+
+PBKDF2 is deliberately slow, so large imports hash across CPU cores. Workers
+are spawned, not forked: the import also runs inside admin requests, and a
+fork of a web worker would inherit its open SQLite connections, locks and
+threads. A spawned worker unpickles its tasks by importing this module, so it
+imports nothing that needs the app registry.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+# Below this many passwords, starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+
+def _init_worker():
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rci.settings')
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """make_password for every entry, spread over a process pool when the batch is large enough"""
+    if workers == 1 or len(passwords) < PARALLEL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker
+    ) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
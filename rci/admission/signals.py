@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academics.models import Program, Subject
+from . import matching, page_cache
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_delete, sender=Program)
+def invalidate_admission_page(sender, using, **kwargs):
+    """The admission form lists programs; drop every process's cached page once the change commits"""
+    transaction.on_commit(page_cache.invalidate, using=using)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def clear_matching_index(sender, **kwargs):
+    """Rebuild this process's TOR matching index on next use (other processes refresh on its max age)"""
+    matching.clear_index()
@@ -0,0 +1,202 @@
+import tempfile
+from contextlib import ExitStack
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import connections
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from academics.models import CurriculumSubject, Program
+from admission import bulk, dedupe, matching, views
+from admission.models import AdmissionApplication
+from enrollment import search as student_search
+from enrollment.models import StudentSubject
+from rci import campus, pagination
+from rci.query_budget import Budget, Fixture, QueryBudgetTestCase
+from users import dashboard
+
+BUDGETS = [
+    Budget('admission:apply', 3),
+    Budget('admission:confirmation', 4, args=lambda fixture: [fixture.application.pk]),
+    Budget('admission:process', 5, role='registrar', args=lambda fixture: [fixture.pending_application.pk],
+           status=302),
+    Budget('admission:process', 22, role='registrar', args=lambda fixture: [fixture.pending_application.pk],
+           method='post', data=lambda fixture: {'action': 'approve'}, status=302,
+           label='admission:process (approve)'),
+    Budget('admission:process', 6, role='registrar', args=lambda fixture: [fixture.pending_application.pk],
+           method='post', data=lambda fixture: {'action': 'reject'}, status=302,
+           label='admission:process (reject)'),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'admission.urls')
+
+    def test_warm_admission_page_runs_no_queries(self):
+        Fixture()
+        cache.clear()
+        client = Client()
+        self.assertEqual(client.get(reverse('admission:apply')).status_code, 200)
+
+        # Cold, the page is rendered and cached; warm, it is served without touching any database
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(self.assertNumQueries(0, using=alias))
+            response = Client().get(reverse('admission:apply'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+
+
+class DuplicateDetectionTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.program = Program.objects.create(name='BS Nursing', level='college')
+        self.existing = self.application('Mark', 'mark.santos@example.com', '0917 111 2222')
+
+    def application(self, first_name, email, phone):
+        return AdmissionApplication.objects.create(
+            first_name=first_name, last_name='Santos', email=email, phone=phone, address='Cebu',
+            birth_date=date(2007, 5, 1), applicant_type='freshman', program=self.program,
+        )
+
+    def probe(self, first_name, email, phone):
+        return {'first_name': first_name, 'last_name': 'Santos', 'birth_date': date(2007, 5, 1),
+                'email': email, 'phone': phone}
+
+    def test_twin_with_own_contact_details_is_only_similar(self):
+        exact, near, similar = dedupe.find_duplicates(self.probe('Marc', 'marc.santos@example.com', '0917 333 4444'))
+        self.assertEqual((exact, near), ([], []))
+        self.assertEqual([row['id'] for row in similar], [self.existing.pk])
+
+    def test_same_email_or_phone_is_a_near_duplicate(self):
+        for probe in (
+            self.probe('Marc', 'MARK.SANTOS@example.com', '0917 333 4444'),
+            self.probe('Mario', 'other@example.com', '+63 917 111 2222'),
+        ):
+            with self.subTest(probe['email']):
+                exact, near, similar = dedupe.find_duplicates(probe)
+                self.assertEqual([row['id'] for row in near], [self.existing.pk])
+                self.assertEqual((exact, similar), ([], []))
+
+    def test_same_submission_is_exact(self):
+        exact, near, similar = dedupe.find_duplicates(self.probe('Mark', 'mark.santos@example.com', '0917 111 2222'))
+        self.assertEqual([row['id'] for row in exact], [self.existing.pk])
+
+    def test_unrelated_name_in_the_same_block_is_not_flagged(self):
+        self.assertEqual(dedupe.find_duplicates(self.probe('Beatriz', 'b@example.com', '0918 000 0000')), ([], [], []))
+
+    def test_twins_are_clustered_for_review(self):
+        self.application('Marc', 'marc.santos@example.com', '0917 333 4444')
+        self.assertEqual(len(dedupe.clusters()), 1)
+
+    def test_similar_and_near_matches_both_leave_a_note(self):
+        twin = self.application('Marc', 'marc.santos@example.com', '0917 333 4444')
+        application = AdmissionApplication(**{
+            **self.probe('Mark', 'mark.santos@example.com', '0917 555 6666'),
+            'address': 'Cebu', 'applicant_type': 'freshman', 'program': self.program,
+        })
+        form = SimpleNamespace(uploaded_documents=lambda: [])
+
+        user = views.create_applicant_unit(
+            form, application, Fixture().curriculum, 'unusable', [{'id': self.existing.pk}], [{'id': twin.pk}],
+        )
+
+        application.refresh_from_db()
+        self.assertTrue(application.needs_registrar_review)
+        self.assertIn(f'Similar name to application #{twin.pk}', application.notes)
+        self.assertIn(f'Possible duplicate of application #{self.existing.pk}', application.notes)
+        # A possible duplicate is not enrolled until the registrar has looked at it
+        self.assertFalse(StudentSubject.objects.filter(student__user=user).exists())
+
+
+class CreditMatchingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.index = matching.SubjectIndex([
+            (1, 'CS101', 'Introduction to Programming I', 3),
+            (2, 'CS102', 'Data Structures and Algorithms', 3),
+            (3, 'MATH101', 'College Algebra', 3),
+        ])
+
+    def test_tor_lines_rank_their_equivalents_first(self):
+        # Other schools' codes, abbreviations and numbering
+        self.assertEqual(self.index.rank('CS-101', 'Programming 1', Decimal('3.0'))[0].subject.id, 1)
+        self.assertEqual(self.index.rank('IT 21', 'Data Structure & Algorithm')[0].subject.id, 2)
+        self.assertEqual(self.index.rank('', 'Philippine History'), [])
+
+    def test_parse_tor(self):
+        lines = matching.parse_tor('CS 101 | Programming 1 | 3 | 1.25\n\nIT100\tComputing Basics\nMATH1 Algebra\nRizal')
+        self.assertEqual(
+            [(line.line_no, line.code, line.title, line.units, line.grade) for line in lines],
+            [(1, 'CS 101', 'Programming 1', Decimal('3.0'), '1.25'), (3, 'IT100', 'Computing Basics', None, ''),
+             (4, 'MATH1', 'Algebra', None, ''), (5, '', 'Rizal', None, '')],
+        )
+
+    def test_a_subject_is_credited_once(self):
+        fixture = Fixture()
+        line = matching.TorLine(1, 'GE 1', 'Elective', Decimal('3'), '1.5')
+        subject = fixture.open_subject.pk
+        created = matching.accept_matches(fixture.pending_application, [(line, subject, 0.9), (line, subject, 0.8)])
+        self.assertEqual(len(created), 1)
+        self.assertEqual(matching.accept_matches(fixture.pending_application, [(line, subject, 0.9)]), [])
+
+
+class BulkImportTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(
+            DASHBOARD_VERSION_DIR=directory.name, PAGINATION_VERSION_DIR=directory.name,
+        ))
+        self.fixture = Fixture()
+        CurriculumSubject.objects.create(
+            curriculum=self.fixture.curriculum, subject=self.fixture.open_subject,
+            year_level=1, term_no=1, is_recommended=True,
+        )
+
+    def row(self, first_name, applicant_type='freshman'):
+        return {
+            'first_name': first_name, 'last_name': 'Reyes', 'email': f'{first_name.lower()}@example.com',
+            'phone': '0917 000 0000', 'address': 'Iloilo', 'birth_date': '2007-03-04',
+            'applicant_type': applicant_type, 'program': self.fixture.program.name,
+        }
+
+    def test_import_creates_enrolled_searchable_students(self):
+        transferee = {**self.row('Bea', 'transferee'), 'previous_school': 'UP Visayas', 'credits_earned': '18'}
+        result = bulk.import_applications([self.row('Andrea'), transferee], workers=1)
+
+        self.assertEqual((result.created, result.errors), (2, []))
+        andrea, bea = (AdmissionApplication.objects.get(first_name=name) for name in ('Andrea', 'Bea'))
+        # Freshmen are enrolled in the recommended subjects; transferees wait for the registrar
+        self.assertEqual(
+            list(StudentSubject.objects.filter(student__user=andrea.generated_user).values_list('section', flat=True)),
+            [self.fixture.open_section.pk],
+        )
+        self.assertTrue(bea.needs_registrar_review)
+        self.assertFalse(StudentSubject.objects.filter(student__user=bea.generated_user).exists())
+        self.assertEqual(len(student_search.search_ids('Andrea')), 1)
+
+    def test_import_retires_dashboards_and_list_totals(self):
+        scopes = [dashboard.staff_scope(), dashboard.admission_scope(), dashboard.professor_scope(self.fixture.professor.pk)]
+        before = [dashboard.version_file(scope).signature() for scope in scopes]
+        total = pagination._generation(StudentSubject)
+
+        with self.captureOnCommitCallbacks(execute=True, using=campus.alias()):
+            bulk.import_applications([self.row('Andrea')], workers=1)
+
+        self.assertTrue(all(
+            dashboard.version_file(scope).signature() != signature for scope, signature in zip(scopes, before)
+        ))
+        self.assertNotEqual(pagination._generation(StudentSubject), total)
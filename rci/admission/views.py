@@ -2,96 +2,142 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
+from django.contrib.auth.hashers import make_password
+from django.template.loader import render_to_string
 from django.utils import timezone
+from . import bulk, dedupe, page_cache
 from .models import AdmissionApplication, TransfereeCredit
 from .forms import AdmissionApplicationForm
-from settingsapp.models import Setting
+from documents import storage
+from documents.uploads import hashing_uploads
+from settingsapp.snapshot import site_settings
+from users import usernames
 from users.models import User
-from enrollment.models import Student, Term, Section, StudentSubject
-from academics.models import CurriculumSubject, Subject
+from rci import campus, writer
+from enrollment import views as enrollment_views
+from enrollment.models import Student
+from academics.models import Subject
 import random
 import string
 
 
+@hashing_uploads
 def admission_form_view(request):
     """Public admission form - automatically creates student account"""
     # Check if admission is enabled
-    admission_enabled = Setting.get_bool('admission_link_enabled', default=True)
+    admission_enabled = site_settings.admission_link_enabled
 
     if not admission_enabled:
         return render(request, 'admission/disabled.html')
 
     if request.method == 'POST':
-        form = AdmissionApplicationForm(request.POST)
+        form = AdmissionApplicationForm(request.POST, request.FILES)
         if form.is_valid():
-            with transaction.atomic():
-                # Save the application
-                application = form.save(commit=False)
-
-                # Generate username
-                base_username = f"{application.first_name.lower()}.{application.last_name.lower()}"
-                username = base_username
-                counter = 1
-                while User.objects.filter(username=username).exists():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-
-                # Generate random password
-                password = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
-
-                # Create User account
-                user = User.objects.create_user(
-                    username=username,
-                    email=application.email,
-                    password=password,
-                    first_name=application.first_name,
-                    last_name=application.last_name,
-                    role='student'
+            # Refreshes and retries resubmit the same details; don't create a second account
+            exact, near, similar = dedupe.find_duplicates(form.cleaned_data)
+            if exact:
+                messages.error(
+                    request,
+                    f"We already received this application on {exact[0]['application_date']:%B %d, %Y}. "
+                    'Please contact the admission office if you did not receive your credentials.'
                 )
+                return render(request, 'admission/application_form.html', {'form': form})
 
-                # Get active curriculum for the program
-                curriculum = application.program.curricula.filter(active=True).first()
+            application = form.save(commit=False)
 
-                if not curriculum:
-                    messages.error(request, 'No active curriculum found for the selected program. Please contact admissions.')
-                    user.delete()
-                    return redirect('admission:apply')
+            # Get active curriculum for the program
+            curriculum = application.program.curricula.filter(active=True).first()
+            if not curriculum:
+                messages.error(request, 'No active curriculum found for the selected program. Please contact admissions.')
+                return redirect('admission:apply')
 
-                # Create Student record
-                student = Student.objects.create(
-                    user=user,
-                    program=application.program,
-                    curriculum=curriculum,
-                    status='active'
-                )
+            # Generate random password, hashed before the write transaction (hashing is slow by design)
+            password = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
+            password_hash = make_password(password)
+
+            user = writer.run(
+                create_applicant_unit, form, application, curriculum, password_hash, near, similar
+            )
 
-                # Set review flag for transferees
-                if application.applicant_type == 'transferee':
-                    application.needs_registrar_review = True
-                else:
-                    # Auto-enroll freshmen
-                    auto_enroll_freshman(student)
-
-                # Link generated user to application
-                application.generated_user = user
-                application.save()
-
-                # Store credentials in session for confirmation page
-                request.session['admission_credentials'] = {
-                    'username': username,
-                    'password': password,
-                    'application_id': application.pk
-                }
-
-                messages.success(request, 'Your account has been created successfully!')
-                return redirect('admission:confirmation', pk=application.pk)
+            # Store credentials in session for confirmation page
+            request.session['admission_credentials'] = {
+                'username': user.username,
+                'password': password,
+                'application_id': application.pk
+            }
+
+            messages.success(request, 'Your account has been created successfully!')
+            return redirect('admission:confirmation', pk=application.pk)
+    elif page_cache.can_serve_cached(request):
+        # Anonymous GETs are served from the pre-rendered page without touching the database
+        return page_cache.serve(
+            request,
+            lambda csrf_token: render_to_string(
+                'admission/application_form.html',
+                {'form': AdmissionApplicationForm(), 'csrf_token': csrf_token},
+                request,
+            ),
+        )
     else:
         form = AdmissionApplicationForm()
 
     return render(request, 'admission/application_form.html', {'form': form})
 
 
+@writer.writes_main
+def create_applicant_unit(form, application, curriculum, password_hash, near, similar):
+    """Write unit for admission_form_view: account, student, documents and application; returns the user"""
+    # Create User account under the next free first.last username
+    user = usernames.create_with_username(
+        usernames.base_username(application.first_name, application.last_name),
+        lambda username: User.objects.create(
+            username=username,
+            email=User.objects.normalize_email(application.email),
+            password=password_hash,
+            first_name=application.first_name,
+            last_name=application.last_name,
+            role='student',
+            campus=campus.user_campus()
+        ),
+    )
+
+    # Store uploaded documents (deduplicated by content)
+    for kind, upload in form.uploaded_documents():
+        storage.attach(application, kind, upload)
+
+    # Create Student record
+    student = Student.objects.create(
+        user=user,
+        program=application.program,
+        curriculum=curriculum,
+        status='active',
+        documents_json=storage.copy_documents(application.documents_json)
+    )
+
+    # Both kinds of match can be present; each adds its own note
+    notes = [application.notes] if application.notes else []
+
+    # A similar name alone (twins, siblings) is flagged for review but does not hold anything back
+    if similar:
+        application.needs_registrar_review = True
+        notes.append('Similar name to application ' + ', '.join(f"#{row['id']}" for row in similar))
+
+    # Possible duplicates (same email or phone) and transferees wait for the registrar
+    if near:
+        notes.append('Possible duplicate of application ' + ', '.join(f"#{row['id']}" for row in near))
+    application.notes = '\n'.join(notes)
+    if near or application.applicant_type == 'transferee':
+        application.needs_registrar_review = True
+    else:
+        # Auto-enroll freshmen
+        auto_enroll_freshman(student)
+
+    # Link generated user to application
+    application.generated_user = user
+    application.save()
+    return user
+
+
 def admission_confirmation_view(request, pk):
     """Confirmation page showing generated credentials"""
     application = get_object_or_404(AdmissionApplication, pk=pk)
@@ -114,136 +160,93 @@ def admission_confirmation_view(request, pk):
 
 @login_required
 def process_application_view(request, pk):
-    """Process (approve/reject) an admission application"""
+    """Process (approve/reject) an admission application flagged for review"""
     # Only admission staff, registrars, and admins can process
     if request.user.role not in ['admission', 'registrar', 'admin']:
         messages.error(request, 'You do not have permission to process applications.')
         return redirect('dashboard')
 
-    application = get_object_or_404(AdmissionApplication, pk=pk)
-
-    if request.method == 'POST':
-        action = request.POST.get('action')
-
-        if action == 'approve':
-            # Approve and create user/student
-            with transaction.atomic():
-                # Generate username
-                base_username = f"{application.first_name.lower()}.{application.last_name.lower()}"
-                username = base_username
-                counter = 1
-                while User.objects.filter(username=username).exists():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-
-                # Generate random password
-                password = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
-
-                # Create User
-                user = User.objects.create_user(
-                    username=username,
-                    email=application.email,
-                    password=password,
-                    first_name=application.first_name,
-                    last_name=application.last_name,
-                    role='student'
-                )
-
-                # Get active curriculum for the program
-                curriculum = application.program.curricula.filter(active=True).first()
-
-                if not curriculum:
-                    messages.error(request, 'No active curriculum found for the selected program.')
-                    user.delete()
-                    return redirect('admin:admission_admissionapplication_change', pk)
-
-                # Create Student
-                student = Student.objects.create(
-                    user=user,
-                    program=application.program,
-                    curriculum=curriculum,
-                    status='active'
-                )
-
-                # Auto-enroll freshman students
-                if application.applicant_type == 'freshman':
-                    auto_enroll_freshman(student)
-
-                # Update application
-                application.status = 'approved'
-                application.processed_date = timezone.now()
-                application.processed_by = request.user
-                application.generated_user = user
-                application.save()
-
-                messages.success(
-                    request,
-                    f'Application approved! Username: {username}, Temporary Password: {password} '
-                    f'(Please provide these credentials to the student)'
-                )
-
-        elif action == 'reject':
-            application.status = 'rejected'
-            application.processed_date = timezone.now()
-            application.processed_by = request.user
-            application.save()
-            messages.success(request, 'Application rejected.')
-
-        return redirect('admin:admission_admissionapplication_changelist')
-
-    return render(request, 'admission/process_application.html', {'application': application})
+    application = get_object_or_404(AdmissionApplication.objects.select_related('program'), pk=pk)
+
+    if request.method != 'POST':
+        # Applications are reviewed on the staff detail page
+        return redirect('staff:application_detail', application.pk)
+
+    action = request.POST.get('action')
+
+    if action == 'approve':
+        if application.generated_user_id:
+            # Accounts are created when the form is submitted; approving clears the review flag
+            application.needs_registrar_review = False
+            application.save(update_fields=['needs_registrar_review'])
+            messages.success(request, 'Application approved.')
+            return redirect('staff:application_detail', application.pk)
+
+        # Get active curriculum for the program
+        curriculum = application.program.curricula.filter(active=True).first()
+        if not curriculum:
+            messages.error(request, 'No active curriculum found for the selected program.')
+            return redirect('staff:application_detail', application.pk)
+
+        # Generate random password, hashed before the write transaction (hashing is slow by design)
+        password = ''.join(random.choices(string.ascii_letters + string.digits, k=12))
+        user = writer.run(approve_application_unit, application, curriculum, make_password(password))
+
+        messages.success(
+            request,
+            f'Application approved! Username: {user.username}, Temporary Password: {password} '
+            f'(Please provide these credentials to the student)'
+        )
+
+    elif action == 'reject':
+        note = f'Rejected by {request.user.username} on {timezone.localdate():%Y-%m-%d}'
+        application.needs_registrar_review = False
+        application.notes = f'{application.notes}\n{note}'.strip()
+        application.save(update_fields=['needs_registrar_review', 'notes'])
+        messages.success(request, 'Application rejected.')
+
+    return redirect('staff:application_detail', application.pk)
+
+
+@writer.writes_main
+def approve_application_unit(application, curriculum, password_hash):
+    """Write unit for process_application_view: account and student for an application without one"""
+    user = usernames.create_with_username(
+        usernames.base_username(application.first_name, application.last_name),
+        lambda username: User.objects.create(
+            username=username,
+            email=User.objects.normalize_email(application.email),
+            password=password_hash,
+            first_name=application.first_name,
+            last_name=application.last_name,
+            role='student',
+            campus=campus.user_campus()
+        ),
+    )
+
+    student = Student.objects.create(
+        user=user,
+        program=application.program,
+        curriculum=curriculum,
+        status='active',
+        documents_json=storage.copy_documents(application.documents_json)
+    )
+
+    # Auto-enroll freshman students
+    if application.applicant_type == 'freshman':
+        auto_enroll_freshman(student)
+
+    application.generated_user = user
+    application.needs_registrar_review = False
+    application.save(update_fields=['generated_user', 'needs_registrar_review'])
+    return user
 
 
 def auto_enroll_freshman(student):
     """
     Auto-enroll freshman student in recommended subjects (up to 30 units)
     """
-    # Get current active term
-    active_term = Term.objects.filter(is_active=True).first()
-
-    if not active_term:
-        return
-
-    # Get freshman unit cap from settings
-    unit_cap = Setting.get_int('freshman_unit_cap', default=30)
-
-    # Get recommended subjects for Year 1, Term 1
-    recommended_subjects = CurriculumSubject.objects.filter(
-        curriculum=student.curriculum,
-        year_level=1,
-        term_no=1,
-        is_recommended=True
-    ).select_related('subject').order_by('subject__code')
-
-    total_units = 0
-    enrolled_count = 0
-
-    for curr_subject in recommended_subjects:
-        subject = curr_subject.subject
-
-        # Check if adding this subject would exceed unit cap
-        if total_units + subject.units > unit_cap:
-            continue
-
-        # Find an open section for this subject
-        section = Section.objects.filter(
-            subject=subject,
-            term=active_term,
-            status='open'
-        ).first()
-
-        if section and not section.is_full:
-            # Enroll student in this subject
-            StudentSubject.objects.create(
-                student=student,
-                subject=subject,
-                term=active_term,
-                section=section,
-                professor=section.professor,
-                status='enrolled'
-            )
-
-            total_units += subject.units
-            enrolled_count += 1
-
-    return enrolled_count
+    # Same plan as the bulk import: recommended subjects and open sections loaded once
+    enrollments = bulk.FreshmanEnroller().plan(student)
+    enrollment_views.save_enrollments(enrollments)
+    return len(enrollments)
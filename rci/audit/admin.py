@@ -1,5 +1,11 @@
 # rci/audit/admin.py
+import json
+
 from django.contrib import admin
+from django.utils.html import format_html
+from . import cold_storage
+from .fields import stored_size
+from users.models import User
 from .models import AuditTrail, Archive
 
 
@@ -7,9 +13,41 @@ from .models import AuditTrail, Archive
 class AuditTrailAdmin(admin.ModelAdmin):
     list_display = ['actor', 'action', 'entity', 'entity_id', 'created_at']
     list_filter = ['action', 'entity', 'created_at']
-    search_fields = ['actor__username', 'entity', 'entity_id']
+    search_fields = ['entity', 'entity_id']
     ordering = ['-created_at']
-    readonly_fields = ['actor', 'action', 'entity', 'entity_id', 'old_value_json', 'new_value_json', 'created_at']
+    readonly_fields = ['actor', 'action', 'entity', 'entity_id', 'old_value_json', 'new_value_json', 'notes', 'created_at']
+    change_list_template = 'admin/audit/audittrail/change_list.html'
+    cold_results_limit = 200
+
+    def get_queryset(self, request):
+        # Actors are in the main database: one prefetch query per page instead of a join
+        return super().get_queryset(request).prefetch_related('actor')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usernames can't be joined across databases, so matching actors are looked up first
+        filtered = queryset
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            actor_ids = list(User.objects.filter(username__icontains=search_term).values_list('pk', flat=True))
+            if actor_ids:
+                queryset |= filtered.filter(actor_id__in=actor_ids)
+        return queryset, may_have_duplicates
+
+    def changelist_view(self, request, extra_context=None):
+        # Reach into cold segments only when the selected date range goes back that far
+        extra_context = extra_context or {}
+        start = cold_storage.parse_bound(request.GET.get('created_at__gte'))
+        end = cold_storage.parse_bound(request.GET.get('created_at__lt'))
+        if start and cold_storage.covers(start, end):
+            extra_context['cold_entries'] = cold_storage.recent_entries(
+                limit=self.cold_results_limit,
+                start=start,
+                end=end,
+                action=request.GET.get('action__exact') or None,
+                entity=request.GET.get('entity__exact') or None,
+                search=request.GET.get('q') or None,
+            )
+        return super().changelist_view(request, extra_context=extra_context)
 
     def has_add_permission(self, request):
         # Audit trails should only be created programmatically
@@ -26,8 +64,25 @@ class ArchiveAdmin(admin.ModelAdmin):
     list_filter = ['entity', 'archived_at']
     search_fields = ['entity', 'entity_id', 'reason']
     ordering = ['-archived_at']
-    readonly_fields = ['entity', 'entity_id', 'data_snapshot', 'reason', 'archived_by', 'archived_at']
+    readonly_fields = ['entity', 'entity_id', 'snapshot_size', 'snapshot_preview', 'reason', 'archived_by', 'archived_at']
+    exclude = ['data_snapshot']
+    preview_max_chars = 20000
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('archived_by')
 
     def has_add_permission(self, request):
         # Archives should only be created programmatically
         return False
+
+    def snapshot_preview(self, obj):
+        # Decompressed only here, on the detail page
+        text = json.dumps(obj.data_snapshot, indent=2, ensure_ascii=False)
+        if len(text) > self.preview_max_chars:
+            text = text[:self.preview_max_chars] + '\n…'
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', text)
+    snapshot_preview.short_description = 'Snapshot'
+
+    def snapshot_size(self, obj):
+        return f'{stored_size(obj, "data_snapshot"):,} bytes stored'
+    snapshot_size.short_description = 'Stored size'
@@ -0,0 +1,340 @@
+"""
+Cold storage for rolled-over audit trail rows.
+
+Rows older than the hot retention horizon are moved out of the `audit_trail`
+table into one gzip-compressed JSONL segment per month. Segments are
+append-only: every rollover run adds a new gzip member to the end of the
+month's file. A small JSON index records, per month, how many rows each
+entity and action has so readers can skip segments that cannot match.
+
+The index also records how many bytes of each segment are committed. Appends
+are committed by saving the index; readers stop at the committed length, and
+the next append truncates whatever an interrupted run left past it, so a crash
+between writing a segment and saving the index never duplicates rows.
+"""
+import gzip
+import heapq
+import io
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+INDEX_FILENAME = 'index.json'
+
+
+def storage_dir():
+    """Directory holding the cold segments and their index"""
+    return os.fspath(settings.AUDIT_COLD_STORAGE_DIR)
+
+
+def month_key(dt):
+    """'YYYY-MM' bucket for a datetime (in the project time zone)"""
+    if timezone.is_aware(dt):
+        dt = timezone.localtime(dt)
+    return dt.strftime('%Y-%m')
+
+
+def segment_path(month):
+    return os.path.join(storage_dir(), f'{month}.jsonl.gz')
+
+
+def load_index():
+    """Read the on-disk index, returning an empty one if nothing was rolled over yet"""
+    path = os.path.join(storage_dir(), INDEX_FILENAME)
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {'last_id': 0, 'months': {}}
+
+
+def save_index(index):
+    """Atomically replace the index file"""
+    directory = storage_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, INDEX_FILENAME)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(index, fh, indent=2, sort_keys=True)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def serialize_entry(entry):
+    """Flatten an AuditTrail row (with its actor) into a JSON-safe dict"""
+    actor = entry.actor
+    return {
+        'id': entry.id,
+        'actor_id': entry.actor_id,
+        'actor_username': actor.username if actor else None,
+        'actor_name': actor.get_full_name() if actor else None,
+        'action': entry.action,
+        'entity': entry.entity,
+        'entity_id': entry.entity_id,
+        'old_value_json': entry.old_value_json,
+        'new_value_json': entry.new_value_json,
+        'notes': entry.notes,
+        'created_at': entry.created_at.isoformat(),
+    }
+
+
+def append_rows(index, rows):
+    """
+    Append serialized rows to their month segments and update the index in place.
+    The caller saves the index once the segments are durable; that commits them.
+    """
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(month_key(parse_datetime(row['created_at'])), []).append(row)
+
+    os.makedirs(storage_dir(), exist_ok=True)
+    for month, month_rows in sorted(by_month.items()):
+        meta = index['months'].get(month)
+        with open(segment_path(month), 'ab') as raw:
+            # Drop anything an interrupted run appended without committing it to the index
+            # (indexes written before byte tracking have no 'bytes' and are left as they are)
+            committed = meta.get('bytes') if meta else 0
+            if committed is not None:
+                raw.truncate(committed)
+            with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                for row in month_rows:
+                    gz.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8'))
+                    gz.write(b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+            size = raw.tell()
+
+        if meta is None:
+            meta = index['months'][month] = {
+                'rows': 0,
+                'entities': {},
+                'actions': {},
+                'first_at': month_rows[0]['created_at'],
+                'last_at': month_rows[0]['created_at'],
+                'first_id': month_rows[0]['id'],
+                'last_id': month_rows[0]['id'],
+            }
+        meta['bytes'] = size
+        for row in month_rows:
+            meta['rows'] += 1
+            meta['entities'][row['entity']] = meta['entities'].get(row['entity'], 0) + 1
+            meta['actions'][row['action']] = meta['actions'].get(row['action'], 0) + 1
+            meta['first_at'] = min(meta['first_at'], row['created_at'])
+            meta['last_at'] = max(meta['last_at'], row['created_at'])
+            if 'first_id' in meta:
+                meta['first_id'] = min(meta['first_id'], row['id'])
+                meta['last_id'] = max(meta['last_id'], row['id'])
+
+    index['last_id'] = max([index.get('last_id', 0)] + [row['id'] for row in rows])
+
+
+class _Committed(io.RawIOBase):
+    """The first `size` bytes of a segment file: the part the index has committed"""
+
+    def __init__(self, raw, size):
+        self.raw = raw
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.raw.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _read_segment(month, meta):
+    """Yield the committed rows of a month segment as dicts"""
+    path = segment_path(month)
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as raw:
+        size = meta.get('bytes')
+        fileobj = io.BufferedReader(_Committed(raw, size)) if size is not None else raw
+        with gzip.open(fileobj, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                yield json.loads(line)
+
+
+class ColdActor:
+    """Stand-in for the User who performed a cold audit entry"""
+
+    def __init__(self, pk, username, full_name):
+        self.pk = self.id = pk
+        self.username = username or 'System'
+        self._full_name = full_name or ''
+
+    def get_full_name(self):
+        return self._full_name or self.username
+
+    def __str__(self):
+        return self.username
+
+
+class ColdAuditEntry:
+    """Read-only audit entry loaded from a cold segment (mirrors AuditTrail attributes)"""
+    is_cold = True
+
+    def __init__(self, row):
+        self.id = self.pk = row['id']
+        self.actor_id = row['actor_id']
+        self.actor = ColdActor(row['actor_id'], row['actor_username'], row['actor_name']) if row['actor_id'] else None
+        self.action = row['action']
+        self.entity = row['entity']
+        self.entity_id = row['entity_id']
+        self.old_value_json = row['old_value_json']
+        self.new_value_json = row['new_value_json']
+        self.notes = row.get('notes') or ''
+        self.created_at = parse_datetime(row['created_at'])
+
+    def __str__(self):
+        actor_name = self.actor.username if self.actor else 'System'
+        return f"{actor_name} {self.action} {self.entity} #{self.entity_id}"
+
+
+def _month_overlaps(meta, start, end):
+    if start and parse_datetime(meta['last_at']) < start:
+        return False
+    if end and parse_datetime(meta['first_at']) >= end:
+        return False
+    return True
+
+
+def covers(start, end=None):
+    """True when cold storage holds any rows inside [start, end)"""
+    index = load_index()
+    return any(_month_overlaps(meta, start, end) for meta in index['months'].values())
+
+
+def _candidate_months(index, start=None, end=None, action=None, entity=None):
+    """(month, meta) newest first, skipping months whose index entry cannot match"""
+    for month, meta in sorted(index['months'].items(), reverse=True):
+        if not _month_overlaps(meta, start, end):
+            continue
+        if entity and entity not in meta['entities']:
+            continue
+        if action and action not in meta['actions']:
+            continue
+        yield month, meta
+
+
+def _month_entries(month, meta, start=None, end=None, action=None, entity=None, entity_id=None, search=None):
+    for row in _read_segment(month, meta):
+        if action and row['action'] != action:
+            continue
+        if entity and row['entity'] != entity:
+            continue
+        if entity_id is not None and row['entity_id'] != entity_id:
+            continue
+        if search and not any(
+            search in str(value).lower()
+            for value in (row['actor_username'], row['entity'], row['entity_id'])
+            if value is not None
+        ):
+            continue
+        created_at = parse_datetime(row['created_at'])
+        if start and created_at < start:
+            continue
+        if end and created_at >= end:
+            continue
+        yield ColdAuditEntry(row)
+
+
+def iter_entries(start=None, end=None, action=None, entity=None, entity_id=None, search=None):
+    """
+    Yield ColdAuditEntry objects in [start, end) that match the filters.
+    Months whose index entry cannot match (date range, entity, action) are never opened.
+    """
+    index = load_index()
+    search = search.lower() if search else None
+
+    for month, meta in _candidate_months(index, start, end, action, entity):
+        yield from _month_entries(month, meta, start, end, action, entity, entity_id, search)
+
+
+def recent_entries(limit=100, start=None, end=None, action=None, entity=None, entity_id=None, search=None):
+    """
+    Newest `limit` cold entries matching the filters.
+    Months are read newest first and reading stops once no older month can make the cut.
+    """
+    index = load_index()
+    search = search.lower() if search else None
+    newest = []  # min-heap of (created_at, id, entry)
+
+    for month, meta in _candidate_months(index, start, end, action, entity):
+        if len(newest) == limit and parse_datetime(meta['last_at']) < newest[0][0]:
+            break
+        for entry in _month_entries(month, meta, start, end, action, entity, entity_id, search):
+            item = (entry.created_at, entry.id, entry)
+            if len(newest) < limit:
+                heapq.heappush(newest, item)
+            elif item > newest[0]:
+                heapq.heapreplace(newest, item)
+
+    return [entry for _, _, entry in sorted(newest, reverse=True)]
+
+
+def entries_by_id(ids):
+    """
+    {id: ColdAuditEntry} for the given ids. Only months whose id range can hold one of them
+    are read (months indexed before id ranges were recorded are always read).
+    """
+    wanted = set(ids)
+    found = {}
+    index = load_index()
+    for month, meta in sorted(index['months'].items(), reverse=True):
+        if 'first_id' in meta and not any(meta['first_id'] <= pk <= meta['last_id'] for pk in wanted):
+            continue
+        for row in _read_segment(month, meta):
+            if row['id'] in wanted:
+                found[row['id']] = ColdAuditEntry(row)
+                wanted.discard(row['id'])
+        if not wanted:
+            break
+    return found
+
+
+def action_counts(start=None, end=None):
+    """
+    {action: rows} for cold entries in [start, end). Months wholly inside the range are
+    counted from the index; only a month the range cuts through is read.
+    """
+    index = load_index()
+    counts = {}
+
+    for month, meta in _candidate_months(index, start, end):
+        inside = (
+            (not start or parse_datetime(meta['first_at']) >= start)
+            and (not end or parse_datetime(meta['last_at']) < end)
+        )
+        if inside:
+            for action, count in meta['actions'].items():
+                counts[action] = counts.get(action, 0) + count
+        else:
+            for entry in _month_entries(month, meta, start, end):
+                counts[entry.action] = counts.get(entry.action, 0) + 1
+
+    return counts
+
+
+def parse_bound(value):
+    """Parse an admin date filter value ('2025-01-01' or a full datetime) into an aware datetime"""
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        try:
+            dt = datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            return None
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
@@ -0,0 +1,127 @@
+"""
+CompressedJSONField: JSON stored as compressed bytes behind a small codec header.
+
+Stored layout: b'<codec>:' followed by the codec's output, e.g. b'zlib:x\\x9c...'.
+Values loaded from the database stay compressed until the attribute is first
+read, so listing or re-saving rows never pays for decompression.
+"""
+import bz2
+import json
+import lzma
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'bz2': (bz2.compress, bz2.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+    'none': (bytes, bytes),
+}
+
+
+class EncodedValue(bytes):
+    """Raw column bytes that have not been decoded yet"""
+
+
+def default_codec():
+    return getattr(settings, 'ARCHIVE_SNAPSHOT_CODEC', 'zlib')
+
+
+def encode(value, codec=None):
+    codec = codec or default_codec()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown snapshot codec '{codec}'")
+    compress, _ = CODECS[codec]
+    payload = json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return codec.encode('ascii') + b':' + compress(payload)
+
+
+def decode(data):
+    header, separator, body = bytes(data).partition(b':')
+    codec = header.decode('ascii', errors='replace')
+    if not separator or codec not in CODECS:
+        raise ValueError(f"Unknown snapshot codec header '{codec}'")
+    _, decompress = CODECS[codec]
+    return json.loads(decompress(body))
+
+
+class LazyDecodeDescriptor:
+    """Decodes the stored bytes on first attribute access and caches the result"""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.field.attname)
+        if isinstance(value, EncodedValue):
+            value = decode(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    description = 'JSON compressed with a codec header'
+
+    def __init__(self, *args, codec=None, **kwargs):
+        self.codec = codec
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.codec:
+            kwargs['codec'] = self.codec
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, LazyDecodeDescriptor(self))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return EncodedValue(value)
+
+    def pre_save(self, model_instance, add):
+        # Read the raw slot so untouched values are written back without a decode/encode round trip
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, EncodedValue):
+            return bytes(value)
+        return encode(value, self.codec)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return super().get_db_prep_value(value, connection, prepared=True)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decode(value)
+        if isinstance(value, str):
+            # Serialized form produced by value_to_string (dumpdata/loaddata)
+            return json.loads(value)
+        return value
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=DjangoJSONEncoder)
+
+
+def stored_size(instance, attname):
+    """Bytes the value occupies in the database"""
+    value = instance.__dict__.get(attname)
+    if value is None:
+        return 0
+    if isinstance(value, EncodedValue):
+        return len(value)
+    return len(encode(value, instance._meta.get_field(attname).codec))
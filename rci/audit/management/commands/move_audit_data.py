@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from audit import routers, search
+from audit.models import Archive, AuditTrail
+
+
+class Command(BaseCommand):
+    help = 'Copy audit entries and archives written before the audit database existed out of the main database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows copied per transaction')
+        parser.add_argument('--drop', action='store_true',
+                            help='Drop the old tables from the main database once every row is copied')
+
+    def handle(self, *args, **options):
+        if not routers.configured():
+            raise CommandError("No 'audit' database configured.")
+        source = connections['default']
+        tables = source.introspection.table_names()
+
+        started = time.perf_counter()
+        copied = {}
+        for model in (AuditTrail, Archive):
+            if model._meta.db_table not in tables:
+                self.stdout.write(f'   {model._meta.db_table}: not in the main database, nothing to copy')
+                continue
+            copied[model] = self.copy(model, options['batch_size'])
+
+        if copied:
+            self.stdout.write('🔎 Rebuilding the audit search index...')
+            search.rebuild()
+
+        if options['drop']:
+            with source.cursor() as cursor:
+                for model, (source_count, target_count) in copied.items():
+                    if target_count < source_count:
+                        raise CommandError(f'{model._meta.db_table}: only {target_count} of {source_count} rows copied; not dropping.')
+                for model in copied:
+                    cursor.execute(f'DROP TABLE {source.ops.quote_name(model._meta.db_table)}')
+                for table in search.COLUMNS:
+                    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            self.stdout.write('🗑️  Dropped the old audit tables from the main database')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'✓ Audit data moved in {elapsed:.1f}s'))
+
+    def copy(self, model, batch_size):
+        """Copy rows in primary-key order, keeping their ids; returns (source rows, target rows)"""
+        # Columns both databases have (the outbox columns only exist in the audit database)
+        fields = [
+            field.attname for field in model._meta.concrete_fields if field.name not in ('outbox_id', 'outbox_source')
+        ]
+        rows = model.objects.using('default').order_by('pk').values(*fields)
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic(using=routers.ALIAS):
+                # Re-runs skip rows already copied
+                model.objects.using(routers.ALIAS).bulk_create(
+                    [model(**row) for row in batch], ignore_conflicts=True
+                )
+            total += len(batch)
+            last_pk = batch[-1]['id']
+            self.stdout.write(f'  • {model._meta.db_table}: {total} rows')
+        return total, model.objects.using(routers.ALIAS).count()
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over audit entries and archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            raise CommandError('Full-text search needs SQLite with FTS5 and the audit migrations applied.')
+
+        started = time.perf_counter()
+        audit_count, archive_count = search.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Indexed {audit_count} audit entries and {archive_count} archives in {elapsed:.1f}s'
+        ))
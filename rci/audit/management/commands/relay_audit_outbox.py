@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from audit import outbox
+from rci import campus
+
+
+class Command(BaseCommand):
+    help = 'Copy audit entries still waiting in the outbox (of every campus database) into the audit database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        relayed = 0
+        for code, alias in campus.campuses().items():
+            pending = outbox.pending_count(using=alias)
+            self.stdout.write(f'📬 {code}: {pending} audit entries pending')
+            relayed += outbox.relay(batch_size=options['batch_size'], using=alias)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Relayed {relayed} audit entries in {elapsed:.1f}s'))
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from audit import cold_storage
+from audit.models import AuditTrail
+from settingsapp.snapshot import site_settings
+
+
+class Command(BaseCommand):
+    help = 'Move audit trail rows older than the hot retention horizon into monthly cold segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Hot retention in days (defaults to the 'audit_hot_retention_days' setting)",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+
+    def handle(self, *args, **options):
+        days = options['days'] or site_settings.audit_hot_retention_days
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - timedelta(days=days)
+
+        self.stdout.write(f'📦 Rolling over audit entries older than {days} days ({cutoff:%Y-%m-%d %H:%M})')
+
+        candidates = AuditTrail.objects.filter(created_at__lt=cutoff)
+
+        if options['dry_run']:
+            per_month = candidates.annotate(
+                month=TruncMonth('created_at')
+            ).values('month').annotate(count=Count('id')).order_by('month')
+            for item in per_month:
+                self.stdout.write(f"  • {item['month']:%Y-%m}: {item['count']} rows")
+            self.stdout.write(self.style.WARNING(f'Dry run: {candidates.count()} rows would be moved'))
+            return
+
+        index = cold_storage.load_index()
+
+        # Finish an interrupted run: rows written to a segment but not yet deleted
+        if index.get('last_cutoff'):
+            leftovers = AuditTrail.objects.filter(
+                id__lte=index['last_id'],
+                created_at__lt=parse_datetime(index['last_cutoff']),
+            )
+            with transaction.atomic(using=router.db_for_write(AuditTrail)):
+                removed, _ = leftovers.delete()
+            if removed:
+                self.stdout.write(f'  ✓ Removed {removed} rows already present in cold storage')
+
+        index['last_cutoff'] = cutoff.isoformat()
+        moved = 0
+        last_seen = 0
+
+        while True:
+            chunk = list(
+                candidates.filter(id__gt=last_seen).prefetch_related('actor').order_by('id')[:batch_size]
+            )
+            if not chunk:
+                break
+
+            # Segments are made durable before the hot rows are deleted
+            cold_storage.append_rows(index, [cold_storage.serialize_entry(entry) for entry in chunk])
+            cold_storage.save_index(index)
+
+            # Their full-text index rows stay: search loads rolled-over hits from the segments
+            ids = [entry.id for entry in chunk]
+            with transaction.atomic(using=router.db_for_write(AuditTrail)):
+                AuditTrail.objects.filter(id__in=ids).delete()
+
+            moved += len(chunk)
+            last_seen = ids[-1]
+            self.stdout.write(f'  • moved {moved} rows (up to #{last_seen})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Moved {moved} audit rows to {cold_storage.storage_dir()} '
+            f'({AuditTrail.objects.count()} rows remain hot)'
+        ))
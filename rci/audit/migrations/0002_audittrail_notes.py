@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audittrail',
+            name='notes',
+            field=models.TextField(blank=True, help_text='Human-readable summary of the change'),
+        ),
+    ]
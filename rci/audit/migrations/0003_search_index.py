@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.db import migrations
+
+# The tables as this migration created them; later changes belong in later migrations
+TABLES = {
+    'audit_trail_fts': 'entity, action, actor, body',
+    'archive_fts': 'entity, reason, actor, body',
+}
+
+
+def flatten(value):
+    parts = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for item in node.values():
+                walk(item)
+        elif isinstance(node, (list, tuple)):
+            for item in node:
+                walk(item)
+        elif node is not None:
+            parts.append(str(node))
+
+    walk(value)
+    return ' '.join(parts)
+
+
+def actor_text(actor):
+    if actor is None:
+        return 'System'
+    return f'{actor.username} {actor.first_name} {actor.last_name}'.strip()
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        for table, columns in TABLES.items():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{columns}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    alias = connection.alias
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for table, model_name, actor_field, values in (
+        ('audit_trail_fts', 'AuditTrail', 'actor_id',
+         lambda obj: (obj.entity, obj.action, obj.notes, flatten(obj.old_value_json), flatten(obj.new_value_json))),
+        ('archive_fts', 'Archive', 'archived_by_id',
+         lambda obj: (obj.entity, obj.reason, flatten(obj.data_snapshot))),
+    ):
+        model = apps.get_model('audit', model_name)
+        last_pk = 0
+        while True:
+            batch = list(model.objects.using(alias).filter(pk__gt=last_pk).order_by('pk')[:2000])
+            if not batch:
+                break
+            # No query when nothing has an actor (a fresh audit database has no users table)
+            actors = User.objects.using(alias).in_bulk(
+                {getattr(obj, actor_field) for obj in batch if getattr(obj, actor_field)}
+            )
+            rows = []
+            for obj in batch:
+                entity, kind, *body = values(obj)
+                text = ' '.join(filter(None, [str(obj.entity_id or ''), *body]))
+                rows.append((obj.pk, entity, kind, actor_text(actors.get(getattr(obj, actor_field))), text))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO {table}(rowid, {TABLES[table]}) VALUES (%s, %s, %s, %s, %s)',
+                    rows,
+                )
+            last_pk = batch[-1].pk
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_audittrail_notes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
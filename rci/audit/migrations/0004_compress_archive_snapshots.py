@@ -0,0 +1,88 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+import audit.fields
+
+BATCH_SIZE = 1000
+
+
+def compress_snapshots(apps, schema_editor):
+    Archive = apps.get_model('audit', 'Archive')
+    db_alias = schema_editor.connection.alias
+    sizes = {}  # entity -> [rows, json bytes, compressed bytes]
+    last_pk = 0
+
+    while True:
+        batch = list(
+            Archive.objects.using(db_alias).filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for archive in batch:
+            archive.data_blob = archive.data_snapshot
+            before = len(json.dumps(archive.data_snapshot, cls=DjangoJSONEncoder).encode('utf-8'))
+            after = len(audit.fields.encode(archive.data_snapshot))
+            totals = sizes.setdefault(archive.entity, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += before
+            totals[2] += after
+        Archive.objects.using(db_alias).bulk_update(batch, ['data_blob'])
+        last_pk = batch[-1].pk
+
+    for entity, (rows, before, after) in sorted(sizes.items()):
+        saved = 100 - (after * 100 / before) if before else 0
+        print(f'\n  {entity}: {rows} snapshots, {before:,} -> {after:,} bytes ({saved:.0f}% saved)', end='')
+
+
+def decompress_snapshots(apps, schema_editor):
+    Archive = apps.get_model('audit', 'Archive')
+    db_alias = schema_editor.connection.alias
+    last_pk = 0
+
+    while True:
+        batch = list(
+            Archive.objects.using(db_alias).filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for archive in batch:
+            archive.data_snapshot = archive.data_blob
+        Archive.objects.using(db_alias).bulk_update(batch, ['data_snapshot'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archive',
+            name='data_blob',
+            field=audit.fields.CompressedJSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='archive',
+            name='data_snapshot',
+            field=models.JSONField(null=True, help_text='Full JSON of the original record'),
+        ),
+        migrations.RunPython(compress_snapshots, decompress_snapshots),
+        migrations.RemoveField(
+            model_name='archive',
+            name='data_snapshot',
+        ),
+        migrations.RenameField(
+            model_name='archive',
+            old_name='data_blob',
+            new_name='data_snapshot',
+        ),
+        migrations.AlterField(
+            model_name='archive',
+            name='data_snapshot',
+            field=audit.fields.CompressedJSONField(help_text='Full JSON of the original record, stored compressed'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_compress_archive_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audittrail',
+            name='outbox_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='archive',
+            name='archived_by',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archives', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='audittrail',
+            name='actor',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='audit_actions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='audittrail',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AuditOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=100)),
+                ('entity', models.CharField(max_length=100)),
+                ('entity_id', models.BigIntegerField(blank=True, null=True)),
+                ('old_value_json', models.JSONField(blank=True, null=True)),
+                ('new_value_json', models.JSONField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'audit_outbox',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_audit_database'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audittrail',
+            name='outbox_source',
+            field=models.CharField(default='default', editable=False, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='audittrail',
+            name='outbox_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='audittrail',
+            constraint=models.UniqueConstraint(fields=('outbox_source', 'outbox_id'), name='audit_trail_outbox_unique'),
+        ),
+    ]
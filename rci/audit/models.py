@@ -1,22 +1,33 @@
 # rci/audit/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from .fields import CompressedJSONField
 
 
 class AuditTrail(models.Model):
     """Logs every major modification in the system"""
+    # Users live in the main database: no database constraint, and deleting a user keeps
+    # the id here (Django's delete collector cannot reach into the audit database)
     actor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
+        on_delete=models.DO_NOTHING,
         null=True,
-        related_name='audit_actions'
+        related_name='audit_actions',
+        db_constraint=False
     )
     action = models.CharField(max_length=100, help_text="e.g. 'created', 'updated', 'deleted'")
     entity = models.CharField(max_length=100, help_text="e.g. 'Student', 'Grade', 'Section'")
     entity_id = models.BigIntegerField(null=True, blank=True)
     old_value_json = models.JSONField(null=True, blank=True)
     new_value_json = models.JSONField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    notes = models.TextField(blank=True, help_text="Human-readable summary of the change")
+    # Set by the relay: when the change was committed, not when it was copied over
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # AuditOutbox row this entry was relayed from, and the database of that outbox (every
+    # campus shard numbers its own outbox); unique together so a retried relay adds nothing twice
+    outbox_id = models.BigIntegerField(null=True, blank=True, editable=False)
+    outbox_source = models.CharField(max_length=100, default='default', editable=False)
 
     class Meta:
         db_table = 'audit_trail'
@@ -25,6 +36,9 @@ class AuditTrail(models.Model):
             models.Index(fields=['entity', 'entity_id']),
             models.Index(fields=['actor', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['outbox_source', 'outbox_id'], name='audit_trail_outbox_unique'),
+        ]
 
     def __str__(self):
         actor_name = self.actor.username if self.actor else 'System'
@@ -35,13 +49,14 @@ class Archive(models.Model):
     """One unified archive for any entity"""
     entity = models.CharField(max_length=100, help_text="e.g. 'Students', 'Grades', 'Terms'")
     entity_id = models.BigIntegerField(null=True, blank=True)
-    data_snapshot = models.JSONField(help_text="Full JSON of the original record")
+    data_snapshot = CompressedJSONField(help_text="Full JSON of the original record, stored compressed")
     reason = models.CharField(max_length=255, blank=True, help_text="e.g. 'Graduated', 'Term Closed'")
     archived_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
+        on_delete=models.DO_NOTHING,
         null=True,
-        related_name='archives'
+        related_name='archives',
+        db_constraint=False
     )
     archived_at = models.DateTimeField(auto_now_add=True)
 
@@ -55,3 +70,31 @@ class Archive(models.Model):
 
     def __str__(self):
         return f"{self.entity} #{self.entity_id} archived - {self.reason}"
+
+
+class AuditOutbox(models.Model):
+    """
+    Audit entries waiting to be copied into the audit database.
+    Lives in the main database and is written inside the business transaction,
+    so an entry exists exactly when the change it describes was committed.
+    """
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    action = models.CharField(max_length=100)
+    entity = models.CharField(max_length=100)
+    entity_id = models.BigIntegerField(null=True, blank=True)
+    old_value_json = models.JSONField(null=True, blank=True)
+    new_value_json = models.JSONField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'audit_outbox'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Pending {self.action} {self.entity} #{self.entity_id}"
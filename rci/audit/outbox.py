@@ -0,0 +1,74 @@
+"""
+Transactional outbox for audit entries.
+
+`record()` adds an AuditOutbox row in the main database, inside the caller's
+transaction: the entry is committed together with the change it describes,
+and costs one small insert while the write lock is held. After the commit,
+`relay()` copies pending rows into the audit database (AuditTrail plus its
+search index) and deletes them from the outbox.
+
+If a relay fails or the process dies first, the rows simply stay in the
+outbox; the next relay (after any later audited commit, or `manage.py
+relay_audit_outbox`) picks them up. Every campus shard has its own outbox
+with its own ids, so entries are keyed by (outbox_source, outbox_id), the
+outbox's database alias and row id; that pair is unique, so rows copied
+before an interruption are never added twice.
+"""
+import functools
+
+from django.db import router, transaction
+
+from . import search
+from .models import AuditOutbox, AuditTrail
+
+BATCH_SIZE = 500
+
+COPIED_FIELDS = ['actor_id', 'action', 'entity', 'entity_id', 'old_value_json', 'new_value_json', 'notes', 'created_at']
+
+
+def record(actor=None, **fields):
+    """Queue an audit entry in the current transaction; it reaches the audit trail after the commit"""
+    using = router.db_for_write(AuditOutbox)
+    entry = AuditOutbox.objects.using(using).create(actor=actor, **fields)
+    # The outbox is named explicitly: the commit (say, on the writer thread) may happen outside the caller's campus.
+    # robust: a failed relay is logged and retried later, it never fails the committed request
+    transaction.on_commit(functools.partial(relay, using=using), using=using, robust=True)
+    return entry
+
+
+def pending_count(using=None):
+    return AuditOutbox.objects.using(using or router.db_for_read(AuditOutbox)).count()
+
+
+def relay(batch_size=BATCH_SIZE, using=None):
+    """
+    Copy pending rows of one outbox (default: the current campus's) into the audit trail,
+    oldest first; returns the number relayed
+    """
+    using = using or router.db_for_write(AuditOutbox)
+    outbox = AuditOutbox.objects.using(using)
+    relayed = 0
+    while True:
+        pending = list(outbox.order_by('pk')[:batch_size])
+        if not pending:
+            return relayed
+        ids = [row.pk for row in pending]
+
+        with transaction.atomic(using=router.db_for_write(AuditTrail)):
+            AuditTrail.objects.bulk_create(
+                [
+                    AuditTrail(
+                        outbox_source=using, outbox_id=row.pk,
+                        **{name: getattr(row, name) for name in COPIED_FIELDS},
+                    )
+                    for row in pending
+                ],
+                ignore_conflicts=True,
+            )
+            # Ids are not returned when conflicts are ignored; index whatever is stored for this batch
+            search.index_audit_entries(
+                AuditTrail.objects.filter(outbox_source=using, outbox_id__in=ids).prefetch_related('actor')
+            )
+
+        outbox.filter(pk__in=ids).delete()
+        relayed += len(pending)
@@ -0,0 +1,58 @@
+"""
+Database routing for the audit app.
+
+AuditTrail, Archive and their search index live in the "audit" database, so
+writing and indexing them never holds the main database's write lock. Only
+AuditOutbox stays with the business data (the main database, or the campus
+shard): business transactions add their audit entries there and
+`audit.outbox` relays them after the commit.
+
+Run `migrate` for the main database and `migrate --database audit` for the
+audit database; each only creates its own tables.
+"""
+from django.conf import settings
+
+ALIAS = 'audit'
+
+# Audit models that stay with the business data (main database or campus shard)
+MAIN_MODELS = {'auditoutbox'}
+
+
+def configured():
+    return ALIAS in settings.DATABASES
+
+
+def _is_audit(model):
+    return model._meta.app_label == 'audit' and model._meta.model_name not in MAIN_MODELS
+
+
+class AuditRouter:
+    """Send the audit app to its own database"""
+
+    def db_for_read(self, model, **hints):
+        if _is_audit(model):
+            return ALIAS if configured() else 'default'
+        # The outbox is routed like the business data it is written with
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # actor / archived_by point at users in the main database (no database constraint).
+        # Instances, not type(): request.user is a lazy wrapper around the user
+        if _is_audit(obj1) or _is_audit(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not configured():
+            return None
+        if app_label == 'audit':
+            # RunPython operations (search index, snapshot compression) belong to the audit tables
+            if model_name in MAIN_MODELS:
+                return False if db == ALIAS else None
+            return db == ALIAS
+        if db == ALIAS:
+            return False
+        return None
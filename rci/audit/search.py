@@ -0,0 +1,221 @@
+"""
+Full-text search over the audit trail and archive snapshots.
+
+Two SQLite FTS5 tables mirror `audit_trail` and `archive` (rowid = primary key).
+They are kept in sync by the signal handlers in `audit.signals`; code that
+writes with `bulk_create` or raw deletes calls `index_*` / `unindex_*` itself.
+Actors are users in the main database, so they are prefetched rather than joined.
+
+Audit rows keep their index entries when `rollover_audit` moves them to cold
+storage; hits on them are loaded back from the cold segments.
+"""
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+
+from rci import fts
+from users.models import User
+from . import cold_storage
+from .models import AuditTrail, Archive
+
+AUDIT_TABLE = 'audit_trail_fts'
+ARCHIVE_TABLE = 'archive_fts'
+
+# bm25 column weights: entity, action/reason, actor, body
+COLUMN_WEIGHTS = '2.0, 1.0, 3.0, 1.0'
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+COLUMNS = {
+    AUDIT_TABLE: 'entity, action, actor, body',
+    ARCHIVE_TABLE: 'entity, reason, actor, body',
+}
+
+
+# Aliases already known to have the FTS tables, so saves don't re-introspect
+_enabled_aliases = set()
+
+
+def _connection():
+    return connections[router.db_for_write(AuditTrail)]
+
+
+def is_enabled(connection=None):
+    connection = connection or _connection()
+    if connection.alias in _enabled_aliases:
+        return True
+    if fts.fts5_available(connection) and fts.table_exists(connection, AUDIT_TABLE):
+        _enabled_aliases.add(connection.alias)
+        return True
+    return False
+
+
+def _actor_text(actor):
+    if actor is None:
+        return 'System'
+    return f'{actor.username} {actor.get_full_name()}'.strip()
+
+
+def audit_row(entry):
+    body = ' '.join(filter(None, [
+        str(entry.entity_id or ''),
+        entry.notes,
+        fts.flatten_json(entry.old_value_json),
+        fts.flatten_json(entry.new_value_json),
+    ]))
+    return (entry.id, entry.entity, entry.action, _actor_text(entry.actor), body)
+
+
+def archive_row(archive):
+    body = ' '.join(filter(None, [
+        str(archive.entity_id or ''),
+        fts.flatten_json(archive.data_snapshot),
+    ]))
+    return (archive.id, archive.entity, archive.reason, _actor_text(archive.archived_by), body)
+
+
+def _replace(table, rows, connection=None):
+    connection = connection or _connection()
+    if not rows or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {table}(rowid, {COLUMNS[table]}) VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def _delete(table, ids, connection=None):
+    connection = connection or _connection()
+    if not ids or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def index_audit_entries(entries, connection=None):
+    _replace(AUDIT_TABLE, [audit_row(entry) for entry in entries], connection)
+
+
+def index_archives(archives, connection=None):
+    _replace(ARCHIVE_TABLE, [archive_row(archive) for archive in archives], connection)
+
+
+def unindex_audit_entries(ids, connection=None):
+    _delete(AUDIT_TABLE, list(ids), connection)
+
+
+def unindex_archives(ids, connection=None):
+    _delete(ARCHIVE_TABLE, list(ids), connection)
+
+
+class SearchHit:
+    """One ranked match: `obj` is the AuditTrail (or ColdAuditEntry) or Archive row"""
+
+    def __init__(self, source, obj, rank, snippet):
+        self.source = source
+        self.obj = obj
+        self.rank = rank
+        self.snippet = snippet
+
+
+def _render_snippet(raw):
+    return escape(raw).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+
+def _ranked_ids(cursor, table, expression, limit):
+    cursor.execute(
+        f"SELECT rowid, bm25({table}, {COLUMN_WEIGHTS}) AS rank, "
+        f"snippet({table}, 3, %s, %s, '…', 12) "
+        f"FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s",
+        [SNIPPET_START, SNIPPET_END, expression, limit],
+    )
+    return cursor.fetchall()
+
+
+def search(text, limit=50):
+    """Ranked hits across audit entries and archives (best match first)"""
+    expression = fts.match_expression(text)
+    if not expression:
+        return []
+
+    connection = _connection()
+    if not is_enabled(connection):
+        return _fallback_search(text, limit)
+
+    with connection.cursor() as cursor:
+        audit_matches = _ranked_ids(cursor, AUDIT_TABLE, expression, limit)
+        archive_matches = _ranked_ids(cursor, ARCHIVE_TABLE, expression, limit)
+
+    audit_ids = [pk for pk, _, _ in audit_matches]
+    audit_rows = AuditTrail.objects.prefetch_related('actor').in_bulk(audit_ids)
+    rolled_over = [pk for pk in audit_ids if pk not in audit_rows]
+    if rolled_over:
+        audit_rows.update(cold_storage.entries_by_id(rolled_over))
+    archive_rows = Archive.objects.prefetch_related('archived_by').in_bulk([pk for pk, _, _ in archive_matches])
+
+    hits = [
+        SearchHit('audit', audit_rows[pk], rank, _render_snippet(snippet))
+        for pk, rank, snippet in audit_matches if pk in audit_rows
+    ] + [
+        SearchHit('archive', archive_rows[pk], rank, _render_snippet(snippet))
+        for pk, rank, snippet in archive_matches if pk in archive_rows
+    ]
+    # bm25 scores are negative: smaller means a better match
+    hits.sort(key=lambda hit: hit.rank)
+    return hits[:limit]
+
+
+def _fallback_search(text, limit):
+    """Plain substring search for databases without FTS5"""
+    actor_ids = User.objects.filter(username__icontains=text).values_list('pk', flat=True)
+    audit_rows = AuditTrail.objects.prefetch_related('actor').filter(
+        Q(entity__icontains=text) |
+        Q(action__icontains=text) |
+        Q(actor_id__in=list(actor_ids)) |
+        Q(notes__icontains=text)
+    )[:limit]
+    archive_rows = Archive.objects.prefetch_related('archived_by').filter(
+        Q(entity__icontains=text) |
+        Q(reason__icontains=text)
+    )[:limit]
+    hits = [SearchHit('audit', row, 0, escape(row.notes)) for row in audit_rows]
+    hits += [SearchHit('archive', row, 0, escape(row.reason)) for row in archive_rows]
+    return hits[:limit]
+
+
+def rebuild(batch_size=2000, connection=None):
+    """
+    Re-index every audit entry (hot and rolled over to cold storage) and archive in batches;
+    returns (audit, archive) counts.
+    """
+    connection = connection or _connection()
+    counts = []
+    for table, queryset, row in (
+        (AUDIT_TABLE, AuditTrail.objects.using(connection.alias).prefetch_related('actor'), audit_row),
+        (ARCHIVE_TABLE, Archive.objects.using(connection.alias).prefetch_related('archived_by'), archive_row),
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            _replace(table, [row(obj) for obj in batch], connection)
+            total += len(batch)
+            last_pk = batch[-1].pk
+        counts.append(total)
+
+    batch = []
+    for entry in cold_storage.iter_entries():
+        batch.append(audit_row(entry))
+        if len(batch) == batch_size:
+            _replace(AUDIT_TABLE, batch, connection)
+            counts[0] += len(batch)
+            batch = []
+    _replace(AUDIT_TABLE, batch, connection)
+    counts[0] += len(batch)
+    return tuple(counts)
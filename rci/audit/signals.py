@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import AuditTrail, Archive
+
+
+@receiver(post_save, sender=AuditTrail)
+def index_audit_entry(sender, instance, **kwargs):
+    """Keep the audit full-text index in sync"""
+    search.index_audit_entries([instance])
+
+
+@receiver(post_save, sender=Archive)
+def index_archive(sender, instance, **kwargs):
+    """Keep the archive full-text index in sync"""
+    search.index_archives([instance])
+
+
+@receiver(post_delete, sender=Archive)
+def unindex_archive(sender, instance, **kwargs):
+    search.unindex_archives([instance.pk])
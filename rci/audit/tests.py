@@ -1,3 +1,179 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from audit import cold_storage, fields, outbox, search
+from audit.models import Archive, AuditOutbox, AuditTrail
+from rci import campus
+
+
+def row(pk, created_at, action='update'):
+    return {
+        'id': pk,
+        'actor_id': None,
+        'actor_username': None,
+        'actor_name': None,
+        'action': action,
+        'entity': 'Student',
+        'entity_id': str(pk),
+        'old_value_json': None,
+        'new_value_json': None,
+        'notes': '',
+        'created_at': created_at.isoformat(),
+    }
+
+
+class ColdStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(AUDIT_COLD_STORAGE_DIR=directory.name))
+        self.march = timezone.make_aware(datetime(2025, 3, 1))
+
+    def append(self, rows):
+        index = cold_storage.load_index()
+        cold_storage.append_rows(index, rows)
+        return index
+
+    def test_uncommitted_append_is_invisible_and_replaced(self):
+        cold_storage.save_index(self.append([row(1, self.march), row(2, self.march)]))
+
+        # Crash between writing the segment and saving the index
+        self.append([row(3, self.march)])
+        self.assertEqual([e.id for e in cold_storage.iter_entries()], [1, 2])
+
+        # The rerun appends the same rows again; they are stored once
+        cold_storage.save_index(self.append([row(3, self.march)]))
+        self.assertEqual(sorted(e.id for e in cold_storage.iter_entries()), [1, 2, 3])
+        with gzip.open(cold_storage.segment_path('2025-03'), 'rt') as fh:
+            self.assertEqual(len(fh.readlines()), 3)
+
+    def test_segment_without_index_entry_is_replaced(self):
+        self.append([row(1, self.march)])
+        self.assertTrue(os.path.exists(cold_storage.segment_path('2025-03')))
+        self.assertEqual(list(cold_storage.iter_entries()), [])
+
+        cold_storage.save_index(self.append([row(1, self.march)]))
+        self.assertEqual([e.id for e in cold_storage.iter_entries()], [1])
+
+    def test_recent_entries_stops_at_older_months(self):
+        april = timezone.make_aware(datetime(2025, 4, 1))
+        rows = [row(pk, self.march + timedelta(hours=pk)) for pk in range(1, 4)]
+        rows += [row(pk, april + timedelta(hours=pk)) for pk in range(4, 7)]
+        cold_storage.save_index(self.append(rows))
+        os.remove(cold_storage.segment_path('2025-03'))
+
+        # The three newest rows are all in April, so March is never opened
+        self.assertEqual([e.id for e in cold_storage.recent_entries(limit=3)], [6, 5, 4])
+
+    def test_action_counts_read_only_the_month_the_range_cuts(self):
+        april = timezone.make_aware(datetime(2025, 4, 1))
+        rows = [row(1, self.march, 'create'), row(2, self.march + timedelta(days=10), 'update')]
+        rows += [row(3, april, 'update'), row(4, april + timedelta(days=1), 'delete')]
+        cold_storage.save_index(self.append(rows))
+
+        start = self.march + timedelta(days=5)
+        self.assertEqual(cold_storage.action_counts(start=start), {'update': 2, 'delete': 1})
+
+        # April is counted from the index alone
+        os.remove(cold_storage.segment_path('2025-04'))
+        self.assertEqual(cold_storage.action_counts(start=start), {'update': 2, 'delete': 1})
+
+
+class RolloverSearchTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(AUDIT_COLD_STORAGE_DIR=directory.name))
+
+    def test_rolled_over_entries_stay_searchable(self):
+        if not search.is_enabled():
+            self.skipTest('SQLite without FTS5')
+        old = AuditTrail.objects.create(action='update', entity='Grade', entity_id=7, notes='quokka regrade')
+        AuditTrail.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=400))
+        AuditTrail.objects.create(action='update', entity='Grade', entity_id=8, notes='quokka recheck')
+
+        call_command('rollover_audit', days=30, stdout=io.StringIO())
+
+        self.assertFalse(AuditTrail.objects.filter(pk=old.pk).exists())
+        hits = {hit.obj.pk: hit.obj for hit in search.search('quokka')}
+        self.assertEqual(set(hits), {old.pk, old.pk + 1})
+        self.assertTrue(getattr(hits[old.pk], 'is_cold', False))
+        self.assertEqual(hits[old.pk].entity_id, 7)
+
+        # A rebuild indexes the cold rows again
+        self.assertEqual(search.rebuild(), (2, 0))
+        self.assertEqual(len(search.search('regrade')), 1)
+
+
+class CompressedJSONFieldTests(TestCase):
+    databases = '__all__'
+
+    snapshot = {'model': 'grades.grade', 'fields': {'grade': '1.75', 'remarks': 'Ñandú', 'units': [1, 2.5, None]}}
+
+    def test_round_trip_with_every_codec(self):
+        for codec in fields.CODECS:
+            with self.subTest(codec), override_settings(ARCHIVE_SNAPSHOT_CODEC=codec):
+                archive = Archive.objects.create(entity='Grade', entity_id=1, data_snapshot=self.snapshot)
+                stored = Archive.objects.filter(pk=archive.pk).values_list('data_snapshot', flat=True).get()
+                self.assertTrue(bytes(stored).startswith(codec.encode() + b':'))
+                self.assertEqual(Archive.objects.get(pk=archive.pk).data_snapshot, self.snapshot)
+
+    def test_values_stay_encoded_until_read(self):
+        archive = Archive.objects.create(entity='Grade', entity_id=1, data_snapshot=self.snapshot)
+        stored = Archive.objects.filter(pk=archive.pk).values_list('data_snapshot', flat=True)
+        before = bytes(stored.get())
+        loaded = Archive.objects.get(pk=archive.pk)
+        self.assertIsInstance(loaded.__dict__['data_snapshot'], fields.EncodedValue)
+
+        # Re-saving a row writes the stored bytes back as they were
+        loaded.reason = 'Re-saved'
+        loaded.save()
+        self.assertEqual(bytes(stored.get()), before)
+        self.assertEqual(Archive.objects.get(pk=archive.pk).data_snapshot, self.snapshot)
+
+    def test_unknown_codec_header(self):
+        with self.assertRaises(ValueError):
+            fields.decode(b'snappy:...')
+
+
+class OutboxRelayTests(TestCase):
+    databases = '__all__'
+
+    def test_same_outbox_id_from_two_sources_is_kept_once_each(self):
+        for source in ('default', 'campus_north', 'default'):
+            AuditTrail.objects.bulk_create(
+                [AuditTrail(outbox_source=source, outbox_id=1, action='create', entity='Grade')],
+                ignore_conflicts=True,
+            )
+        self.assertEqual(
+            sorted(AuditTrail.objects.filter(outbox_id=1).values_list('outbox_source', flat=True)),
+            ['campus_north', 'default'],
+        )
+
+    @unittest.skipUnless(len(campus.shard_aliases()) >= 2, 'needs CAMPUS_SHARDS with two shards')
+    def test_shards_with_the_same_outbox_ids_all_reach_the_trail(self):
+        aliases = campus.shard_aliases()[:2]
+        for alias in aliases:
+            # Each shard numbers its own outbox, so both start from the same id
+            AuditOutbox.objects.using(alias).create(pk=9001, action='update', entity='Grade', notes=alias)
+
+        call_command('relay_audit_outbox', stdout=io.StringIO())
+        # Rows another relay already copied are not added twice
+        AuditOutbox.objects.using(aliases[0]).create(pk=9001, action='update', entity='Grade', notes=aliases[0])
+        outbox.relay(using=aliases[0])
+
+        self.assertEqual(
+            sorted(AuditTrail.objects.filter(outbox_id=9001).values_list('outbox_source', 'notes')),
+            sorted((alias, alias) for alias in aliases),
+        )
+        self.assertFalse(any(AuditOutbox.objects.using(alias).exists() for alias in aliases))
@@ -0,0 +1,35 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
+from .models import StoredBlob
+from .storage import DOCUMENT_KINDS
+
+
+def document_links(documents_json):
+    """Readonly admin rendering of a documents_json dict as download links"""
+    labels = dict(DOCUMENT_KINDS)
+    items = []
+    for kind, value in (documents_json or {}).items():
+        label = labels.get(kind, kind)
+        if isinstance(value, dict) and value.get('sha256'):
+            url = reverse('documents:download', args=[value['sha256']])
+            items.append((label, format_html('<a href="{}">{}</a> ({} KB)', url, value.get('name'), value.get('size', 0) // 1024)))
+        else:
+            # Legacy entries only recorded a file name
+            items.append((label, format_html('{} (not stored)', value)))
+    if not items:
+        return '-'
+    return format_html('<ul>{}</ul>', format_html_join('', '<li>{}: {}</li>', items))
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'name', 'size', 'content_type', 'ref_count', 'created_at']
+    list_filter = ['content_type']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'name', 'size', 'content_type', 'ref_count', 'created_at']
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        # Blobs are created by uploads only
+        return False
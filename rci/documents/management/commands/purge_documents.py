@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents import storage
+from documents.models import StoredBlob
+
+
+class Command(BaseCommand):
+    help = 'Delete stored documents that no record references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orphan-hours', type=int, default=24,
+                            help='Also remove files without a blob row (and stale temp uploads) older than this')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be removed')
+
+    def handle(self, *args, **options):
+        unreferenced = StoredBlob.objects.filter(ref_count=0)
+        if options['dry_run']:
+            count = unreferenced.count()
+            self.stdout.write(self.style.WARNING(f'Dry run: {count} unreferenced blobs would be removed'))
+            return
+
+        removed, freed = storage.purge_unreferenced()
+        self.stdout.write(f'  ✓ Removed {removed} unreferenced blobs ({freed / 1024 / 1024:.1f} MB)')
+
+        # Files left behind by rolled-back transactions or interrupted uploads
+        cutoff = time.time() - options['orphan_hours'] * 3600
+        known = set(StoredBlob.objects.values_list('sha256', flat=True))
+        orphans = 0
+        for directory, _, files in os.walk(storage.storage_dir()):
+            for name in files:
+                path = os.path.join(directory, name)
+                in_tmp = os.path.basename(directory) == 'tmp'
+                if (in_tmp or name not in known) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Document storage cleaned: {removed} blobs and {orphans} orphaned files removed'
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('content_type', models.CharField(default='application/octet-stream', max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of documents_json entries pointing at this blob; 0 means it can be purged')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'stored_blobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['ref_count'], name='stored_blob_ref_cou_87f4ba_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:33
+
+import os
+
+from django.db import migrations, models
+
+
+def name_blobs(apps, schema_editor):
+    """Name existing blobs after a record referencing them (records in this database only)"""
+    db_alias = schema_editor.connection.alias
+    StoredBlob = apps.get_model('documents', 'StoredBlob')
+    names = {}
+    for label in ('admission.AdmissionApplication', 'enrollment.Student'):
+        model = apps.get_model(label)
+        for documents in model.objects.using(db_alias).values_list('documents_json', flat=True).iterator(chunk_size=1000):
+            for value in (documents or {}).values():
+                if isinstance(value, dict) and value.get('sha256') and value.get('name'):
+                    names.setdefault(value['sha256'], os.path.basename(value['name'])[:255])
+    hashes = list(names)
+    for start in range(0, len(hashes), 500):
+        batch = list(StoredBlob.objects.using(db_alias).filter(sha256__in=hashes[start:start + 500], name=''))
+        for blob in batch:
+            blob.name = names[blob.sha256]
+        StoredBlob.objects.using(db_alias).bulk_update(batch, ['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admission', '0005_keyset_indexes'),
+        ('documents', '0001_initial'),
+        ('enrollment', '0004_student_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedblob',
+            name='name',
+            field=models.CharField(blank=True, help_text='File name of the first upload; staff downloads use it instead of searching every record', max_length=255),
+        ),
+        migrations.RunPython(name_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# rci/documents/models.py
+from django.db import models
+
+
+class StoredBlob(models.Model):
+    """One stored file, addressed by the SHA-256 of its content and shared by every reference"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, default='application/octet-stream')
+    name = models.CharField(
+        max_length=255, blank=True,
+        help_text="File name of the first upload; staff downloads use it instead of searching every record"
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of documents_json entries pointing at this blob; 0 means it can be purged"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'stored_blobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ref_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.size} bytes, {self.ref_count} refs)"
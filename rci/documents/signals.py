@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from admission.models import AdmissionApplication
+from enrollment.models import Student
+from . import storage
+
+
+@receiver(post_delete, sender=AdmissionApplication)
+@receiver(post_delete, sender=Student)
+def release_documents(sender, instance, **kwargs):
+    """Each documents_json entry holds one blob reference"""
+    for sha256 in storage.referenced_hashes(instance.documents_json):
+        storage.release(sha256)
@@ -0,0 +1,156 @@
+"""
+Content-addressed document storage.
+
+Files live at DOCUMENT_STORAGE_DIR/ab/cd/<sha256>. Identical uploads share one
+file and one StoredBlob row whose ref_count tracks how many documents_json
+entries point at it. A blob whose count drops to zero is removed by the
+purge_documents command.
+
+documents_json entries look like:
+    {"tor": {"sha256": "...", "name": "tor.pdf", "size": 123, "content_type": "application/pdf"}}
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import StoredBlob
+
+CHUNK_SIZE = 64 * 1024
+
+DOCUMENT_KINDS = [
+    ('tor', 'Transcript of Records'),
+    ('psa', 'PSA Birth Certificate'),
+    ('valid_id', 'Valid ID'),
+]
+
+
+def storage_dir():
+    return os.fspath(settings.DOCUMENT_STORAGE_DIR)
+
+
+def blob_path(sha256):
+    return os.path.join(storage_dir(), sha256[:2], sha256[2:4], sha256)
+
+
+def temp_file():
+    """Open a temporary file on the storage volume, so finished uploads can be renamed into place"""
+    directory = os.path.join(storage_dir(), 'tmp')
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=directory, delete=False)
+
+
+def _hash_to_temp(uploaded):
+    """Copy an upload to a temp file chunk by chunk, hashing as it goes"""
+    digest = hashlib.sha256()
+    size = 0
+    with temp_file() as tmp:
+        for chunk in uploaded.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+    return tmp.name, digest.hexdigest(), size
+
+
+def store(uploaded):
+    """
+    Store an uploaded file (deduplicated) and take one reference on its blob.
+    Uploads received through HashingFileUploadHandler are already hashed on disk;
+    anything else is streamed through a temp file first.
+    """
+    if getattr(uploaded, 'sha256', None):
+        tmp_path, sha256, size = uploaded.temporary_file_path(), uploaded.sha256, uploaded.size
+    else:
+        tmp_path, sha256, size = _hash_to_temp(uploaded)
+
+    try:
+        # The row and the file are settled together while this transaction holds the write lock
+        # (transactions begin IMMEDIATE), as purge_unreferenced() deletes them: a purge either
+        # finishes first, and the file is written again here, or waits for the new reference
+        with transaction.atomic():
+            blob, _ = StoredBlob.objects.get_or_create(
+                sha256=sha256,
+                defaults={
+                    'size': size,
+                    'content_type': uploaded.content_type or 'application/octet-stream',
+                    'name': os.path.basename(uploaded.name or '')[:255],
+                },
+            )
+            StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+            blob.ref_count += 1
+            path = blob_path(sha256)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return blob
+
+
+def acquire(sha256):
+    """Take another reference on an existing blob (e.g. copying a document to a second record)"""
+    StoredBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1)
+
+
+def release(sha256):
+    """Drop one reference; the file stays until purge_documents removes unreferenced blobs"""
+    StoredBlob.objects.filter(sha256=sha256, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+def entry(blob, name):
+    """The documents_json value for a stored blob"""
+    return {
+        'sha256': blob.sha256,
+        'name': os.path.basename(name or '') or blob.sha256[:12],
+        'size': blob.size,
+        'content_type': blob.content_type,
+    }
+
+
+def referenced_hashes(documents_json):
+    """SHA-256 values referenced by a documents_json dict (legacy plain filenames are ignored)"""
+    return [
+        value['sha256']
+        for value in (documents_json or {}).values()
+        if isinstance(value, dict) and value.get('sha256')
+    ]
+
+
+def attach(instance, kind, uploaded):
+    """Store `uploaded` as instance.documents_json[kind], releasing any file it replaces"""
+    blob = store(uploaded)
+    previous = (instance.documents_json or {}).get(kind)
+    instance.documents_json = {**(instance.documents_json or {}), kind: entry(blob, uploaded.name)}
+    if isinstance(previous, dict) and previous.get('sha256'):
+        release(previous['sha256'])
+    return blob
+
+
+def copy_documents(source_json):
+    """documents_json for a second record sharing the same blobs (one extra reference each)"""
+    for sha256 in referenced_hashes(source_json):
+        acquire(sha256)
+    return dict(source_json or {})
+
+
+def purge_unreferenced():
+    """Delete blobs nobody references any more; returns (blobs removed, bytes freed)"""
+    removed = freed = 0
+    for pk, sha256, size in list(StoredBlob.objects.filter(ref_count=0).values_list('pk', 'sha256', 'size')):
+        # The file goes inside the row's transaction, under the write lock store() takes too
+        with transaction.atomic():
+            # Re-check the count in the delete itself so a blob stored again since keeps its file
+            deleted, _ = StoredBlob.objects.filter(pk=pk, ref_count=0).delete()
+            if not deleted:
+                continue
+            try:
+                os.remove(blob_path(sha256))
+            except FileNotFoundError:
+                pass
+        removed += 1
+        freed += size
+    return removed, freed
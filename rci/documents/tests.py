@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from documents import storage
+from documents.models import StoredBlob
+from rci.query_budget import Budget, Fixture, QueryBudgetTestCase
+from users.models import User
+
+BUDGETS = [
+    Budget('documents:download', 7, role='student', args=lambda fixture: [fixture.document.sha256]),
+    Budget('documents:download', 5, role='registrar', args=lambda fixture: [fixture.document.sha256]),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'documents.urls')
+
+
+class DownloadTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(DOCUMENT_STORAGE_DIR=directory.name))
+        self.fixture = Fixture()
+        self.content = b'%PDF-1.4 query budget'
+        self.etag = f'"{self.fixture.document.sha256}"'
+        self.client.force_login(self.fixture.users['student'])
+
+    def get(self, **headers):
+        return self.client.get(reverse('documents:download', args=[self.fixture.document.sha256]), headers=headers)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_byte_ranges(self):
+        response = self.get(Range='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 0-3/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+
+        # Open-ended and suffix ranges
+        self.assertEqual(b''.join(self.get(Range='bytes=9-').streaming_content), self.content[9:])
+        self.assertEqual(b''.join(self.get(Range='bytes=-6').streaming_content), b'budget')
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_if_range_with_another_validator_sends_the_whole_file(self):
+        response = self.get(Range='bytes=0-3', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+        response = self.get(Range='bytes=0-3', **{'If-Range': self.etag})
+        self.assertEqual(response.status_code, 206)
+
+    def test_if_none_match(self):
+        response = self.get(**{'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+
+    def test_staff_get_the_uploaded_name(self):
+        self.client.force_login(self.fixture.users['registrar'])
+        self.assertIn('tor.pdf', self.get()['Content-Disposition'])
+
+    def test_other_students_cannot_download(self):
+        self.fixture.grow(1)
+        self.client.force_login(User.objects.get(username='budget_student1'))
+        self.assertEqual(self.get().status_code, 404)
+
+
+class StorageTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(DOCUMENT_STORAGE_DIR=directory.name))
+
+    def upload(self, content=b'%PDF-1.4 storage', name='id.pdf'):
+        return SimpleUploadedFile(name, content, content_type='application/pdf')
+
+    def test_identical_uploads_share_a_blob(self):
+        first, second = storage.store(self.upload()), storage.store(self.upload(name='copy.pdf'))
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(StoredBlob.objects.get(pk=first.pk).ref_count, 2)
+        self.assertEqual(StoredBlob.objects.get(pk=first.pk).name, 'id.pdf')
+
+    def test_purge_removes_only_unreferenced_blobs(self):
+        kept, released = storage.store(self.upload()), storage.store(self.upload(b'released'))
+        storage.release(released.sha256)
+
+        self.assertEqual(storage.purge_unreferenced(), (1, len(b'released')))
+        self.assertTrue(os.path.exists(storage.blob_path(kept.sha256)))
+        self.assertFalse(os.path.exists(storage.blob_path(released.sha256)))
+        self.assertFalse(StoredBlob.objects.filter(pk=released.pk).exists())
+
+    def test_storing_again_restores_a_missing_file(self):
+        # A row whose file is gone (a purge that removed the file but could not commit)
+        blob = storage.store(self.upload())
+        os.remove(storage.blob_path(blob.sha256))
+
+        storage.store(self.upload())
+        with open(storage.blob_path(blob.sha256), 'rb') as fh:
+            self.assertEqual(fh.read(), b'%PDF-1.4 storage')
@@ -0,0 +1,90 @@
+"""
+Upload handler that streams each file to the storage volume while hashing it.
+
+Django's default handlers keep small uploads in memory and would need a second
+pass to hash them. This handler writes every chunk straight to a temp file
+next to the blob store and updates a SHA-256 digest on the way, so storing the
+file afterwards is a rename. Uploads over DOCUMENT_MAX_SIZE are cut off.
+"""
+import hashlib
+import os
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .storage import temp_file
+
+
+class HashedUploadedFile(UploadedFile):
+    """A finished upload on disk with its SHA-256 already computed"""
+
+    def __init__(self, file, name, content_type, size, charset, sha256):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        # Called when the request finishes; a file that was never stored is discarded
+        self.file.close()
+        try:
+            os.remove(self.file.name)
+        except FileNotFoundError:
+            pass
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.file = temp_file()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.DOCUMENT_MAX_SIZE:
+            self.upload_interrupted()
+            raise StopUpload(connection_reset=True)
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        # Returning None stops later handlers from seeing (and buffering) the chunk
+        return None
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        return HashedUploadedFile(
+            self.file, self.file_name, self.content_type, file_size, self.charset, self.digest.hexdigest()
+        )
+
+    def upload_interrupted(self):
+        if getattr(self, 'file', None):
+            self.file.close()
+            try:
+                os.remove(self.file.name)
+            except FileNotFoundError:
+                pass
+
+
+def hashing_uploads(view):
+    """
+    Route a view's file uploads through HashingFileUploadHandler.
+
+    Upload handlers must be replaced before anything reads request.POST, and the CSRF
+    middleware reads it first, so CSRF is checked inside the wrapper instead (the
+    pattern from Django's upload handler documentation).
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.upload_handlers = [HashingFileUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return wrapped
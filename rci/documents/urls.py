@@ -0,0 +1,9 @@
+# rci/documents/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'documents'
+
+urlpatterns = [
+    path('<str:sha256>/', views.download_view, name='download'),
+]
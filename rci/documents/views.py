@@ -0,0 +1,108 @@
+# rci/documents/views.py
+import os
+import re
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+
+from admission.models import AdmissionApplication
+from enrollment.models import Student
+from .models import StoredBlob
+from .storage import CHUNK_SIZE, blob_path
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Roles that review applicant and student documents
+STAFF_ROLES = ['admission', 'registrar', 'dean', 'admin']
+
+
+def _document_name(user, blob):
+    """File name of the document if `user` may read it, else None"""
+    if user.is_superuser or user.role in STAFF_ROLES:
+        # Staff may read any document; the blob keeps the name it was first uploaded under
+        return blob.name or blob.sha256[:12]
+
+    records = [
+        *AdmissionApplication.objects.filter(generated_user=user).values_list('documents_json', flat=True)[:5],
+        *Student.objects.filter(user=user).values_list('documents_json', flat=True)[:5],
+    ]
+    for documents in records:
+        for value in (documents or {}).values():
+            if isinstance(value, dict) and value.get('sha256') == blob.sha256:
+                return value.get('name') or blob.sha256[:12]
+    return None
+
+
+def _read_range(fh, length):
+    try:
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None to send the whole file, or False if unsatisfiable"""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+@login_required
+def download_view(request, sha256):
+    """Serve a stored document; supports single byte ranges and conditional requests"""
+    if not SHA256_RE.match(sha256):
+        raise Http404
+    blob = get_object_or_404(StoredBlob, sha256=sha256)
+    name = _document_name(request.user, blob)
+    if name is None:
+        raise Http404
+    path = blob_path(sha256)
+    if not os.path.exists(path):
+        raise Http404
+
+    # Content never changes for a given address, so the hash is a perfect validator
+    etag = f'"{sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    byte_range = _parse_range(request.headers.get('Range'), blob.size)
+    if request.headers.get('If-Range') not in (None, etag):
+        byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{blob.size}'
+    elif byte_range:
+        start, end = byte_range
+        fh = open(path, 'rb')
+        fh.seek(start)
+        response = StreamingHttpResponse(_read_range(fh, end - start + 1), status=206, content_type=blob.content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{blob.size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = content_disposition_header(False, name)
+    else:
+        # FileResponse hands the file to the server's sendfile wrapper when there is one
+        response = FileResponse(open(path, 'rb'), content_type=blob.content_type, filename=name)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
@@ -1,27 +1,34 @@
 # rci/enrollment/admin.py
 from django.contrib import admin
+from django.db.models import Count
+from documents.admin import document_links
 from .models import Student, Term, Section, StudentSubject
 
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
-    list_display = ['user', 'program', 'curriculum', 'status', 'created_at']
+    list_display = ['student_number', 'user', 'program', 'curriculum', 'status', 'created_at']
     list_filter = ['program', 'status', 'created_at']
-    search_fields = ['user__username', 'user__first_name', 'user__last_name']
+    search_fields = ['student_number', 'user__username', 'user__first_name', 'user__last_name']
     ordering = ['-created_at']
+    readonly_fields = ['student_number', 'documents']
     fieldsets = (
         ('User Information', {
-            'fields': ('user',)
+            'fields': ('user', 'student_number')
         }),
         ('Academic Information', {
             'fields': ('program', 'curriculum', 'status')
         }),
         ('Documents', {
-            'fields': ('documents_json',),
+            'fields': ('documents',),
             'classes': ('collapse',)
         }),
     )
 
+    def documents(self, obj):
+        # Entries hold blob references, so they are managed by uploads rather than edited here
+        return document_links(obj.documents_json)
+
 
 @admin.register(Term)
 class TermAdmin(admin.ModelAdmin):
@@ -46,9 +53,14 @@ class SectionAdmin(admin.ModelAdmin):
     search_fields = ['section_code', 'subject__code', 'subject__title', 'professor__username']
     ordering = ['section_code']
 
+    def get_queryset(self, request):
+        # Counted in the list query instead of once per row
+        return super().get_queryset(request).annotate(enrolled_students=Count('student_subjects'))
+
     def enrolled_count(self, obj):
-        return obj.enrolled_count
+        return obj.enrolled_students
     enrolled_count.short_description = 'Enrolled'
+    enrolled_count.admin_order_field = 'enrolled_students'
 
 
 @admin.register(StudentSubject)
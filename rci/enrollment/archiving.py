@@ -0,0 +1,405 @@
+"""
+Term closing: stream a term's sections, enrollments and grades into Archive snapshots.
+
+Rows are walked in primary-key order and written in batches, one transaction
+per batch, so the database is never locked for the whole term. The highest
+archived primary key per entity doubles as the checkpoint: re-running the
+close for the same term resumes right after it.
+
+`restore_term` does the reverse: it rehydrates the snapshots into live rows,
+resolving foreign keys through natural keys (subject codes, usernames).
+"""
+import datetime
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+from django.db.models import Max
+
+from academics.models import Subject
+from audit import outbox, search
+from audit.models import Archive, AuditOutbox
+from rci import campus
+from grades.models import Grade
+from users.models import User
+from .models import Student, Section, StudentSubject
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def archive_key(term):
+    """
+    End of the reason that identifies a term's archives (used for checkpoints and restores).
+    Only the term id, never its name, so renaming a closed term keeps its archives reachable.
+    """
+    key = f'(term #{term.id})'
+    # Row ids repeat across campus shards; each campus keeps its own checkpoints
+    if campus.current() != campus.default_campus():
+        key += f' [{campus.current()}]'
+    return key
+
+
+def archive_reason(term):
+    """Reason string stored on a term's archives: the name for people, the key for matching"""
+    return f'Term Closed: {term.name} {archive_key(term)}'
+
+
+def term_archives(term):
+    """Archive rows written when `term` was closed (on the current campus)"""
+    return Archive.objects.filter(reason__endswith=archive_key(term))
+
+
+class SnapshotEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond rounding, so restored timestamps match exactly"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _fields(obj):
+    """Concrete field values keyed by attname (FKs as *_id), JSON-safe"""
+    values = {
+        field.attname: field.value_from_object(obj)
+        for field in obj._meta.concrete_fields
+        if not field.primary_key
+    }
+    return json.loads(json.dumps(values, cls=SnapshotEncoder))
+
+
+def section_snapshot(section):
+    return {
+        'model': 'enrollment.section',
+        'pk': section.pk,
+        'fields': _fields(section),
+        'refs': {
+            'subject_code': section.subject.code,
+            'professor_username': section.professor.username,
+        },
+    }
+
+
+def student_subject_snapshot(enrollment):
+    return {
+        'model': 'enrollment.studentsubject',
+        'pk': enrollment.pk,
+        'fields': _fields(enrollment),
+        'refs': {
+            'student_username': enrollment.student.user.username,
+            'subject_code': enrollment.subject.code,
+            'section_code': enrollment.section.section_code,
+            'professor_username': enrollment.professor.username,
+        },
+    }
+
+
+def grade_snapshot(grade):
+    enrollment = grade.student_subject
+    return {
+        'model': 'grades.grade',
+        'pk': grade.pk,
+        'fields': _fields(grade),
+        'refs': {
+            'student_username': enrollment.student.user.username,
+            'subject_code': grade.subject.code,
+            'professor_username': grade.professor.username,
+        },
+    }
+
+
+# Dependency order: parents are archived (and restored) before their children
+PIPELINE = [
+    (
+        'Section',
+        lambda term: Section.objects.filter(term=term).select_related('subject', 'professor'),
+        section_snapshot,
+    ),
+    (
+        'StudentSubject',
+        lambda term: StudentSubject.objects.filter(term=term).select_related(
+            'student__user', 'subject', 'section', 'professor'
+        ),
+        student_subject_snapshot,
+    ),
+    (
+        'Grade',
+        lambda term: Grade.objects.filter(student_subject__term=term).select_related(
+            'student_subject__student__user', 'subject', 'professor'
+        ),
+        grade_snapshot,
+    ),
+]
+
+
+def checkpoint(entity, term):
+    """Highest primary key of `entity` already archived for this term (0 if none)"""
+    return term_archives(term).filter(entity=entity).aggregate(last=Max('entity_id'))['last'] or 0
+
+
+def close_term(term, archived_by=None, batch_size=DEFAULT_BATCH_SIZE, purge=False, progress=None):
+    """
+    Archive every section, enrollment and grade of `term`, then deactivate it.
+    Returns per-entity stats: {entity: {'rows', 'resumed_from', 'seconds'}}.
+    `progress(entity, archived_so_far)` is called after each committed batch.
+    """
+    reason = archive_reason(term)
+    stats = {}
+
+    for entity, queryset_for, snapshot in PIPELINE:
+        started = time.perf_counter()
+        last_pk = resumed_from = checkpoint(entity, term)
+        archived = 0
+
+        while True:
+            batch = list(queryset_for(term).filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+
+            # Archives live in the audit database
+            with transaction.atomic(using=router.db_for_write(Archive)):
+                archives = Archive.objects.bulk_create([
+                    Archive(
+                        entity=entity,
+                        entity_id=obj.pk,
+                        data_snapshot=snapshot(obj),
+                        reason=reason,
+                        archived_by=archived_by,
+                    )
+                    for obj in batch
+                ])
+                search.index_archives(archives)
+
+            archived += len(batch)
+            last_pk = batch[-1].pk
+            if progress:
+                progress(entity, archived)
+
+        stats[entity] = {
+            'rows': archived,
+            'resumed_from': resumed_from,
+            'seconds': time.perf_counter() - started,
+        }
+
+    if purge:
+        purge_term(term, batch_size=batch_size)
+
+    # The term lives in the main database, the outbox with the campus data
+    with transaction.atomic(), transaction.atomic(using=router.db_for_write(AuditOutbox)):
+        term.is_active = False
+        term.save(update_fields=['is_active'])
+        outbox.record(
+            actor=archived_by,
+            action='close_term',
+            entity='Term',
+            entity_id=term.id,
+            new_value_json={'is_active': False, 'archived': {k: v['rows'] for k, v in stats.items()}},
+            notes=f'Closed and archived {term.name}',
+        )
+
+    return stats
+
+
+def purge_term(term, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete a term's archived live rows, children first, one batch per transaction"""
+    for _, queryset_for, _ in reversed(PIPELINE):
+        queryset = queryset_for(term)
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic(using=router.db_for_write(queryset.model)):
+                queryset.model.objects.filter(pk__in=ids).delete()
+
+
+# ==================== RESTORE ====================
+
+class Planned:
+    """Stands in for the id of a row a dry run would have created (one per row, so they never compare equal)"""
+
+TIMESTAMP_FIELDS = {
+    'Section': ['created_at'],
+    'StudentSubject': ['created_at'],
+    'Grade': ['posted_at', 'updated_at'],
+}
+
+
+class IdMaps:
+    """Natural key -> live primary key lookups, built once per restore"""
+
+    def __init__(self, term):
+        self.subjects = dict(Subject.objects.values_list('code', 'id'))
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.students = dict(Student.objects.values_list('user__username', 'id'))
+        self.sections = {
+            (subject_id, section_code): pk
+            for pk, subject_id, section_code in Section.objects.filter(term=term).values_list(
+                'id', 'subject_id', 'section_code'
+            )
+        }
+        self.enrollments = {
+            (student_id, subject_id): pk
+            for pk, student_id, subject_id in StudentSubject.objects.filter(term=term).values_list(
+                'id', 'student_id', 'subject_id'
+            )
+        }
+        self.graded = set(
+            Grade.objects.filter(student_subject__term=term).values_list('student_subject_id', flat=True)
+        )
+
+
+class Unresolved(Exception):
+    """A snapshot references something that no longer exists"""
+
+
+def _lookup(mapping, key, label):
+    if key not in mapping:
+        raise Unresolved(f'{label} {key!r} not found')
+    return mapping[key]
+
+
+def _build_section(snapshot, term, maps):
+    fields, refs = snapshot['fields'], snapshot['refs']
+    subject_id = _lookup(maps.subjects, refs['subject_code'], 'subject')
+    key = (subject_id, fields['section_code'])
+    if key in maps.sections:
+        return None, key, f"section {refs['subject_code']} {fields['section_code']} already exists"
+    return Section(
+        subject_id=subject_id,
+        term_id=term.id,
+        professor_id=_lookup(maps.users, refs['professor_username'], 'professor'),
+        section_code=fields['section_code'],
+        capacity=fields['capacity'],
+        status=fields['status'],
+        created_at=fields['created_at'],
+    ), key, None
+
+
+def _build_student_subject(snapshot, term, maps):
+    fields, refs = snapshot['fields'], snapshot['refs']
+    student_id = _lookup(maps.students, refs['student_username'], 'student')
+    subject_id = _lookup(maps.subjects, refs['subject_code'], 'subject')
+    key = (student_id, subject_id)
+    if key in maps.enrollments:
+        return None, key, f"{refs['student_username']} is already enrolled in {refs['subject_code']}"
+    section_id = _lookup(maps.sections, (subject_id, refs['section_code']), 'section')
+    return StudentSubject(
+        student_id=student_id,
+        subject_id=subject_id,
+        term_id=term.id,
+        section_id=section_id,
+        professor_id=_lookup(maps.users, refs['professor_username'], 'professor'),
+        status=fields['status'],
+        created_at=fields['created_at'],
+    ), key, None
+
+
+def _build_grade(snapshot, term, maps):
+    fields, refs = snapshot['fields'], snapshot['refs']
+    student_id = _lookup(maps.students, refs['student_username'], 'student')
+    subject_id = _lookup(maps.subjects, refs['subject_code'], 'subject')
+    student_subject_id = _lookup(maps.enrollments, (student_id, subject_id), 'enrollment')
+    if student_subject_id in maps.graded:
+        return None, student_subject_id, f"{refs['student_username']} already has a {refs['subject_code']} grade"
+    return Grade(
+        student_subject_id=student_subject_id,
+        subject_id=subject_id,
+        professor_id=_lookup(maps.users, refs['professor_username'], 'professor'),
+        grade=fields['grade'],
+        posted_at=fields['posted_at'],
+        updated_at=fields['updated_at'],
+        inc_posted_date=fields['inc_posted_date'],
+        remarks=fields['remarks'],
+    ), student_subject_id, None
+
+
+# entity -> (model, snapshot builder, IdMaps attribute updated with restored keys)
+RESTORERS = {
+    'Section': (Section, _build_section, 'sections'),
+    'StudentSubject': (StudentSubject, _build_student_subject, 'enrollments'),
+    'Grade': (Grade, _build_grade, 'graded'),
+}
+
+RESTORE_ORDER = [entity for entity, _, _ in PIPELINE]
+
+
+def _remember(maps, entity, key, pk):
+    known = getattr(maps, RESTORERS[entity][2])
+    if isinstance(known, set):
+        known.add(key)
+    else:
+        known[key] = pk
+
+
+def restore_term(term, entities=None, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Rehydrate a closed term's Archive snapshots into Section, StudentSubject and Grade rows.
+
+    Entities are restored in dependency order with bulk_create, one transaction per batch.
+    Original primary keys and timestamps are kept when still free. Rows whose natural key
+    already exists (or whose references are gone) are reported as conflicts and skipped.
+    With dry_run nothing is written. Returns {entity: {'restored': n, 'conflicts': [...]}}.
+    """
+    entities = [entity for entity in RESTORE_ORDER if not entities or entity in entities]
+    archives_of_term = term_archives(term)
+    maps = IdMaps(term)
+    report = {}
+
+    for entity in entities:
+        model, build, _ = RESTORERS[entity]
+        restored = 0
+        conflicts = []
+        last_pk = 0
+
+        while True:
+            archives = list(
+                archives_of_term.filter(entity=entity, pk__gt=last_pk).order_by('pk')[:batch_size]
+            )
+            if not archives:
+                break
+            last_pk = archives[-1].pk
+
+            planned = []
+            for archive in archives:
+                snapshot = archive.data_snapshot
+                try:
+                    obj, key, conflict = build(snapshot, term, maps)
+                except Unresolved as exc:
+                    conflicts.append(f'{entity} #{archive.entity_id}: {exc}')
+                    continue
+                if conflict:
+                    conflicts.append(f'{entity} #{archive.entity_id}: {conflict}')
+                    continue
+                obj.pk = snapshot['pk']
+                planned.append((obj, key))
+
+            # Keep the original primary key unless another row took it since
+            taken = set(model.objects.filter(pk__in=[obj.pk for obj, _ in planned]).values_list('pk', flat=True))
+            for obj, _ in planned:
+                if obj.pk in taken:
+                    obj.pk = None
+
+            if dry_run:
+                for obj, key in planned:
+                    _remember(maps, entity, key, Planned())
+            else:
+                objs = [obj for obj, _ in planned]
+                stamps = [[getattr(obj, name) for name in TIMESTAMP_FIELDS[entity]] for obj in objs]
+                with transaction.atomic(using=router.db_for_write(model)):
+                    model.objects.bulk_create(objs)
+                    # auto_now/auto_now_add overwrote the archived timestamps on insert
+                    for obj, values in zip(objs, stamps):
+                        for name, value in zip(TIMESTAMP_FIELDS[entity], values):
+                            setattr(obj, name, value)
+                    model.objects.bulk_update(objs, TIMESTAMP_FIELDS[entity])
+                for obj, key in planned:
+                    _remember(maps, entity, key, obj.pk)
+
+            restored += len(planned)
+            if progress:
+                progress(entity, restored)
+
+        report[entity] = {'restored': restored, 'conflicts': conflicts}
+
+    return report
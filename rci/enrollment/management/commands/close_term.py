@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollment import archiving
+from enrollment.models import Term
+from rci import campus
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Archive a term's sections, enrollments and grades in batches, then deactivate it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('term_id', type=int)
+        parser.add_argument('--batch-size', type=int, default=archiving.DEFAULT_BATCH_SIZE,
+                            help='Archive rows written per transaction')
+        parser.add_argument('--user', help='Username recorded as the archiver')
+        parser.add_argument('--purge', action='store_true',
+                            help='Delete the archived live rows once every snapshot is written')
+        parser.add_argument('--campus', action='append', choices=list(campus.campuses()),
+                            help='Only close the term on these campuses (repeatable); default is every campus')
+
+    def handle(self, *args, **options):
+        try:
+            term = Term.objects.get(pk=options['term_id'])
+        except Term.DoesNotExist:
+            raise CommandError(f"Term #{options['term_id']} does not exist.")
+
+        archived_by = None
+        if options['user']:
+            try:
+                archived_by = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        self.stdout.write(f'📦 Closing {term.name} (batch size {options["batch_size"]})')
+
+        def progress(entity, archived):
+            self.stdout.write(f'  • {entity}: {archived} archived')
+
+        started = time.perf_counter()
+        total = 0
+        # One campus at a time, each archived from its own shard
+        for code in options['campus'] or campus.campuses():
+            if campus.enabled():
+                self.stdout.write(f'🏫 {code}')
+            with campus.using(code):
+                stats = archiving.close_term(
+                    term,
+                    archived_by=archived_by,
+                    batch_size=options['batch_size'],
+                    purge=options['purge'],
+                    progress=progress,
+                )
+
+            self.stdout.write('\n📊 Throughput:')
+            for entity, entity_stats in stats.items():
+                seconds = entity_stats['seconds']
+                rate = entity_stats['rows'] / seconds if seconds else 0
+                resumed = f" (resumed after #{entity_stats['resumed_from']})" if entity_stats['resumed_from'] else ''
+                self.stdout.write(
+                    f"  • {entity}: {entity_stats['rows']} rows in {seconds:.2f}s ({rate:,.0f} rows/s){resumed}"
+                )
+            total += sum(entity_stats['rows'] for entity_stats in stats.values())
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {term.name} closed: {total} rows archived in {elapsed:.2f}s'
+            f'{" and purged" if options["purge"] else ""}'
+        ))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollment import archiving
+from enrollment.models import Term
+from rci import campus
+
+
+class Command(BaseCommand):
+    help = "Restore a closed term's archived sections, enrollments and grades into live tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('term_id', type=int)
+        parser.add_argument('--entity', action='append', choices=archiving.RESTORE_ORDER,
+                            help='Only restore these entities (repeatable); default is all, in dependency order')
+        parser.add_argument('--batch-size', type=int, default=archiving.DEFAULT_BATCH_SIZE,
+                            help='Rows inserted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be restored and any conflicts')
+        parser.add_argument('--show-conflicts', type=int, default=20,
+                            help='How many conflicts to list per entity')
+        parser.add_argument('--campus', action='append', choices=list(campus.campuses()),
+                            help='Only restore these campuses (repeatable); default is every campus')
+
+    def handle(self, *args, **options):
+        try:
+            term = Term.objects.get(pk=options['term_id'])
+        except Term.DoesNotExist:
+            raise CommandError(f"Term #{options['term_id']} does not exist.")
+
+        mode = 'Dry run for' if options['dry_run'] else 'Restoring'
+        self.stdout.write(f'♻️  {mode} {term.name}')
+
+        def progress(entity, restored):
+            self.stdout.write(f'  • {entity}: {restored} {"planned" if options["dry_run"] else "restored"}')
+
+        started = time.perf_counter()
+        for code in options['campus'] or campus.campuses():
+            if campus.enabled():
+                self.stdout.write(f'🏫 {code}')
+            with campus.using(code):
+                report = archiving.restore_term(
+                    term,
+                    entities=options['entity'],
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                    progress=progress,
+                )
+
+            self.stdout.write('\n📊 Summary:')
+            for entity, result in report.items():
+                conflicts = result['conflicts']
+                self.stdout.write(f"  • {entity}: {result['restored']} rows, {len(conflicts)} conflicts")
+                for conflict in conflicts[:options['show_conflicts']]:
+                    self.stdout.write(self.style.WARNING(f'      ⚠ {conflict}'))
+                if len(conflicts) > options['show_conflicts']:
+                    self.stdout.write(f"      … and {len(conflicts) - options['show_conflicts']} more")
+        elapsed = time.perf_counter() - started
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run finished in {elapsed:.2f}s, nothing was written'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ Restore finished in {elapsed:.2f}s'))
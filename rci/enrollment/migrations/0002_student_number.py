@@ -0,0 +1,93 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+# As of this migration; later changes belong in later migrations
+SEQUENCE_WIDTH = 5
+TABLE = 'student_fts'
+COLUMNS = 'number, name, username'
+
+
+def assign_student_numbers(apps, schema_editor):
+    """Number existing students per enrollment year, oldest first"""
+    Student = apps.get_model('enrollment', 'Student')
+    db_alias = schema_editor.connection.alias
+    sequences = {}
+    batch = []
+    for student in Student.objects.using(db_alias).order_by('created_at', 'pk').iterator(chunk_size=1000):
+        # The local date's year, as allocate() numbers new students
+        year = timezone.localtime(student.created_at).year
+        sequences[year] = sequences.get(year, 0) + 1
+        student.student_number = f'{year}-{sequences[year]:0{SEQUENCE_WIDTH}d}'
+        batch.append(student)
+        if len(batch) == 1000:
+            Student.objects.using(db_alias).bulk_update(batch, ['student_number'])
+            batch = []
+    Student.objects.using(db_alias).bulk_update(batch, ['student_number'])
+
+
+def student_row(student):
+    number = student.student_number or ''
+    sequence = number.rpartition('-')[2].lstrip('0')
+    user = student.user
+    return (
+        student.pk,
+        f'{number} {sequence}'.strip(),
+        f'{user.first_name} {user.last_name}'.strip(),
+        user.username,
+    )
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            f"{COLUMNS}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    Student = apps.get_model('enrollment', 'Student')
+    queryset = Student.objects.using(connection.alias).select_related('user')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:2000])
+        if not batch:
+            break
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {TABLE}(rowid, {COLUMNS}) VALUES (%s, %s, %s, %s)',
+                [student_row(student) for student in batch],
+            )
+        last_pk = batch[-1].pk
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrollment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='student_number',
+            field=models.CharField(editable=False, help_text="e.g. '2025-00042', assigned on first save", max_length=20, null=True),
+        ),
+        migrations.RunPython(assign_student_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='student',
+            name='student_number',
+            field=models.CharField(editable=False, help_text="e.g. '2025-00042', assigned on first save", max_length=20, unique=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
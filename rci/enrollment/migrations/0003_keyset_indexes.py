@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0001_initial'),
+        ('enrollment', '0002_student_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['section_code', 'id'], name='sections_section_64c359_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'id'], name='students_created_1b3cf3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentsubject',
+            index=models.Index(fields=['created_at', 'id'], name='student_sub_created_4a7fa2_idx'),
+        ),
+    ]
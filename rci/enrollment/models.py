@@ -13,6 +13,12 @@ class Student(models.Model):
     ]
 
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='student_profile')
+    student_number = models.CharField(
+        max_length=20,
+        unique=True,
+        editable=False,
+        help_text="e.g. '2025-00042', assigned on first save"
+    )
     program = models.ForeignKey(Program, on_delete=models.PROTECT, related_name='students')
     curriculum = models.ForeignKey(Curriculum, on_delete=models.PROTECT, related_name='students')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
@@ -22,10 +28,33 @@ class Student(models.Model):
     class Meta:
         db_table = 'students'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the staff list (rci.pagination)
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.program.name}"
 
+    def save(self, *args, **kwargs):
+        if self.student_number:
+            return super().save(*args, **kwargs)
+        from .student_numbers import save_with_number
+
+        return save_with_number(self, lambda: super(Student, self).save(*args, **kwargs))
+
+
+class StudentNumberSequence(models.Model):
+    """Last student number sequence issued per year, shared by every campus (enrollment.student_numbers)"""
+    year = models.PositiveIntegerField(primary_key=True)
+    last = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'student_number_sequences'
+
+    def __str__(self):
+        return f'{self.year}: {self.last}'
+
 
 class Term(models.Model):
     """Defines semesters/trimesters per academic year"""
@@ -70,6 +99,9 @@ class Section(models.Model):
         db_table = 'sections'
         unique_together = ['subject', 'term', 'section_code']
         ordering = ['section_code']
+        indexes = [
+            models.Index(fields=['section_code', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.section_code} - {self.subject.code} ({self.term.name})"
@@ -111,6 +143,9 @@ class StudentSubject(models.Model):
         db_table = 'student_subjects'
         ordering = ['-created_at']
         unique_together = ['student', 'subject', 'term']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.student.user.username} - {self.subject.code} ({self.term.name})"
@@ -0,0 +1,135 @@
+"""
+Full-text student search.
+
+An SQLite FTS5 table mirrors `students` (rowid = student pk) with the student
+number, full name and username. Prefix indexes make the as-you-type queries
+from the staff pages index lookups, ranked with bm25. The signal handlers in
+`enrollment.signals` keep it in sync; code that writes students with
+`bulk_create` calls `index_students` itself.
+"""
+from django.db import connections, router
+from django.db.models import Q
+
+from rci import fts
+from .models import Student
+
+TABLE = 'student_fts'
+COLUMNS = 'number, name, username'
+
+# bm25 column weights: number, name, username
+COLUMN_WEIGHTS = '3.0, 2.0, 2.0'
+
+# Most matches a search returns; the staff pages show far fewer
+DEFAULT_LIMIT = 500
+
+# Aliases already known to have the FTS table, so saves don't re-introspect
+_enabled_aliases = set()
+
+
+def _connection():
+    """The database the index is maintained in"""
+    return connections[router.db_for_write(Student)]
+
+
+def _read_connection():
+    # db_for_read: asking for the write database would mark the request as having written
+    # (rci.replica) and pin the user to the primary after every search
+    return connections[router.db_for_read(Student)]
+
+
+def is_enabled(connection=None):
+    connection = connection or _connection()
+    if connection.alias in _enabled_aliases:
+        return True
+    if fts.fts5_available(connection) and fts.table_exists(connection, TABLE):
+        _enabled_aliases.add(connection.alias)
+        return True
+    return False
+
+
+def student_row(student):
+    number = student.student_number or ''
+    # "2025-00042" also matches a search for "42"
+    sequence = number.rpartition('-')[2].lstrip('0')
+    user = student.user
+    return (
+        student.pk,
+        f'{number} {sequence}'.strip(),
+        f'{user.first_name} {user.last_name}'.strip(),
+        user.username,
+    )
+
+
+def index_students(students, connection=None):
+    connection = connection or _connection()
+    rows = [student_row(student) for student in students]
+    if not rows or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {TABLE}(rowid, {COLUMNS}) VALUES (%s, %s, %s, %s)',
+            rows,
+        )
+
+
+def unindex_students(ids, connection=None):
+    connection = connection or _connection()
+    ids = list(ids)
+    if not ids or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def search_ids(text, limit=DEFAULT_LIMIT):
+    """Primary keys of students matching `text`, best match first"""
+    expression = fts.match_expression(text)
+    if not expression:
+        return []
+
+    connection = _read_connection()
+    if not is_enabled(connection):
+        return _fallback_ids(text, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY bm25({TABLE}, {COLUMN_WEIGHTS}) LIMIT %s',
+            [expression, limit],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def _fallback_ids(text, limit):
+    """Plain substring search for databases without FTS5"""
+    return list(Student.objects.filter(
+        Q(user__first_name__icontains=text) |
+        Q(user__last_name__icontains=text) |
+        Q(user__username__icontains=text) |
+        Q(student_number__icontains=text)
+    ).values_list('pk', flat=True)[:limit])
+
+
+def ranked_ids(queryset, text, limit=DEFAULT_LIMIT):
+    """Primary keys of students in `queryset` matching `text`, best match first"""
+    ids = search_ids(text, limit)
+    allowed = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+    return [pk for pk in ids if pk in allowed]
+
+
+def rebuild(batch_size=2000, connection=None):
+    """Re-index every student in primary-key batches; returns the count"""
+    connection = connection or _connection()
+    queryset = Student.objects.using(connection.alias).select_related('user')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            break
+        index_students(batch, connection)
+        total += len(batch)
+        last_pk = batch[-1].pk
+    return total
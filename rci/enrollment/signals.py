@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Student
+
+# User fields that appear in the student search index
+INDEXED_USER_FIELDS = {'first_name', 'last_name', 'username'}
+
+
+@receiver(post_save, sender=Student)
+def index_student(sender, instance, **kwargs):
+    """Keep the student full-text index in sync"""
+    search.index_students([instance])
+
+
+@receiver(post_delete, sender=Student)
+def unindex_student(sender, instance, **kwargs):
+    search.unindex_students([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_student_user(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index a student when their name or username changes"""
+    # Logins save only last_login; new users have no student profile yet
+    if created or (update_fields and not INDEXED_USER_FIELDS & set(update_fields)):
+        return
+    student = Student.objects.filter(user=instance).first()
+    if student:
+        student.user = instance
+        search.index_students([student])
@@ -0,0 +1,88 @@
+"""
+Student numbers: <year>-<5-digit sequence>, e.g. 2025-00042.
+
+A student number identifies the student across the institution, while the
+students themselves live in their campus's database. Numbers therefore come
+from one counter per year in the main database (StudentNumberSequence),
+incremented in a short write transaction, so two campuses never issue the
+same number. A year's counter starts after the highest sequence any campus
+already has, read as an integer (past 99999 a year the sequence gets wider
+and no longer sorts as text). The year is the local date's, like the numbers
+given to existing students by migration 0002.
+
+Saves still run in a savepoint and retry on the unique constraint, the same
+way generated usernames are allocated, in case a number was set by hand.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.utils import timezone
+
+from rci import campus
+
+MAX_ATTEMPTS = 5
+SEQUENCE_WIDTH = 5
+
+
+class StudentNumberUnavailable(Exception):
+    """Every attempt to insert a freshly allocated student number collided"""
+
+
+def highest_sequence(year):
+    """Highest sequence of `year` in the current campus's database (0 if none)"""
+    from .models import Student
+
+    prefix = f'{year}-'
+    return Student.objects.filter(
+        student_number__gte=prefix, student_number__lt=prefix + '\uffff'
+    ).aggregate(
+        last=Max(Cast(Substr('student_number', len(prefix) + 1), IntegerField()))
+    )['last'] or 0
+
+
+def allocate(count=1, year=None):
+    """The next `count` student numbers for `year` (default: this year), reserved for every campus"""
+    from .models import StudentNumberSequence
+
+    year = year or timezone.localdate().year
+    sequences = StudentNumberSequence.objects.using('default')
+    # No savepoint of its own inside a caller's transaction: a failure here fails the caller anyway
+    with transaction.atomic(using='default', savepoint=False):
+        if not sequences.filter(year=year).update(last=F('last') + count):
+            # The year's first number (or the first since the counter was added)
+            highest = max(campus.fan_out(highest_sequence, year).values(), default=0)
+            sequences.create(year=year, last=highest + count)
+        last = sequences.values_list('last', flat=True).get(year=year)
+    return [f'{year}-{sequence:0{SEQUENCE_WIDTH}d}' for sequence in range(last - count + 1, last + 1)]
+
+
+def save_with_number(student, save):
+    """Give an unsaved student the next number and run `save()`, retrying if the number was taken"""
+    from .models import Student
+
+    for _ in range(MAX_ATTEMPTS):
+        student.student_number = allocate()[0]
+        try:
+            with transaction.atomic(using=router.db_for_write(Student)):
+                return save()
+        except IntegrityError:
+            if not Student.objects.filter(student_number=student.student_number).exists():
+                raise
+    raise StudentNumberUnavailable('Could not allocate a student number')
+
+
+def bulk_create_students(students):
+    """Number and bulk_create unsaved students, re-allocating the batch if another writer got in first"""
+    from .models import Student
+
+    for _ in range(MAX_ATTEMPTS):
+        for student, number in zip(students, allocate(len(students))):
+            student.student_number = number
+        try:
+            with transaction.atomic(using=router.db_for_write(Student)):
+                return Student.objects.bulk_create(students)
+        except IntegrityError:
+            numbers = [student.student_number for student in students]
+            if not Student.objects.filter(student_number__in=numbers).exists():
+                raise
+    raise StudentNumberUnavailable(f'Could not allocate student numbers for a batch of {len(students)}')
@@ -1,3 +1,135 @@
-from django.test import TestCase
+import importlib
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from enrollment import archiving, student_numbers
+from enrollment.models import Section, Student, StudentNumberSequence, StudentSubject
+from grades.models import Grade
+from rci import campus
+from rci.query_budget import Budget, Fixture, QueryBudgetTestCase
+from users.models import User
+
+BUDGETS = [
+    Budget('enrollment:home', 21, role='student'),
+    Budget('enrollment:cor', 11, role='student'),
+    Budget('enrollment:auto_enroll', 20, role='student', method='post', status=302),
+    Budget('enrollment:enroll', 19, role='student', args=lambda fixture: [fixture.open_section.pk],
+           method='post', status=302),
+    Budget('enrollment:drop', 12, role='student', args=lambda fixture: [fixture.student_enrollments[0].pk],
+           method='post', status=302),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'enrollment.urls')
+
+
+class ArchivingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(DOCUMENT_STORAGE_DIR=directory.name))
+        self.fixture = Fixture().grow(3)
+        self.term = self.fixture.past_term
+
+    def test_renamed_term_keeps_checkpoints_and_archives(self):
+        archiving.close_term(self.term, batch_size=2)
+        last_section = Section.objects.filter(term=self.term).latest('pk').pk
+
+        self.term.name = 'Renamed after closing'
+        self.term.save()
+
+        self.assertEqual(archiving.checkpoint('Section', self.term), last_section)
+        self.assertEqual(archiving.close_term(self.term)['Section']['rows'], 0)
+        report = archiving.restore_term(self.term, dry_run=True)
+        self.assertEqual(len(report['Section']['conflicts']), 3)
+
+    def live_rows(self):
+        return {
+            'Section': sorted(Section.objects.filter(term=self.term).values_list('pk', 'section_code', 'subject_id')),
+            'StudentSubject': sorted(StudentSubject.objects.filter(term=self.term).values_list(
+                'pk', 'student_id', 'subject_id', 'section_id', 'status', 'created_at',
+            )),
+            'Grade': sorted(Grade.objects.filter(student_subject__term=self.term).values_list(
+                'pk', 'student_subject_id', 'grade', 'posted_at',
+            )),
+        }
+
+    def test_close_purge_and_restore(self):
+        before = self.live_rows()
+        stats = archiving.close_term(self.term, batch_size=2, purge=True)
+        self.assertEqual({entity: s['rows'] for entity, s in stats.items()},
+                         {entity: len(rows) for entity, rows in before.items()})
+        self.assertEqual(self.live_rows(), {'Section': [], 'StudentSubject': [], 'Grade': []})
+
+        # A dry run plans everything and writes nothing
+        report = archiving.restore_term(self.term, dry_run=True, batch_size=2)
+        self.assertEqual({entity: r['restored'] for entity, r in report.items()},
+                         {entity: len(rows) for entity, rows in before.items()})
+        self.assertEqual(self.live_rows()['Section'], [])
+
+        report = archiving.restore_term(self.term, batch_size=2)
+        self.assertTrue(all(not r['conflicts'] for r in report.values()))
+        # Same primary keys, references and timestamps as before the close
+        self.assertEqual(self.live_rows(), before)
+
+        # Restoring again only reports conflicts
+        report = archiving.restore_term(self.term)
+        self.assertEqual(sum(r['restored'] for r in report.values()), 0)
+        self.assertEqual(len(report['Grade']['conflicts']), len(before['Grade']))
+
+
+class StudentNumberTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.fixture = Fixture()
+
+    def test_counter_starts_after_the_highest_existing_sequence(self):
+        Student.objects.filter(pk=self.fixture.student.pk).update(student_number='2025-99999')
+        self.assertEqual(student_numbers.allocate(2, year=2025), ['2025-100000', '2025-100001'])
+
+        # Compared as a number, not as text
+        StudentNumberSequence.objects.all().delete()
+        Student.objects.filter(pk=self.fixture.student.pk).update(student_number='2025-100000')
+        self.assertEqual(student_numbers.allocate(year=2025), ['2025-100001'])
+
+    def test_reserved_numbers_are_never_issued_again(self):
+        # Nothing is saved between the two calls; the counter alone keeps them apart
+        self.assertNotEqual(student_numbers.allocate(year=2030), student_numbers.allocate(year=2030))
+
+    @unittest.skipUnless(len(campus.shard_aliases()) >= 2, 'needs CAMPUS_SHARDS with two shards')
+    def test_campuses_never_share_a_number(self):
+        numbers = []
+        for code in [code for code, db in campus.campuses().items() if db != 'default'][:2]:
+            user = User.objects.create(username=f'student.{code}', campus=code)
+            with campus.using(code):
+                student = Student.objects.create(
+                    user=user, program=self.fixture.program, curriculum=self.fixture.curriculum,
+                )
+            numbers.append(student.student_number)
+        self.assertEqual(len(set(numbers)), 2)
+
+    def test_migration_numbers_by_local_year(self):
+        # 2024-12-31 16:30 UTC is already New Year's Day in Manila
+        new_year = timezone.make_aware(datetime(2025, 1, 1, 0, 30))
+        Student.objects.filter(pk=self.fixture.student.pk).update(created_at=new_year)
+
+        migration = importlib.import_module('enrollment.migrations.0002_student_number')
+        migration.assign_student_numbers(apps, SimpleNamespace(connection=connection))
+
+        self.fixture.student.refresh_from_db()
+        self.assertTrue(self.fixture.student.student_number.startswith('2025-'))
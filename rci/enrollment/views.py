@@ -2,13 +2,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum, Q
-from django.db import transaction
+from django.db.models import Count, Sum, Q
+from django.db.models.signals import post_save
 from django.http import HttpResponse
 from .models import Student, Term, Section, StudentSubject
 from academics.models import CurriculumSubject, Subject, Prereq
-from settingsapp.models import Setting
-from grades.models import Grade
+from settingsapp.snapshot import site_settings
+from rci import writer
 
 
 @login_required
@@ -20,7 +20,7 @@ def enrollment_home_view(request):
         return redirect('dashboard')
 
     # Check if enrollment is open
-    enrollment_open = Setting.get_bool('enrollment_open', default=True)
+    enrollment_open = site_settings.enrollment_open
 
     if not enrollment_open:
         return render(request, 'enrollment/enrollment_closed.html')
@@ -45,20 +45,19 @@ def enrollment_home_view(request):
         term=active_term,
         status='enrolled'
     ).select_related('subject', 'section', 'professor')
+    enrolled_ids = {enrollment.subject_id for enrollment in enrolled_subjects}
 
     # Calculate current total units
-    current_units = enrolled_subjects.aggregate(
-        total=Sum('subject__units')
-    )['total'] or 0
+    current_units = sum(enrollment.subject.units for enrollment in enrolled_subjects)
 
     # Get unit cap (30 for freshmen, could be different for others)
-    unit_cap = Setting.get_int('freshman_unit_cap', default=30)
+    unit_cap = site_settings.freshman_unit_cap
 
     # Get student's year level (estimate from total completed units)
-    completed_units = StudentSubject.objects.filter(
-        student=student,
-        status='completed'
-    ).aggregate(total=Sum('subject__units'))['total'] or 0
+    completed_ids = completed_subject_ids(student)
+    completed_units = Subject.objects.filter(
+        id__in=completed_ids
+    ).aggregate(total=Sum('units'))['total'] or 0
 
     # Estimate year level (rough calculation: 30 units per year)
     estimated_year = min((completed_units // 30) + 1, 4)
@@ -71,46 +70,13 @@ def enrollment_home_view(request):
         is_recommended=True
     ).select_related('subject')
 
-    # Get available sections for recommended subjects
-    available_subjects = []
-    for curr_subject in recommended_subjects:
-        subject = curr_subject.subject
-
-        # Check if already enrolled
-        already_enrolled = enrolled_subjects.filter(subject=subject).exists()
-        if already_enrolled:
-            continue
-
-        # Check if already completed
-        already_completed = StudentSubject.objects.filter(
-            student=student,
-            subject=subject,
-            status='completed'
-        ).exists()
-        if already_completed:
-            continue
-
-        # Check prerequisites
-        prereqs_met, missing_prereqs = check_prerequisites(student, subject)
-
-        # Get available sections
-        sections = Section.objects.filter(
-            subject=subject,
-            term=active_term,
-            status='open'
-        ).select_related('professor')
-
-        # Filter out full sections
-        available_sections = [s for s in sections if not s.is_full]
-
-        if available_sections:
-            available_subjects.append({
-                'subject': subject,
-                'sections': available_sections,
-                'prereqs_met': prereqs_met,
-                'missing_prereqs': missing_prereqs,
-                'recommended': True
-            })
+    # Prerequisites and sections are looked up for all candidate subjects at once
+    passed_ids = passed_subject_ids(student)
+    candidates = [
+        curr_subject.subject for curr_subject in recommended_subjects
+        if curr_subject.subject_id not in enrolled_ids and curr_subject.subject_id not in completed_ids
+    ]
+    available_subjects = subject_offerings(student, active_term, candidates, passed_ids, recommended=True)
 
     # Get all other eligible subjects (not recommended but can be taken)
     all_subjects = Subject.objects.filter(
@@ -119,41 +85,10 @@ def enrollment_home_view(request):
     ).exclude(
         id__in=[es['subject'].id for es in available_subjects]
     ).exclude(
-        id__in=enrolled_subjects.values_list('subject_id', flat=True)
+        id__in=enrolled_ids
     )
-
-    other_subjects = []
-    for subject in all_subjects:
-        # Check if already completed
-        already_completed = StudentSubject.objects.filter(
-            student=student,
-            subject=subject,
-            status='completed'
-        ).exists()
-        if already_completed:
-            continue
-
-        # Check prerequisites
-        prereqs_met, missing_prereqs = check_prerequisites(student, subject)
-
-        # Get available sections
-        sections = Section.objects.filter(
-            subject=subject,
-            term=active_term,
-            status='open'
-        ).select_related('professor')
-
-        # Filter out full sections
-        available_sections = [s for s in sections if not s.is_full]
-
-        if available_sections:
-            other_subjects.append({
-                'subject': subject,
-                'sections': available_sections,
-                'prereqs_met': prereqs_met,
-                'missing_prereqs': missing_prereqs,
-                'recommended': False
-            })
+    candidates = [subject for subject in all_subjects if subject.id not in completed_ids]
+    other_subjects = subject_offerings(student, active_term, candidates, passed_ids, recommended=False)
 
     context = {
         'student': student,
@@ -182,7 +117,7 @@ def auto_enroll_view(request):
         return redirect('dashboard')
 
     # Check if enrollment is open
-    enrollment_open = Setting.get_bool('enrollment_open', default=True)
+    enrollment_open = site_settings.enrollment_open
     if not enrollment_open:
         messages.error(request, 'Enrollment is currently closed.')
         return redirect('enrollment:home')
@@ -201,7 +136,7 @@ def auto_enroll_view(request):
         return redirect('enrollment:home')
 
     # Get unit cap
-    unit_cap = Setting.get_int('freshman_unit_cap', default=30)
+    unit_cap = site_settings.freshman_unit_cap
 
     # Calculate current enrolled units
     current_units = StudentSubject.objects.filter(
@@ -211,10 +146,10 @@ def auto_enroll_view(request):
     ).aggregate(total=Sum('subject__units'))['total'] or 0
 
     # Get student's year level
-    completed_units = StudentSubject.objects.filter(
-        student=student,
-        status='completed'
-    ).aggregate(total=Sum('subject__units'))['total'] or 0
+    completed_ids = completed_subject_ids(student)
+    completed_units = Subject.objects.filter(
+        id__in=completed_ids
+    ).aggregate(total=Sum('units'))['total'] or 0
     estimated_year = min((completed_units // 30) + 1, 4)
 
     # Determine current semester (you can make this dynamic based on term name/dates)
@@ -231,88 +166,10 @@ def auto_enroll_view(request):
         is_recommended=True
     ).select_related('subject').order_by('subject__code')
 
-    enrolled_count = 0
-    skipped_subjects = []
-    enrolled_subjects = []
-
-    with transaction.atomic():
-        for curr_subject in recommended_subjects:
-            subject = curr_subject.subject
-
-            # Check if would exceed unit cap
-            if current_units + subject.units > unit_cap:
-                skipped_subjects.append({
-                    'subject': subject,
-                    'reason': f'Would exceed unit cap ({unit_cap} units)'
-                })
-                continue
-
-            # Check if already enrolled
-            already_enrolled = StudentSubject.objects.filter(
-                student=student,
-                subject=subject,
-                term=active_term,
-                status='enrolled'
-            ).exists()
-            if already_enrolled:
-                continue
-
-            # Check if already completed
-            already_completed = StudentSubject.objects.filter(
-                student=student,
-                subject=subject,
-                status='completed'
-            ).exists()
-            if already_completed:
-                continue
-
-            # Check prerequisites
-            prereqs_met, missing_prereqs = check_prerequisites(student, subject)
-            if not prereqs_met:
-                prereq_names = ', '.join([p.code for p in missing_prereqs])
-                skipped_subjects.append({
-                    'subject': subject,
-                    'reason': f'Missing prerequisites: {prereq_names}'
-                })
-                continue
-
-            # Get first available section with capacity
-            available_section = Section.objects.filter(
-                subject=subject,
-                term=active_term,
-                status='open'
-            ).select_related('professor').first()
-
-            if not available_section:
-                skipped_subjects.append({
-                    'subject': subject,
-                    'reason': 'No available sections'
-                })
-                continue
-
-            if available_section.is_full:
-                skipped_subjects.append({
-                    'subject': subject,
-                    'reason': 'All sections are full'
-                })
-                continue
-
-            # Enroll the student
-            StudentSubject.objects.create(
-                student=student,
-                subject=subject,
-                term=active_term,
-                section=available_section,
-                professor=available_section.professor,
-                status='enrolled'
-            )
-
-            enrolled_subjects.append({
-                'subject': subject,
-                'section': available_section
-            })
-            current_units += subject.units
-            enrolled_count += 1
+    enrolled_subjects, skipped_subjects = writer.run(
+        auto_enroll_unit, student, active_term, recommended_subjects, completed_ids, current_units, unit_cap
+    )
+    enrolled_count = len(enrolled_subjects)
 
     # Show success messages
     if enrolled_count > 0:
@@ -335,6 +192,78 @@ def auto_enroll_view(request):
     return redirect('enrollment:home')
 
 
+def auto_enroll_unit(student, active_term, recommended_subjects, completed_ids, current_units, unit_cap):
+    """Write unit for auto_enroll_view: returns (enrolled, skipped) lists"""
+    skipped_subjects = []
+    enrolled_subjects = []
+    recommended_subjects = [curr_subject.subject for curr_subject in recommended_subjects]
+
+    # Everything the loop checks, loaded for all recommended subjects at once
+    enrolled_ids = set(StudentSubject.objects.filter(
+        student=student,
+        term=active_term,
+        status='enrolled'
+    ).values_list('subject_id', flat=True))
+    missing = missing_prerequisites(student, recommended_subjects)
+    sections = first_open_sections(active_term, recommended_subjects)
+
+    for subject in recommended_subjects:
+        # Check if would exceed unit cap
+        if current_units + subject.units > unit_cap:
+            skipped_subjects.append({
+                'subject': subject,
+                'reason': f'Would exceed unit cap ({unit_cap} units)'
+            })
+            continue
+
+        # Check if already enrolled
+        if subject.id in enrolled_ids:
+            continue
+
+        # Check if already completed
+        already_completed = subject.id in completed_ids
+        if already_completed:
+            continue
+
+        # Check prerequisites
+        missing_prereqs = missing[subject.id]
+        if missing_prereqs:
+            prereq_names = ', '.join([p.code for p in missing_prereqs])
+            skipped_subjects.append({
+                'subject': subject,
+                'reason': f'Missing prerequisites: {prereq_names}'
+            })
+            continue
+
+        # Get first available section with capacity
+        available_section = sections.get(subject.id)
+
+        if not available_section:
+            skipped_subjects.append({
+                'subject': subject,
+                'reason': 'No available sections'
+            })
+            continue
+
+        if available_section.enrolled_students >= available_section.capacity:
+            skipped_subjects.append({
+                'subject': subject,
+                'reason': 'All sections are full'
+            })
+            continue
+
+        enrolled_subjects.append({
+            'subject': subject,
+            'section': available_section
+        })
+        current_units += subject.units
+
+    # Enroll the student
+    enroll_in_sections(student, active_term, [enrolled['section'] for enrolled in enrolled_subjects])
+
+    return enrolled_subjects, skipped_subjects
+
+
 @login_required
 def enroll_subject_view(request, section_id):
     """Enroll student in a subject section"""
@@ -347,7 +276,7 @@ def enroll_subject_view(request, section_id):
         return redirect('dashboard')
 
     # Check if enrollment is open
-    enrollment_open = Setting.get_bool('enrollment_open', default=True)
+    enrollment_open = site_settings.enrollment_open
     if not enrollment_open:
         messages.error(request, 'Enrollment is currently closed.')
         return redirect('enrollment:home')
@@ -390,12 +319,8 @@ def enroll_subject_view(request, section_id):
         messages.warning(request, f'You are already enrolled in {subject.code} - {subject.title}.')
         return redirect('enrollment:home')
 
-    # Validation 4: Check if already completed
-    already_completed = StudentSubject.objects.filter(
-        student=student,
-        subject=subject,
-        status='completed'
-    ).exists()
+    # Validation 4: Check if already completed (here or credited from a previous school)
+    already_completed = subject.id in completed_subject_ids(student)
 
     if already_completed:
         messages.warning(request, f'You have already completed {subject.code} - {subject.title}.')
@@ -418,7 +343,7 @@ def enroll_subject_view(request, section_id):
         status='enrolled'
     ).aggregate(total=Sum('subject__units'))['total'] or 0
 
-    unit_cap = Setting.get_int('freshman_unit_cap', default=30)
+    unit_cap = site_settings.freshman_unit_cap
 
     if current_units + subject.units > unit_cap:
         messages.error(
@@ -429,25 +354,34 @@ def enroll_subject_view(request, section_id):
         return redirect('enrollment:home')
 
     # All validations passed - enroll the student
-    with transaction.atomic():
-        StudentSubject.objects.create(
-            student=student,
-            subject=subject,
-            term=term,
-            section=section,
-            professor=section.professor,
-            status='enrolled'
-        )
+    if writer.run(enroll_unit, student, section) is None:
+        messages.error(request, f'{subject.code} - Section {section.section_code} is full.')
+        return redirect('enrollment:home')
 
-        messages.success(
-            request,
-            f'Successfully enrolled in {subject.code} - {subject.title} '
-            f'(Section {section.section_code}, {subject.units} units)'
-        )
+    messages.success(
+        request,
+        f'Successfully enrolled in {subject.code} - {subject.title} '
+        f'(Section {section.section_code}, {subject.units} units)'
+    )
 
     return redirect('enrollment:home')
 
 
+def enroll_unit(student, section):
+    """Write unit: enroll in `section`, or return None if it filled up since the checks"""
+    # Counted again inside the write transaction, where no other enrollment can interleave
+    if section.student_subjects.count() >= section.capacity:
+        return None
+    return StudentSubject.objects.create(
+        student=student,
+        subject=section.subject,
+        term=section.term,
+        section=section,
+        professor=section.professor,
+        status='enrolled'
+    )
+
+
 @login_required
 def drop_subject_view(request, enrollment_id):
     """Drop an enrolled subject"""
@@ -460,7 +394,7 @@ def drop_subject_view(request, enrollment_id):
         return redirect('dashboard')
 
     # Check if enrollment is open
-    enrollment_open = Setting.get_bool('enrollment_open', default=True)
+    enrollment_open = site_settings.enrollment_open
     if not enrollment_open:
         messages.error(request, 'Enrollment is currently closed. Cannot drop subjects.')
         return redirect('enrollment:home')
@@ -482,7 +416,8 @@ def drop_subject_view(request, enrollment_id):
 
     # Check if still within add/drop period
     from django.utils import timezone
-    if timezone.now().date() > enrollment.term.add_drop_deadline:
+    deadline = enrollment.term.add_drop_deadline
+    if deadline and timezone.now().date() > deadline:
         messages.error(
             request,
             f'Add/drop deadline has passed ({enrollment.term.add_drop_deadline}). '
@@ -495,7 +430,7 @@ def drop_subject_view(request, enrollment_id):
     subject_title = enrollment.subject.title
     units = enrollment.subject.units
 
-    enrollment.delete()
+    writer.run(enrollment.delete)
 
     messages.success(
         request,
@@ -551,44 +486,118 @@ def cor_view(request):
 
 # Helper functions
 
-def check_prerequisites(student, subject):
+def credited_subject_ids(student):
+    """Catalog subjects credited to a transferee from their previous school's TOR"""
+    return set(Subject.objects.filter(
+        transferee_credits__application__generated_user_id=student.user_id
+    ).values_list('id', flat=True))
+
+
+def completed_subject_ids(student):
+    """Subjects completed here plus transferee credits; both count as done"""
+    completed = set(StudentSubject.objects.filter(
+        student=student,
+        status='completed'
+    ).values_list('subject_id', flat=True))
+    return completed | credited_subject_ids(student)
+
+
+def passed_subject_ids(student):
     """
-    Check if student has met all prerequisites for a subject.
-    Returns (met: bool, missing_prereqs: list)
+    Subjects that count as passed for prerequisites: completed here without a
+    failing grade, plus transferee credits
     """
-    # Get all prerequisites for this subject
-    prereqs = Prereq.objects.filter(subject=subject).select_related('prereq_subject')
+    completed = StudentSubject.objects.filter(
+        student=student,
+        status='completed'
+    ).select_related('grade__subject__program')
+
+    passed = set()
+    for student_subject in completed:
+        grade = getattr(student_subject, 'grade', None)
+        if grade is None or grade.is_passing:
+            passed.add(student_subject.subject_id)
+    return passed | credited_subject_ids(student)
+
+
+def missing_prerequisites(student, subjects, passed_ids=None):
+    """{subject id: [prerequisite subjects not passed yet]} for several subjects at once"""
+    missing = {subject.id: [] for subject in subjects}
+    prereqs = list(Prereq.objects.filter(subject__in=subjects).select_related('prereq_subject'))
+    if prereqs and passed_ids is None:
+        passed_ids = passed_subject_ids(student)
+    for prereq in prereqs:
+        if prereq.prereq_subject_id not in passed_ids:
+            missing[prereq.subject_id].append(prereq.prereq_subject)
+    return missing
 
-    if not prereqs.exists():
-        return True, []
 
-    missing_prereqs = []
+def open_sections(term, subjects):
+    """Open sections of several subjects in a term, with their enrollment counted (enrolled_students)"""
+    return Section.objects.filter(
+        subject__in=subjects,
+        term=term,
+        status='open'
+    ).select_related('professor').annotate(enrolled_students=Count('student_subjects'))
+
+
+def first_open_sections(term, subjects):
+    """{subject id: its first open section (full or not)}"""
+    sections = {}
+    for section in open_sections(term, subjects):
+        sections.setdefault(section.subject_id, section)
+    return sections
 
-    for prereq in prereqs:
-        prereq_subject = prereq.prereq_subject
 
-        # Check if student has completed this prerequisite
-        completed = StudentSubject.objects.filter(
+def subject_offerings(student, term, subjects, passed_ids, recommended):
+    """Subjects that still have an open section with room, as the enrollment page lists them"""
+    sections = {}
+    for section in open_sections(term, subjects):
+        # Filter out full sections
+        if section.enrolled_students < section.capacity:
+            sections.setdefault(section.subject_id, []).append(section)
+    subjects = [subject for subject in subjects if subject.id in sections]
+    missing = missing_prerequisites(student, subjects, passed_ids)
+    return [{
+        'subject': subject,
+        'sections': sections[subject.id],
+        'prereqs_met': not missing[subject.id],
+        'missing_prereqs': missing[subject.id],
+        'recommended': recommended
+    } for subject in subjects]
+
+
+def enroll_in_sections(student, term, sections):
+    """Enroll a student in several sections with one INSERT"""
+    return save_enrollments([
+        StudentSubject(
             student=student,
-            subject=prereq_subject,
-            status='completed'
-        ).exists()
-
-        # Also check if student has a passing grade
-        if completed:
-            # Check grade
-            student_subject = StudentSubject.objects.filter(
-                student=student,
-                subject=prereq_subject,
-                status='completed'
-            ).first()
-
-            if student_subject:
-                grade = Grade.objects.filter(student_subject=student_subject).first()
-                if grade and not grade.is_passing:
-                    completed = False
-
-        if not completed:
-            missing_prereqs.append(prereq_subject)
+            subject_id=section.subject_id,
+            term=term,
+            section=section,
+            professor_id=section.professor_id,
+            status='enrolled'
+        )
+        for section in sections
+    ])
+
+
+def save_enrollments(enrollments):
+    """bulk_create StudentSubject rows, then send the post_save signals it skips"""
+    enrollments = StudentSubject.objects.bulk_create(enrollments)
+    # Dashboards and cached counts still need to hear about the rows
+    for enrollment in enrollments:
+        post_save.send(
+            sender=StudentSubject, instance=enrollment, created=True, update_fields=None, raw=False,
+            using=enrollment._state.db,
+        )
+    return enrollments
 
+
+def check_prerequisites(student, subject):
+    """
+    Check if student has met all prerequisites for a subject.
+    Returns (met: bool, missing_prereqs: list)
+    """
+    missing_prereqs = missing_prerequisites(student, [subject])[subject.id]
     return len(missing_prereqs) == 0, missing_prereqs
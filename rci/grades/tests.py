@@ -1,3 +1,17 @@
-from django.test import TestCase
+from rci.query_budget import Budget, QueryBudgetTestCase
 
-# Create your tests here.
+BUDGETS = [
+    Budget('grades:professor_sections', 5, role='professor'),
+    Budget('grades:section_grades', 10, role='professor', args=lambda fixture: [fixture.enrollments[0].section_id]),
+    Budget('grades:submit_grade', 18, role='professor', args=lambda fixture: [fixture.enrollments[0].pk],
+           method='post', data=lambda fixture: {'grade': '1.50', 'remarks': 'Final'}, status=302),
+    Budget('grades:student_grades', 9, role='student'),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'grades.urls')
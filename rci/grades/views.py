@@ -3,10 +3,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Count
-from django.db import transaction
 from .models import Grade
 from enrollment.models import Section, StudentSubject, Student
-from audit.models import AuditTrail
+from audit import outbox
+from rci import writer
 import json
 
 
@@ -107,7 +107,8 @@ def submit_grade_view(request, enrollment_id):
     # Check if encoding is still allowed
     from django.utils import timezone
     term = section.term
-    if not term.is_active and timezone.now().date() > term.grade_encoding_deadline:
+    deadline = term.grade_encoding_deadline
+    if not term.is_active and deadline and timezone.now().date() > deadline:
         messages.error(request, f'Grade encoding deadline has passed ({term.grade_encoding_deadline}).')
         return redirect('grades:section_grades', section_id=section.id)
 
@@ -126,59 +127,64 @@ def submit_grade_view(request, enrollment_id):
         return redirect('grades:section_grades', section_id=section.id)
 
     # Save grade with audit trail
-    with transaction.atomic():
-        # Get or create grade
-        try:
-            grade_obj = Grade.objects.get(student_subject=enrollment)
-            old_grade = grade_obj.grade
-            grade_obj.grade = grade_value
-            grade_obj.remarks = remarks
-            grade_obj.save()
-
-            # Log change in audit trail
-            AuditTrail.objects.create(
-                actor=request.user,
-                action='update_grade',
-                entity='Grade',
-                entity_id=grade_obj.id,
-                old_value_json={'grade': old_grade},
-                new_value_json={'grade': grade_value},
-                notes=f"Updated grade for {enrollment.student.user.get_full_name()} in {section.subject.code}"
-            )
-
-            messages.success(
-                request,
-                f'Grade updated to {grade_value} for {enrollment.student.user.get_full_name()}'
-            )
-
-        except Grade.DoesNotExist:
-            grade_obj = Grade.objects.create(
-                student_subject=enrollment,
-                subject=section.subject,
-                professor=request.user,
-                grade=grade_value,
-                remarks=remarks
-            )
-
-            # Log creation in audit trail
-            AuditTrail.objects.create(
-                actor=request.user,
-                action='create_grade',
-                entity='Grade',
-                entity_id=grade_obj.id,
-                old_value_json={},
-                new_value_json={'grade': grade_value},
-                notes=f"Created grade for {enrollment.student.user.get_full_name()} in {section.subject.code}"
-            )
-
-            messages.success(
-                request,
-                f'Grade {grade_value} submitted for {enrollment.student.user.get_full_name()}'
-            )
+    created = writer.run(save_grade_unit, enrollment, section, request.user, grade_value, remarks)
+    if created:
+        messages.success(
+            request,
+            f'Grade {grade_value} submitted for {enrollment.student.user.get_full_name()}'
+        )
+    else:
+        messages.success(
+            request,
+            f'Grade updated to {grade_value} for {enrollment.student.user.get_full_name()}'
+        )
 
     return redirect('grades:section_grades', section_id=section.id)
 
 
+def save_grade_unit(enrollment, section, professor, grade_value, remarks):
+    """Write unit for submit_grade_view: create or update the grade and audit it; True if created"""
+    try:
+        grade_obj = Grade.objects.get(student_subject=enrollment)
+    except Grade.DoesNotExist:
+        grade_obj = Grade.objects.create(
+            student_subject=enrollment,
+            subject=section.subject,
+            professor=professor,
+            grade=grade_value,
+            remarks=remarks
+        )
+
+        # Log creation in audit trail
+        outbox.record(
+            actor=professor,
+            action='create_grade',
+            entity='Grade',
+            entity_id=grade_obj.id,
+            old_value_json={},
+            new_value_json={'grade': grade_value},
+            notes=f"Created grade for {enrollment.student.user.get_full_name()} in {section.subject.code}"
+        )
+        return True
+
+    old_grade = grade_obj.grade
+    grade_obj.grade = grade_value
+    grade_obj.remarks = remarks
+    grade_obj.save()
+
+    # Log change in audit trail
+    outbox.record(
+        actor=professor,
+        action='update_grade',
+        entity='Grade',
+        entity_id=grade_obj.id,
+        old_value_json={'grade': old_grade},
+        new_value_json={'grade': grade_value},
+        notes=f"Updated grade for {enrollment.student.user.get_full_name()} in {section.subject.code}"
+    )
+    return False
+
+
 # Student Views
 
 @login_required
@@ -199,8 +205,9 @@ def student_grades_view(request):
     enrollments = StudentSubject.objects.filter(
         student=student
     ).select_related(
-        'subject', 'section', 'term', 'professor'
-    ).prefetch_related('grade').order_by('-term__start_date', 'subject__code')
+        # is_passing reads the grade's subject and program on every row
+        'subject', 'section', 'term', 'professor', 'grade__subject__program'
+    ).order_by('-term__start_date', 'subject__code')
 
     # Organize by term
     terms_data = {}
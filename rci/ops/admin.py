@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import DatabaseStat
+
+
+@admin.register(DatabaseStat)
+class DatabaseStatAdmin(admin.ModelAdmin):
+    list_display = ['recorded_at', 'database', 'kind', 'name', 'row_count', 'page_count', 'size_bytes',
+                    'unused_bytes', 'fragmentation']
+    list_filter = ['database', 'kind']
+    search_fields = ['name', 'table_name']
+    date_hierarchy = 'recorded_at'
+
+    # Written by `manage.py maintain_database` only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class OpsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "ops"
+
+    def ready(self):
+        from rci import campus
+        from . import checks  # noqa: F401
+
+        campus.connect()
@@ -0,0 +1,166 @@
+"""
+Online backups of the SQLite databases.
+
+`backup()` copies a live database with the SQLite backup API, a few hundred
+pages per step with a pause in between, so writers keep committing while the
+copy runs. In WAL mode the copy reads from one snapshot held open for the
+whole run: writes made meanwhile neither block the copy nor restart it (they
+only keep the WAL from being checkpointed until it finishes). The copy is
+checked with `PRAGMA integrity_check`, gzip-compressed into BACKUP_DIR as
+<alias>-<timestamp>.sqlite3.gz (to the microsecond, so runs started within
+the same second never overwrite each other) and older backups of the same
+database are rotated out.
+
+Each database is copied from its own snapshot, taken when its copy starts.
+Backing up several databases in one run gives one consistent copy of each,
+not a set taken at a single moment: a transaction committed to the main
+database and a campus shard (or relayed into the audit database) between two
+copies is in one backup and not the other.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+SUFFIX = '.sqlite3.gz'
+
+
+class BackupFailed(Exception):
+    """The copy could not be made or did not pass the integrity check"""
+
+
+def backup_dir():
+    return os.fspath(settings.BACKUP_DIR)
+
+
+def sqlite_aliases():
+    """Every SQLite database worth backing up (the read replica is itself a copy)"""
+    return [
+        alias for alias in settings.DATABASES
+        if alias != 'replica' and connections[alias].vendor == 'sqlite'
+    ]
+
+
+def backup_path(alias, taken_at):
+    return os.path.join(
+        backup_dir(), f"{alias}-{timezone.localtime(taken_at).strftime('%Y%m%d-%H%M%S-%f')}{SUFFIX}"
+    )
+
+
+def _new_backup_path(alias):
+    """A backup path no other backup (finished or in progress) uses yet"""
+    taken_at = timezone.now()
+    path = backup_path(alias, taken_at)
+    while os.path.exists(path) or os.path.exists(f'{path[:-len(".gz")]}.partial'):
+        # Still sorts after the existing one
+        taken_at += timedelta(microseconds=1)
+        path = backup_path(alias, taken_at)
+    return path
+
+
+def backups(alias):
+    """Existing backups of a database, oldest first"""
+    try:
+        names = os.listdir(backup_dir())
+    except FileNotFoundError:
+        return []
+    # Timestamps sort chronologically as text
+    return sorted(
+        os.path.join(backup_dir(), name) for name in names
+        if name.startswith(f'{alias}-') and name.endswith(SUFFIX)
+    )
+
+
+def copy(source_path, target_path, pages, sleep, progress=None):
+    """Copy a live database file page by page; returns the number of pages copied"""
+    copied = [0]
+
+    def step(status, remaining, total):
+        copied[0] = total
+        if progress:
+            progress(total - remaining, total)
+        # backup() itself only sleeps when the source is busy; pause between every step
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    source = sqlite3.connect(source_path, timeout=30, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        if wal:
+            # Pin one snapshot for every step; writers carry on in the WAL
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        # Without WAL each step takes the shared lock briefly and a concurrent write restarts the copy
+        source.backup(target, pages=pages, progress=step, sleep=sleep)
+        if wal:
+            source.execute('COMMIT')
+    except sqlite3.Error as exc:
+        raise BackupFailed(f'Could not copy {source_path}: {exc}') from exc
+    finally:
+        target.close()
+        source.close()
+    return copied[0]
+
+
+def integrity_errors(path):
+    """Problems `PRAGMA integrity_check` finds in a database file ([] if it is sound)"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    finally:
+        conn.close()
+    return [] if rows == ['ok'] else rows
+
+
+def compress(path, target_path):
+    """Gzip a file next to its destination, then move it into place"""
+    partial = f'{target_path}.partial'
+    with open(path, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+    os.replace(partial, target_path)
+
+
+def rotate(alias, keep):
+    """Delete all but the newest `keep` backups of a database; returns the removed paths"""
+    stale = backups(alias)[:-keep] if keep > 0 else []
+    for path in stale:
+        os.remove(path)
+    return stale
+
+
+def backup(alias, pages=256, sleep=0.05, keep=14, progress=None):
+    """
+    Back up one database into BACKUP_DIR. Returns {'path', 'pages', 'bytes',
+    'copy_seconds', 'seconds', 'rotated'}; raises BackupFailed if the copy is corrupt.
+    """
+    os.makedirs(backup_dir(), exist_ok=True)
+    started = time.perf_counter()
+    target_path = _new_backup_path(alias)
+    # The raw copy sits next to the backups (same filesystem) until it is compressed
+    raw_path = f'{target_path[:-len(".gz")]}.partial'
+    try:
+        copied = copy(settings.DATABASES[alias]['NAME'], raw_path, pages, sleep, progress)
+        copy_seconds = time.perf_counter() - started
+        errors = integrity_errors(raw_path)
+        if errors:
+            raise BackupFailed(f"Backup of '{alias}' failed the integrity check: {'; '.join(errors[:5])}")
+        compress(raw_path, target_path)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    return {
+        'path': target_path,
+        'pages': copied,
+        'bytes': os.path.getsize(target_path),
+        'copy_seconds': copy_seconds,
+        'seconds': time.perf_counter() - started,
+        'rotated': rotate(alias, keep),
+    }
@@ -0,0 +1,19 @@
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+
+
+@register(Tags.database)
+def check_sqlite_pragmas(app_configs=None, databases=None, **kwargs):
+    """Warn when SQLite did not apply a configured PRAGMA (e.g. WAL on a network filesystem)"""
+    warnings = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if not hasattr(connection, 'pragma_mismatches'):
+            continue
+        for name, configured, effective in connection.pragma_mismatches():
+            warnings.append(Warning(
+                f"Database '{alias}': PRAGMA {name} is {effective!r}, configured {configured!r}.",
+                hint='Check the SQLITE_* environment variables and the filesystem holding the database.',
+                id='ops.W001',
+            ))
+    return warnings
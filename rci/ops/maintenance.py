@@ -0,0 +1,154 @@
+"""
+Routine SQLite maintenance: planner statistics, space reclamation and size
+statistics.
+
+- `analyze()` refreshes the query planner's statistics (ANALYZE bounded by
+  analysis_limit, then PRAGMA optimize).
+- `incremental_vacuum()` returns free pages to the filesystem a few hundred at
+  a time, each step its own short write transaction, so a term close or purge
+  does not leave the file bloated and no step holds the write lock for long.
+  It needs auto_vacuum=INCREMENTAL: new database files get it from the
+  backend profile, existing ones are converted once by `enable_incremental()`
+  (a full VACUUM that blocks writers while it runs).
+- `collect()` measures every table and index (rows, pages, bytes, free space,
+  leaf-page fragmentation) with the dbstat virtual table; `record()` stores
+  the result as DatabaseStat rows so growth can be followed over time.
+"""
+import time
+
+from django.db import connections
+from django.utils import timezone
+
+from .models import DatabaseStat
+
+AUTO_VACUUM_MODES = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}
+
+
+def _pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    return cursor.fetchone()[0]
+
+
+def _quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def auto_vacuum(alias):
+    """The database's auto_vacuum mode: NONE, FULL or INCREMENTAL"""
+    with connections[alias].cursor() as cursor:
+        return AUTO_VACUUM_MODES[_pragma(cursor, 'auto_vacuum')]
+
+
+def analyze(alias, analysis_limit=1000):
+    """Refresh planner statistics; analysis_limit rows sampled per index (0 = exact)"""
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+        cursor.execute('ANALYZE')
+        cursor.execute('PRAGMA optimize')
+    return time.perf_counter() - started
+
+
+def enable_incremental(alias):
+    """Switch an existing database to auto_vacuum=INCREMENTAL (rewrites the whole file)"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+
+
+def incremental_vacuum(alias, step=500, max_pages=None, sleep=0.05, progress=None):
+    """
+    Release free pages in steps of `step` pages, pausing `sleep` seconds in
+    between, until the freelist is empty or `max_pages` were released.
+    Returns the number of pages released.
+    """
+    released = 0
+    with connections[alias].cursor() as cursor:
+        while True:
+            free = _pragma(cursor, 'freelist_count')
+            budget = step if max_pages is None else min(step, max_pages - released)
+            if not free or budget <= 0:
+                return released
+            # Runs as its own autocommit write transaction
+            cursor.execute(f'PRAGMA incremental_vacuum({int(budget)})')
+            cursor.fetchall()
+            after = _pragma(cursor, 'freelist_count')
+            if after >= free:
+                # Nothing moved: auto_vacuum is not INCREMENTAL
+                return released
+            released += free - after
+            if progress:
+                progress(released, after)
+            if after:
+                time.sleep(sleep)
+
+
+def collect(alias):
+    """
+    Size statistics for one database: a 'database' summary followed by one
+    entry per table and index (unsaved DatabaseStat instances).
+    """
+    recorded_at = timezone.now()
+    with connections[alias].cursor() as cursor:
+        page_size = _pragma(cursor, 'page_size')
+        page_count = _pragma(cursor, 'page_count')
+        freelist = _pragma(cursor, 'freelist_count')
+
+        cursor.execute("SELECT type, name, tbl_name FROM sqlite_schema WHERE type IN ('table', 'index')")
+        objects = {name: (kind, table) for kind, name, table in cursor.fetchall()}
+
+        # Leaf pages in b-tree order: one that does not follow the previous leaf costs a scan a seek
+        cursor.execute("""
+            SELECT name, COUNT(*), SUM(pgsize), SUM(unused),
+                   SUM(pagetype = 'leaf'),
+                   SUM(pagetype = 'leaf' AND previous IS NOT NULL AND pageno != previous + 1)
+            FROM (
+                SELECT name, pagetype, pageno, pgsize, unused,
+                       LAG(pageno) OVER (PARTITION BY name, pagetype = 'leaf' ORDER BY path) AS previous
+                FROM dbstat
+            )
+            GROUP BY name
+        """)
+        sizes = cursor.fetchall()
+
+        stats = [DatabaseStat(
+            database=alias,
+            kind=DatabaseStat.KIND_DATABASE,
+            name=alias,
+            page_count=page_count,
+            size_bytes=page_count * page_size,
+            unused_bytes=freelist * page_size,
+            fragmentation=0,
+            recorded_at=recorded_at,
+        )]
+        for name, pages, size, unused, leaves, gaps in sizes:
+            kind, table = objects.get(name, ('table', name))
+            row_count = None
+            if kind == 'table':
+                cursor.execute(f'SELECT COUNT(*) FROM {_quote(name)}')
+                row_count = cursor.fetchone()[0]
+            stats.append(DatabaseStat(
+                database=alias,
+                kind=kind,
+                name=name,
+                table_name=table,
+                row_count=row_count,
+                page_count=pages,
+                size_bytes=size,
+                unused_bytes=unused,
+                fragmentation=round(gaps * 100 / (leaves - 1), 1) if leaves > 1 else 0,
+                recorded_at=recorded_at,
+            ))
+    return stats
+
+
+def record(stats):
+    """Store collected statistics with the rest of the ops data"""
+    return DatabaseStat.objects.using('default').bulk_create(stats)
+
+
+def previous_summary(alias):
+    """The last recorded 'database' summary of a database, or None"""
+    return DatabaseStat.objects.using('default').filter(
+        database=alias, kind=DatabaseStat.KIND_DATABASE
+    ).order_by('-recorded_at').first()
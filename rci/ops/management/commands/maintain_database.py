@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ops import backup, maintenance
+
+
+def _mib(size):
+    return f'{size / 1024 / 1024:,.1f} MiB'
+
+
+class Command(BaseCommand):
+    help = 'Refresh planner statistics, reclaim free pages in bounded steps and record table and index sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append',
+                            help='Only maintain these aliases (repeatable); default is every SQLite database')
+        parser.add_argument('--analysis-limit', type=int, default=1000,
+                            help='Rows ANALYZE samples per index (0 = exact, slower on large tables)')
+        parser.add_argument('--skip-analyze', action='store_true')
+        parser.add_argument('--skip-vacuum', action='store_true')
+        parser.add_argument('--vacuum-step', type=int, default=500, help='Pages released per write transaction')
+        parser.add_argument('--vacuum-max-pages', type=int, help='Stop after releasing this many pages')
+        parser.add_argument('--sleep', type=float, default=0.05, help='Seconds to pause between vacuum steps')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Convert a database to auto_vacuum=INCREMENTAL first (a full VACUUM: '
+                                 'blocks writers while it runs, run it in a maintenance window)')
+        parser.add_argument('--top', type=int, default=10, help='Largest tables and indexes to list')
+        parser.add_argument('--no-record', action='store_true', help="Print the statistics without storing them")
+
+    def handle(self, *args, **options):
+        aliases = options['database'] or backup.sqlite_aliases()
+        for alias in aliases:
+            if alias not in backup.sqlite_aliases():
+                raise CommandError(f"'{alias}' is not a SQLite database that can be maintained.")
+
+        for alias in aliases:
+            self.stdout.write(f'🛠️  {alias}')
+            previous = maintenance.previous_summary(alias)
+
+            if not options['skip_analyze']:
+                seconds = maintenance.analyze(alias, options['analysis_limit'])
+                self.stdout.write(f'  • ANALYZE + PRAGMA optimize in {seconds:.2f}s')
+
+            if options['enable_incremental_vacuum'] and maintenance.auto_vacuum(alias) != 'INCREMENTAL':
+                self.stdout.write('  • Converting to auto_vacuum=INCREMENTAL (full VACUUM)…')
+                maintenance.enable_incremental(alias)
+
+            if not options['skip_vacuum']:
+                mode = maintenance.auto_vacuum(alias)
+                if mode == 'INCREMENTAL':
+                    released = maintenance.incremental_vacuum(
+                        alias,
+                        step=options['vacuum_step'],
+                        max_pages=options['vacuum_max_pages'],
+                        sleep=options['sleep'],
+                    )
+                    self.stdout.write(f'  • Incremental vacuum released {released} pages')
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        f'  ⚠ auto_vacuum is {mode}; free pages stay in the file until '
+                        f'--enable-incremental-vacuum converts it'
+                    ))
+
+            stats = maintenance.collect(alias)
+            summary, objects = stats[0], stats[1:]
+            growth = ''
+            if previous:
+                change = summary.size_bytes - previous.size_bytes
+                growth = f', {"+" if change >= 0 else "-"}{_mib(abs(change))} since {previous.recorded_at:%Y-%m-%d}'
+            self.stdout.write(
+                f'  📊 {_mib(summary.size_bytes)} in {summary.page_count} pages, '
+                f'{_mib(summary.unused_bytes)} free{growth}'
+            )
+            for kind, plural in (('table', 'tables'), ('index', 'indexes')):
+                largest = sorted(
+                    (stat for stat in objects if stat.kind == kind), key=lambda stat: stat.size_bytes, reverse=True
+                )[:options['top']]
+                if largest:
+                    self.stdout.write(f'  Largest {plural}:')
+                for stat in largest:
+                    rows = f'{stat.row_count:,} rows, ' if stat.row_count is not None else ''
+                    self.stdout.write(
+                        f'    {stat.name:<40} {rows}{stat.page_count} pages, {_mib(stat.size_bytes)}, '
+                        f'{_mib(stat.unused_bytes)} unused, {stat.fragmentation}% fragmented'
+                    )
+
+            if not options['no_record']:
+                maintenance.record(stats)
+
+        recorded = '' if options['no_record'] else ' (statistics recorded)'
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(aliases)} database(s) maintained{recorded}'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from rci import replica
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the read replica with the backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep refreshing every N seconds (0 = refresh once)')
+
+    def handle(self, *args, **options):
+        if not replica.configured():
+            raise CommandError('No replica database configured; set REPLICA_DB to the copy\'s path.')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('refresh_replica copies SQLite databases only.')
+
+        while True:
+            started = time.perf_counter()
+            replica.refresh()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'✓ Replica refreshed in {elapsed:.2f}s'))
+            if not options['interval']:
+                return
+            # Stay well inside REPLICA_MAX_LAG, or the replica goes unused between refreshes
+            time.sleep(max(options['interval'] - elapsed, 0))
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# What Django's stock sqlite3 backend runs with
+BASELINE = {
+    'label': 'stock (rollback journal, synchronous=FULL, deferred BEGIN)',
+    'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'begin': 'BEGIN',
+    # Seconds a writer waits on a lock: Django passes no timeout, so sqlite3.connect's default
+    'timeout': 5.0,
+}
+
+
+class Command(BaseCommand):
+    help = 'Print the effective SQLite PRAGMAs and optionally benchmark write throughput against the stock setup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--benchmark', action='store_true', help='Compare concurrent write throughput')
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads')
+        parser.add_argument('--transactions', type=int, default=250, help='Transactions per writer')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not hasattr(connection, 'effective_pragmas'):
+            raise CommandError(f"Database '{options['database']}' does not use the rci.sqlite backend.")
+        # The PRAGMA and transaction settings are resolved when the connection opens
+        connection.ensure_connection()
+
+        self.stdout.write(f"🗄️  {connection.settings_dict['NAME']}")
+        self.stdout.write(f"   SQLite {sqlite3.sqlite_version}, CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, "
+                          f"health checks {'on' if connection.settings_dict['CONN_HEALTH_CHECKS'] else 'off'}, "
+                          f"transactions {connection.transaction_mode or 'DEFERRED'}")
+        effective = connection.effective_pragmas()
+        for name, value in effective.items():
+            configured = connection.pragmas.get(name)
+            note = f' (configured {configured})' if configured is not None else ''
+            self.stdout.write(f'   {name:<20} {value}{note}')
+
+        mismatches = connection.pragma_mismatches()
+        for name, configured, actual in mismatches:
+            self.stdout.write(self.style.WARNING(f'⚠️  PRAGMA {name} is {actual!r}, configured {configured!r}'))
+
+        if options['benchmark']:
+            configured = {
+                'label': 'configured (rci.sqlite profile)',
+                'pragmas': connection.pragmas,
+                'begin': f'BEGIN {connection.transaction_mode or ""}'.strip(),
+                'timeout': int(connection.pragmas.get('busy_timeout', 5000)) / 1000,
+            }
+            directory = os.path.dirname(os.path.abspath(connection.settings_dict['NAME']))
+            self.stdout.write(f"\n⏱️  {options['writers']} writers x {options['transactions']} transactions "
+                              f"(read a count, insert a row), scratch files in {directory}")
+            for profile in (BASELINE, configured):
+                result = benchmark(profile, directory, options['writers'], options['transactions'])
+                self.stdout.write(
+                    f"   {profile['label']}, {profile['timeout']:g}s lock timeout\n"
+                    f"     {result['commits']} commits in {result['elapsed']:.2f}s = {result['rate']:.0f}/s, "
+                    f"{result['locked']} 'database is locked' failures, p95 {result['p95'] * 1000:.1f} ms"
+                )
+
+        if mismatches:
+            self.stdout.write(self.style.WARNING('Some PRAGMAs were not applied'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ SQLite profile applied'))
+
+
+def benchmark(profile, directory, writers, transactions):
+    """Run concurrent read-then-write transactions against a scratch database file"""
+    fd, path = tempfile.mkstemp(suffix='.sqlite3', dir=directory)
+    os.close(fd)
+    try:
+        setup = sqlite3.connect(path)
+        setup.execute('PRAGMA journal_mode = %s' % profile['pragmas'].get('journal_mode', 'DELETE'))
+        setup.execute('CREATE TABLE enrollment (id INTEGER PRIMARY KEY, section INTEGER, student INTEGER)')
+        setup.commit()
+        setup.close()
+
+        latencies = []
+        locked = [0]
+        lock = threading.Lock()
+
+        def writer(number):
+            # isolation_level=None: transactions are issued explicitly, as Django does
+            conn = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None, check_same_thread=False)
+            for name, value in profile['pragmas'].items():
+                conn.execute(f'PRAGMA {name} = {value}')
+            for i in range(transactions):
+                started = time.perf_counter()
+                try:
+                    conn.execute(profile['begin'])
+                    conn.execute('SELECT COUNT(*) FROM enrollment WHERE section = ?', (i % 20,)).fetchone()
+                    conn.execute('INSERT INTO enrollment (section, student) VALUES (?, ?)', (i % 20, number))
+                    conn.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    with lock:
+                        locked[0] += 1
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            conn.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    latencies.sort()
+    return {
+        'commits': len(latencies),
+        'locked': locked[0],
+        'elapsed': elapsed,
+        'rate': len(latencies) / elapsed if elapsed else 0,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0,
+    }
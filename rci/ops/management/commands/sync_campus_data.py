@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rci import campus
+
+
+class Command(BaseCommand):
+    help = 'Copy reference data (programs, curricula, subjects, terms) and campus users into the campus shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campus', action='append',
+                            help='Only sync these campuses (repeatable); default is every shard')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows copied per query')
+
+    def handle(self, *args, **options):
+        if not campus.enabled():
+            raise CommandError('No campus shards configured; set CAMPUS_SHARDS first.')
+
+        codes = options['campus'] or [code for code, db in campus.campuses().items() if db != 'default']
+        for code in codes:
+            if code not in campus.campuses():
+                raise CommandError(f"Unknown campus '{code}'.")
+            db = campus.alias_for(code)
+            if db == 'default':
+                raise CommandError(f"'{code}' is the default campus; it needs no copy.")
+
+            self.stdout.write(f'🏫 Syncing {code} ({db})')
+            started = time.perf_counter()
+            counts = campus.sync(db, batch_size=options['batch_size'])
+            for label, rows in counts.items():
+                self.stdout.write(f'  • {label}: {rows} rows')
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {code} synced: {sum(counts.values())} rows in {time.perf_counter() - started:.2f}s'
+            ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatabaseStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('database', models.CharField(help_text="Database alias, e.g. 'default' or 'audit'", max_length=50)),
+                ('kind', models.CharField(choices=[('database', 'Database'), ('table', 'Table'), ('index', 'Index')], max_length=10)),
+                ('name', models.CharField(max_length=200)),
+                ('table_name', models.CharField(blank=True, help_text='Table an index belongs to', max_length=200)),
+                ('row_count', models.BigIntegerField(blank=True, help_text='Tables only', null=True)),
+                ('page_count', models.BigIntegerField()),
+                ('size_bytes', models.BigIntegerField()),
+                ('unused_bytes', models.BigIntegerField(default=0, help_text='Free space inside the pages; for a database, the pages on the freelist')),
+                ('fragmentation', models.FloatField(default=0, help_text='Percent of leaf pages not stored right after the previous leaf of the same b-tree')),
+                ('recorded_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'database_stats',
+                'ordering': ['-recorded_at', 'database', 'kind', 'name'],
+                'indexes': [models.Index(fields=['database', 'name', 'recorded_at'], name='database_st_databas_954e2f_idx')],
+            },
+        ),
+    ]
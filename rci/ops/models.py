@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class DatabaseStat(models.Model):
+    """Size of one database, table or index at one maintenance run (see ops/maintenance.py)"""
+    KIND_DATABASE = 'database'
+    KIND_CHOICES = [
+        ('database', 'Database'),
+        ('table', 'Table'),
+        ('index', 'Index'),
+    ]
+
+    database = models.CharField(max_length=50, help_text="Database alias, e.g. 'default' or 'audit'")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=200)
+    table_name = models.CharField(max_length=200, blank=True, help_text='Table an index belongs to')
+    row_count = models.BigIntegerField(null=True, blank=True, help_text='Tables only')
+    page_count = models.BigIntegerField()
+    size_bytes = models.BigIntegerField()
+    unused_bytes = models.BigIntegerField(
+        default=0,
+        help_text='Free space inside the pages; for a database, the pages on the freelist'
+    )
+    fragmentation = models.FloatField(
+        default=0,
+        help_text='Percent of leaf pages not stored right after the previous leaf of the same b-tree'
+    )
+    recorded_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'database_stats'
+        ordering = ['-recorded_at', 'database', 'kind', 'name']
+        indexes = [
+            # Growth of one table over time
+            models.Index(fields=['database', 'name', 'recorded_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.database}.{self.name} @ {self.recorded_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,182 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from academics.models import Program
+from audit.models import AuditTrail
+from ops import backup
+from rci import campus, writer
+from rci.query_budget import Budget, QueryBudgetTestCase
+from settingsapp.models import Setting
+from users.models import User
+
+
+def admin_budgets():
+    """The admin index and every registered model's changelist"""
+    return [Budget('admin:index', 5, role='admin')] + [
+        Budget(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist', 11, role='admin')
+        for model in admin.site._registry
+    ]
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(admin_budgets())
+
+
+class BackupTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.enterContext(override_settings(BACKUP_DIR=os.path.join(self.directory, 'backups')))
+        self.source = os.path.join(self.directory, 'live.sqlite3')
+        conn = sqlite3.connect(self.source)
+        conn.execute('PRAGMA journal_mode=wal')
+        conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, body TEXT)')
+        conn.executemany('INSERT INTO item (body) VALUES (?)', [('x' * 500,)] * 2000)
+        conn.commit()
+        conn.close()
+        self.enterContext(mock.patch.dict(settings.DATABASES, {'scratch': {'NAME': self.source}}))
+
+    def restored_count(self, path):
+        copy_path = os.path.join(self.directory, 'restored.sqlite3')
+        with gzip.open(path, 'rb') as src, open(copy_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        conn = sqlite3.connect(copy_path)
+        try:
+            self.assertEqual(conn.execute('PRAGMA integrity_check').fetchone()[0], 'ok')
+            return conn.execute('SELECT COUNT(*) FROM item').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_copy_is_one_snapshot_while_writers_commit(self):
+        writer = sqlite3.connect(self.source, isolation_level=None)
+        self.addCleanup(writer.close)
+
+        def write_between_steps(done, total):
+            writer.execute("INSERT INTO item (body) VALUES ('during the copy')")
+
+        result = backup.backup('scratch', pages=8, sleep=0, progress=write_between_steps)
+
+        self.assertGreater(result['pages'], 8)
+        self.assertTrue(result['path'].endswith(backup.SUFFIX))
+        # The rows committed during the copy are not in it, and the copy is sound
+        self.assertEqual(self.restored_count(result['path']), 2000)
+        self.assertGreater(writer.execute('SELECT COUNT(*) FROM item').fetchone()[0], 2000)
+
+    def test_failed_integrity_check_keeps_nothing(self):
+        with mock.patch.object(backup, 'integrity_errors', return_value=['page 3: btree corrupt']):
+            with self.assertRaisesMessage(backup.BackupFailed, 'btree corrupt'):
+                backup.backup('scratch', sleep=0)
+        self.assertEqual(os.listdir(backup.backup_dir()), [])
+
+    def test_backups_in_the_same_instant_do_not_collide(self):
+        now = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            paths = [backup.backup('scratch', sleep=0)['path'] for _ in range(2)]
+
+        self.assertNotEqual(paths[0], paths[1])
+        # Oldest first, as rotation expects
+        self.assertEqual(backup.backups('scratch'), paths)
+        for path in paths:
+            self.assertEqual(self.restored_count(path), 2000)
+
+    def test_rotation_keeps_the_newest_backups_per_database(self):
+        os.makedirs(backup.backup_dir())
+        names = [
+            'scratch-20250101-010000.sqlite3.gz', 'scratch-20250102-010000.sqlite3.gz',
+            'scratch-20250103-010000.sqlite3.gz', 'scratch2-20250101-010000.sqlite3.gz',
+        ]
+        for name in names:
+            open(os.path.join(backup.backup_dir(), name), 'wb').close()
+
+        removed = backup.rotate('scratch', keep=2)
+
+        self.assertEqual([os.path.basename(path) for path in removed], names[:1])
+        self.assertEqual(sorted(os.listdir(backup.backup_dir())), names[1:])
+        self.assertEqual(backup.rotate('scratch', keep=0), [])
+
+
+class WriterTests(TestCase):
+    databases = '__all__'
+
+    def commit(self, *units):
+        jobs = [writer._Job(unit, (), {}) for unit in units]
+        writer.Writer('default', max_batch=32, window=0).commit(jobs)
+        self.assertTrue(all(job.done.is_set() for job in jobs))
+        return jobs
+
+    def test_a_failed_unit_rolls_back_on_every_database_it_wrote(self):
+        def cross_database():
+            Setting.objects.create(key_name='half_written', value_text='1')
+            AuditTrail.objects.create(action='update', entity='Setting', entity_id=1)
+            raise ValueError('second half failed')
+
+        # As for a @writes_main unit on a campus shard
+        with mock.patch.object(writer, 'write_aliases', return_value=['default', 'audit']):
+            failed, kept = self.commit(
+                cross_database, lambda: Setting.objects.create(key_name='kept', value_text='1'),
+            )
+
+        self.assertIsInstance(failed.error, ValueError)
+        self.assertIsNone(kept.error)
+        self.assertFalse(Setting.objects.filter(key_name='half_written').exists())
+        self.assertFalse(AuditTrail.objects.filter(entity='Setting').exists())
+        self.assertTrue(Setting.objects.filter(key_name='kept').exists())
+
+    def test_only_marked_units_open_the_main_database_on_a_shard(self):
+        def shard_only():
+            pass
+
+        @writer.writes_main
+        def creates_account():
+            pass
+
+        self.assertEqual(writer.write_aliases('campus_north', [shard_only]), ['campus_north'])
+        self.assertEqual(writer.write_aliases('campus_north', [shard_only, creates_account]),
+                         ['campus_north', 'default'])
+        self.assertEqual(writer.write_aliases('default', [creates_account]), ['default'])
+
+    def test_base_exceptions_go_back_to_the_caller(self):
+        def interrupted():
+            raise KeyboardInterrupt
+
+        failed, kept = self.commit(interrupted, lambda: 'done')
+        self.assertIsInstance(failed.error, KeyboardInterrupt)
+        self.assertEqual(kept.result, 'done')
+
+
+class CampusTests(TestCase):
+    databases = '__all__'
+
+    def test_fan_out_runs_every_campus_with_it_current(self):
+        self.assertEqual(campus.fan_out(campus.current), {code: code for code in campus.campuses()})
+        self.assertEqual(campus.fan_out(lambda n: n + 1, 1, codes=[campus.default_campus()]),
+                         {campus.default_campus(): 2})
+
+    @unittest.skipUnless(campus.shard_aliases(), 'needs CAMPUS_SHARDS')
+    def test_sync_repairs_a_shard_that_missed_changes(self):
+        code, db = next((code, db) for code, db in campus.campuses().items() if db != 'default')
+        kept = Program.objects.create(name='BS Nursing', level='college')
+        missed = Program.objects.create(name='BS Biology', level='college')
+        Program.objects.using(db).filter(pk=missed.pk).delete()
+        Program.objects.using(db).create(pk=10 ** 6, name='Closed program', level='college')
+        User.objects.create(username='shard.user', campus=code)
+        User.objects.create(username='elsewhere.user', campus=campus.default_campus())
+
+        # batch_size=1: every row goes through its own batch
+        counts = campus.sync(db, batch_size=1)
+
+        self.assertEqual(set(Program.objects.using(db).values_list('pk', flat=True)), {kept.pk, missed.pk})
+        self.assertEqual(counts['academics.program'], 2)
+        self.assertEqual(list(User.objects.using(db).values_list('username', flat=True)), ['shard.user'])
@@ -0,0 +1,310 @@
+"""
+Per-campus database shards (CAMPUS_SHARDS).
+
+Each campus keeps its Student, Section, StudentSubject and Grade rows (and the
+audit outbox written alongside them) in its own database, so one campus's
+enrollment rush never waits on another campus's write lock. The default
+campus stays in the "default" database; every other campus gets a
+"campus_<code>" alias.
+
+- The campus comes from the signed-in user (User.campus, blank = the default
+  campus); CampusMiddleware makes it current for the request and
+  `using(code)` does the same for commands and background work.
+- CampusRouter sends campus data to the current campus's database.
+- Reference data (programs, curricula, subjects, prerequisites, terms) is
+  written in the default database and copied into every shard on save, so
+  joins inside a shard still work. A user's row is copied into their own
+  campus's shard. `manage.py sync_campus_data` re-copies everything.
+- `fan_out()` runs a function once per campus in parallel threads and
+  returns the results per campus, for registrar reports that span campuses.
+
+Setting up a campus: add it to CAMPUS_SHARDS, run
+`migrate --database campus_<code>`, then `sync_campus_data`.
+
+A write that spans the default database and a shard (creating a student's
+account and profile) is two transactions; the default database commits
+first and the shard last, so an interruption can leave an account without
+its campus rows but never campus rows without their account (see
+rci/writer.py).
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+# Stored per campus
+SHARDED_MODELS = {
+    'enrollment.student',
+    'enrollment.section',
+    'enrollment.studentsubject',
+    'grades.grade',
+    'audit.auditoutbox',
+}
+
+# Written in the default database and copied into every shard, parents first
+REFERENCE_MODELS = [
+    'academics.program',
+    'academics.curriculum',
+    'academics.subject',
+    'academics.prereq',
+    'academics.curriculumsubject',
+    'enrollment.term',
+]
+
+# Upper bound on parallel shard queries in fan_out()
+MAX_WORKERS = 8
+
+_current = contextvars.ContextVar('campus', default='')
+
+
+def campuses():
+    """{campus code: database alias}, the default campus first"""
+    return getattr(settings, 'CAMPUS_DATABASES', None) or {default_campus(): 'default'}
+
+
+def default_campus():
+    return getattr(settings, 'DEFAULT_CAMPUS', 'main')
+
+
+def enabled():
+    return len(campuses()) > 1
+
+
+def current():
+    return _current.get() or default_campus()
+
+
+def alias_for(code):
+    """Database alias of a campus (blank = the default campus); unknown campuses raise KeyError"""
+    return campuses()[code or default_campus()]
+
+
+def alias():
+    return alias_for(current())
+
+
+@contextmanager
+def using(code):
+    """Make `code` the current campus inside the block"""
+    token = _current.set(code or default_campus())
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def user_campus():
+    """User.campus for an account created now: the current campus, blank for the default one"""
+    return '' if current() == default_campus() else current()
+
+
+def for_user(user):
+    """Campus code of a user; blank or unknown campuses fall back to the default campus"""
+    code = getattr(user, 'campus', '') or default_campus()
+    return code if code in campuses() else default_campus()
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _user_label():
+    return settings.AUTH_USER_MODEL.lower()
+
+
+class CampusMiddleware:
+    """Make the signed-in user's campus current for the request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled():
+            return self.get_response(request)
+        user = request.user
+        with using(for_user(user) if user.is_authenticated else default_campus()):
+            return self.get_response(request)
+
+
+class CampusRouter:
+    """
+    Campus data goes to the current campus's shard. On the default campus (or
+    with a single campus) the decision is left to the next router, so the
+    read replica still serves it.
+    """
+
+    def _shard(self, model, hints):
+        if not enabled() or _label(model) not in SHARDED_MODELS:
+            return None
+        instance = hints.get('instance')
+        # A loaded row stays in the database it came from (assigning a foreign key
+        # passes the related object instead, e.g. a user from the default database)
+        if isinstance(instance, model) and instance._state.db in campuses().values():
+            db = instance._state.db
+        else:
+            db = alias()
+        return None if db == 'default' else db
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Shards hold copies of the reference rows and users their campus data points at
+        shared = SHARDED_MODELS.union(REFERENCE_MODELS, {_user_label()})
+        if _label(obj1) in shared and _label(obj2) in shared:
+            return True
+        return None
+
+
+# ==================== REFERENCE DATA ====================
+
+def _copies(model, objs):
+    # Fresh instances, so the caller's objects keep pointing at the default database
+    fields = model._meta.concrete_fields
+    return [model(**{field.attname: getattr(obj, field.attname) for field in fields}) for obj in objs]
+
+
+def upsert(model, objs, db):
+    """Insert or overwrite rows by primary key in another database (no signals are sent)"""
+    objs = list(objs)
+    if not objs:
+        return 0
+    model.objects.using(db).bulk_create(
+        _copies(model, objs),
+        update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=[field.name for field in model._meta.concrete_fields if not field.primary_key],
+    )
+    return len(objs)
+
+
+def shard_aliases():
+    return [db for db in campuses().values() if db != 'default']
+
+
+def replicate_users(users):
+    """Copy users into their own campus's shard (needed before campus rows point at them)"""
+    if not enabled():
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    by_alias = {}
+    for user in users:
+        db = alias_for(for_user(user))
+        if db != 'default':
+            by_alias.setdefault(db, []).append(user)
+    for db, rows in by_alias.items():
+        upsert(User, rows, db)
+
+
+def _replicate(sender, instance, using, raw=False, **kwargs):
+    if raw or using != 'default' or not enabled():
+        return
+    if _label(sender) == _user_label():
+        replicate_users([instance])
+        return
+    for db in shard_aliases():
+        upsert(sender, [instance], db)
+
+
+def _unreplicate(sender, instance, using, **kwargs):
+    if using != 'default' or not enabled():
+        return
+    for db in shard_aliases():
+        try:
+            # Through the ORM, so the shard's own rows cascade the same way the default database's did
+            sender.objects.using(db).filter(pk=instance.pk).delete()
+        except Exception:
+            logger.exception('Could not delete %s #%s from %s; run sync_campus_data', _label(sender), instance.pk, db)
+
+
+def connect():
+    """Copy reference data and users into the shards whenever they change (called from OpsConfig.ready)"""
+    for label in REFERENCE_MODELS + [_user_label()]:
+        model = apps.get_model(label)
+        uid = f'campus:{label}'
+        post_save.connect(_replicate, sender=model, dispatch_uid=uid)
+        # Users stay in a shard once copied: campus rows there may still point at them
+        if label != _user_label():
+            post_delete.connect(_unreplicate, sender=model, dispatch_uid=uid)
+
+
+def sync(db, batch_size=2000):
+    """Re-copy all reference data and the campus's users into one shard; returns {model label: rows}"""
+    code = next(code for code, shard in campuses().items() if shard == db)
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    users = User.objects.using('default').filter(campus=code)
+    counts = {}
+    with transaction.atomic(using=db):
+        for label in REFERENCE_MODELS + [_user_label()]:
+            model = apps.get_model(label)
+            source = users if model is User else model.objects.using('default')
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(source.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+                if not batch:
+                    break
+                total += upsert(model, batch, db)
+                last_pk = batch[-1].pk
+            if model is not User:
+                _delete_stale(model, source, db, batch_size)
+            counts[label] = total
+    return counts
+
+
+def _delete_stale(model, source, db, batch_size):
+    """Delete shard rows deleted from the default database while the shard was not listening"""
+    # A batch of shard keys at a time, so no IN list outgrows SQLite's bound-variable limit
+    shard_pks = model.objects.using(db).order_by('pk').values_list('pk', flat=True)
+    last_pk = 0
+    while True:
+        pks = list(shard_pks.filter(pk__gt=last_pk)[:batch_size])
+        if not pks:
+            break
+        live = set(source.filter(pk__in=pks).values_list('pk', flat=True))
+        stale = [pk for pk in pks if pk not in live]
+        if stale:
+            model.objects.using(db).filter(pk__in=stale).delete()
+        last_pk = pks[-1]
+
+
+# ==================== FAN-OUT ====================
+
+def fan_out(func, *args, codes=None):
+    """
+    Run `func(*args)` once per campus, each with that campus current, in parallel
+    threads (each with its own connections). Returns {campus code: result}.
+    Inside a transaction the campuses run in the calling thread instead.
+    """
+    codes = list(codes or campuses())
+    # Inside a transaction (a test case, an atomic request) other threads would not see its
+    # uncommitted rows and could wait on its locks: run the campuses one after another here
+    if len(codes) == 1 or any(connections[db].in_atomic_block for db in campuses().values()):
+        results = {}
+        for code in codes:
+            with using(code):
+                results[code] = func(*args)
+        return results
+
+    def run(code):
+        with using(code):
+            try:
+                return func(*args)
+            finally:
+                # Worker threads don't outlive the pool; don't leave their connections open
+                connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=min(len(codes), MAX_WORKERS)) as pool:
+        # Each worker runs in a copy of the caller's context (replica flags, etc.)
+        futures = {code: pool.submit(contextvars.copy_context().run, run, code) for code in codes}
+        return {code: future.result() for code, future in futures.items()}
@@ -0,0 +1,50 @@
+"""
+Small helpers shared by the SQLite FTS5 search indexes.
+
+Each index is an FTS5 virtual table whose rowid is the primary key of the
+row it mirrors, so updates and deletes are rowid lookups instead of scans.
+On databases without FTS5 the callers fall back to plain `icontains` filters.
+"""
+import re
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_available(connection):
+    """True when the connection is SQLite with the FTS5 extension compiled in"""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def table_exists(connection, table):
+    return table in connection.introspection.table_names()
+
+
+def match_expression(text):
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression.
+    Every word becomes a quoted prefix term, and all terms must match.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def flatten_json(value):
+    """Collect every scalar value inside a JSON document into one space-separated string"""
+    parts = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for item in node.values():
+                walk(item)
+        elif isinstance(node, (list, tuple)):
+            for item in node:
+                walk(item)
+        elif node is not None:
+            parts.append(str(node))
+
+    walk(value)
+    return ' '.join(parts)
@@ -0,0 +1,228 @@
+"""
+Keyset ("seek") pagination for the staff list pages.
+
+Pages are addressed by an opaque cursor holding the sort values of the last
+row shown, and the next page is `WHERE (sort_key, id) < cursor ORDER BY
+sort_key, id LIMIT n`. With an index on (sort_key, id) every page is an index
+seek, so page 500 costs the same as page 1 (OFFSET would scan every skipped
+row). The ordering must end with a unique field, normally `id`, so ties in
+the sort key still have a stable order.
+
+Cursors come from the query string, so their values are checked against the
+ordering fields (a tampered or stale cursor shows the first page).
+
+Totals are cached per filter combination. Models registered with `track()`
+rewrite a per-model version file (like the settings snapshot) when a save or
+delete commits; the count keys carry the file's stat() signature, so every
+process retires its cached counts. Writes that skip signals (bulk_create,
+update) call `retire()` themselves, or are covered by the timeout.
+
+HTMX requests for a later page (the "revealed" sentinel row rendered by
+components/load_more.html) get only the rows partial, giving infinite scroll
+with a plain "Load more" link as the no-JS fallback.
+"""
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from settingsapp.snapshot import VersionFile
+
+DEFAULT_PER_PAGE = 50
+CURSOR_PARAM = 'cursor'
+COUNT_CACHE_TIMEOUT = 300
+
+
+class Page:
+    """One page of rows plus what the templates need to fetch the next one"""
+
+    def __init__(self, request, items, total, next_cursor):
+        self.items = items
+        self.total = total
+        self.next_cursor = next_cursor
+        self.is_first = not request.GET.get(CURSOR_PARAM)
+        self.next_url = _url_with_cursor(request, next_cursor) if next_cursor else ''
+
+    @property
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def wants_rows(request):
+    """True for an HTMX request for a later page, which only needs the table rows"""
+    return request.headers.get('HX-Request') == 'true' and bool(request.GET.get(CURSOR_PARAM))
+
+
+def _url_with_cursor(request, cursor):
+    # Keep every filter in the query string, replacing only the cursor
+    params = request.GET.copy()
+    params[CURSOR_PARAM] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _encode_value(value):
+    # isoformat keeps microseconds, which the keyset comparison needs exactly
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, length=None):
+    """The values in a cursor, or None if it is missing or malformed (the first page is shown)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        return None
+    return values
+
+
+def _ordering_field(model, path):
+    """The model field at the end of an ordering path such as 'user__last_name'"""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    # 'user' orders by the related primary key
+    return field.target_field if field.is_relation else field
+
+
+def _coerce(model, ordering, values):
+    """Cursor values as the ordering fields' Python types, or None if any does not fit"""
+    coerced = []
+    for name, value in zip(ordering, values):
+        if value is None or isinstance(value, (list, dict)):
+            return None
+        try:
+            coerced.append(_ordering_field(model, name.lstrip('-')).to_python(value))
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            return None
+    return coerced
+
+
+def _field_value(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _after(ordering, values):
+    """Filter for rows that sort after `values` under `ordering`"""
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    condition = Q()
+    # Expand (a, b, c) > (x, y, z) into a > x OR (a = x AND b > y) OR ...
+    for position, (name, descending) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+        for earlier, (earlier_name, _) in enumerate(fields[:position]):
+            step &= Q(**{earlier_name: values[earlier]})
+        condition |= step
+    # A plain range bound on the leading key lets SQLite seek its index before the OR
+    leading, descending = fields[0]
+    return Q(**{f"{leading}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+
+def _version_file(model):
+    return VersionFile(os.path.join(settings.PAGINATION_VERSION_DIR, model._meta.label_lower))
+
+
+def _generation(model):
+    return _version_file(model).signature()
+
+
+def retire(*models, using=None):
+    """Retire cached counts of these models once the transaction on `using` commits (for bulk writes)"""
+    for model in models:
+        # After the commit, so a count taken meanwhile is not cached under the new version
+        transaction.on_commit(_version_file(model).bump, using=using)
+
+
+def _bump_generation(sender, using=None, **kwargs):
+    retire(sender, using=using)
+
+
+def track(*models):
+    """Retire cached counts of these models whenever one of their rows is saved or deleted"""
+    for model in models:
+        uid = f'pagination:{model._meta.label_lower}'
+        post_save.connect(_bump_generation, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_generation, sender=model, dispatch_uid=uid)
+
+
+def cached_count(queryset):
+    """queryset.count(), cached per distinct query until the model changes"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    # The same query counts different rows in each campus database; the version
+    # signature is hashed in too, since stat tuples are not safe in every cache backend.
+    # Read before counting: a change committed during the count leaves it under the retired version
+    generation = _generation(queryset.model)
+    digest = hashlib.md5(f'{generation}|{queryset.db}|{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    key = f'pagination:count:{queryset.model._meta.label_lower}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, COUNT_CACHE_TIMEOUT)
+    return total
+
+
+def paginate(request, queryset, ordering, per_page=DEFAULT_PER_PAGE):
+    """
+    The page of `queryset` after the request's cursor, sorted by `ordering`
+    (field names, '-' for descending, ending with a unique field such as 'id').
+    """
+    ordering = list(ordering)
+    total = cached_count(queryset)
+    values = decode_cursor(request.GET.get(CURSOR_PARAM), len(ordering))
+    if values is not None:
+        values = _coerce(queryset.model, ordering, values)
+    rows = queryset.order_by(*ordering)
+    if values is not None:
+        rows = rows.filter(_after(ordering, values))
+
+    items = list(rows[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([_field_value(last, name.lstrip('-')) for name in ordering])
+    return Page(request, items, total, next_cursor)
+
+
+def paginate_ids(request, queryset, ids, per_page=DEFAULT_PER_PAGE):
+    """
+    Page through an already ranked list of primary keys (search results), keeping its order.
+    The cursor is the position in `ids`, which is stable for one search.
+    """
+    values = decode_cursor(request.GET.get(CURSOR_PARAM), 1)
+    start = values[0] if values and isinstance(values[0], int) and values[0] >= 0 else 0
+    chunk = ids[start:start + per_page]
+    position = {pk: index for index, pk in enumerate(chunk)}
+    items = sorted(queryset.filter(pk__in=chunk), key=lambda obj: position[obj.pk])
+    next_cursor = encode_cursor([start + per_page]) if start + per_page < len(ids) else None
+    return Page(request, items, len(ids), next_cursor)
@@ -0,0 +1,327 @@
+"""
+Query-count budgets for the views (the performance regression suite).
+
+Each app's tests.py lists its URLs as `Budget`s: who requests the page and the
+most queries one request may run. `QueryBudgetTestCase.assertBudgets()` seeds
+a `Fixture` with N students, subjects, sections, applications and audit rows,
+requests every URL, grows the fixture to 10N and requests them again. A view
+fails when it runs more queries than its ceiling, or when its count grows
+with the data (an N+1 query). Ceilings are for a single campus; reports that
+fan out over campus shards declare how many queries each extra campus adds.
+
+Queries are counted on every database (main, audit, campus shards). Each
+request runs with cold caches inside a savepoint that is rolled back, so POST
+views can be measured more than once. With TEST_RUNNER set to
+`QueryBudgetRunner`, `manage.py test` ends with a list of the worst offenders.
+"""
+import sys
+import tempfile
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+
+from rci import campus
+
+# Rows of each kind in the small fixture; the large one has ten times as many
+N = 5
+
+ROLES = ['student', 'professor', 'registrar', 'dean', 'admission', 'admin']
+
+# {label: (queries at N, queries at 10N, ceiling)} for the end-of-run report
+RESULTS = {}
+
+
+class Budget:
+    """Most queries one request to a named URL may run"""
+
+    def __init__(self, name, max_queries, role=None, args=None, method='get', data=None, status=200, label=None,
+                 per_campus=0):
+        self.name = name
+        # For one campus; views that fan out over campuses may run `per_campus` more for each extra one
+        self.max_queries = max_queries
+        self.per_campus = per_campus
+        # Fixture user making the request (None = anonymous)
+        self.role = role
+        # fixture -> URL arguments / POST data
+        self.args = args
+        self.data = data
+        self.method = method
+        self.status = status
+        self.label = label or (f'{name} ({role})' if role else name)
+
+    def ceiling(self):
+        return self.max_queries + self.per_campus * (len(campus.campuses()) - 1)
+
+    def path(self, fixture):
+        return reverse(self.name, args=self.args(fixture) if self.args else None)
+
+
+class Fixture:
+    """
+    A program with one user per role, a student with a transcript, and
+    grow(count) adding `count` of everything: subjects (each requiring the
+    previous one), sections in the active and past term, students with
+    enrollments and grades, applications with credits, audit and archive rows.
+    """
+
+    def __init__(self):
+        from academics.models import Curriculum, Program, Subject
+        from documents import storage
+        from enrollment.models import Section, Student, Term
+        from settingsapp.models import Setting
+        from settingsapp.registry import REGISTRY
+        from users.models import User
+
+        today = timezone.localdate()
+        self.size = 0
+        self.program = Program.objects.create(name='BS Computer Science', level='college')
+        self.curriculum = Curriculum.objects.create(program=self.program, version='Rev 1', effective_sy='AY 2025-2026')
+        self.term = Term.objects.create(
+            name='1st Semester', start_date=today - timedelta(days=30), end_date=today + timedelta(days=120),
+            add_drop_deadline=today + timedelta(days=30), grade_encoding_deadline=today + timedelta(days=150),
+            is_active=True,
+        )
+        self.past_term = Term.objects.create(
+            name='2nd Semester (previous year)', start_date=today - timedelta(days=240),
+            end_date=today - timedelta(days=60), grade_encoding_deadline=today - timedelta(days=40),
+        )
+        self.users = {
+            role: User.objects.create(
+                username=f'budget_{role}', role=role, first_name=role.title(), last_name='Budget',
+                is_staff=role == 'admin', is_superuser=role == 'admin',
+            )
+            for role in ROLES
+        }
+        self.professor = self.users['professor']
+        # Every registered setting at its default (bulk_create: no version file bump)
+        Setting.objects.bulk_create(
+            Setting(key_name=spec.key, value_text=spec.format(spec.default), description=spec.description)
+            for spec in REGISTRY.values()
+        )
+
+        # A subject with no prerequisites the student can still enroll in
+        self.open_subject = Subject.objects.create(program=self.program, code='GE100', title='Open Elective', units=3)
+        self.open_section = Section.objects.create(
+            subject=self.open_subject, term=self.term, professor=self.professor, section_code='GE100-A',
+        )
+
+        self.document = storage.store(
+            SimpleUploadedFile('tor.pdf', b'%PDF-1.4 query budget', content_type='application/pdf')
+        )
+        documents = {'tor': storage.entry(self.document, 'tor.pdf')}
+        self.student = Student.objects.create(
+            user=self.users['student'], program=self.program, curriculum=self.curriculum, documents_json=documents,
+        )
+        self.application = self._application('Student', 'freshman', self.users['student'], documents)
+        # Not processed yet: no account
+        self.pending_application = self._application('Pending', 'freshman', None)
+        self.previous_subject = None
+        self.enrollments = []
+        self.student_enrollments = []
+
+    def _application(self, last_name, applicant_type, user, documents=None):
+        from admission.models import AdmissionApplication
+
+        return AdmissionApplication.objects.create(
+            first_name='Applicant', last_name=last_name, email=f'{last_name.lower()}@example.com',
+            phone='09170000000', address='Manila', birth_date=timezone.localdate() - timedelta(days=18 * 365),
+            applicant_type=applicant_type, program=self.program, generated_user=user,
+            needs_registrar_review=applicant_type == 'transferee', documents_json=documents or {},
+        )
+
+    def grow(self, count):
+        from academics.models import CurriculumSubject, Prereq, Subject
+        from admission.models import TransfereeCredit
+        from audit.models import Archive, AuditTrail
+        from enrollment.models import Section, Student, StudentSubject
+        from grades.models import Grade
+        from users.models import User
+
+        registrar = self.users['registrar']
+        for _ in range(count):
+            self.size += 1
+            n = self.size
+            # Odd subjects are one-unit labs, so the fixture student stays a first year at any size
+            subject = Subject.objects.create(
+                program=self.program, code=f'CS{n:03d}', title=f'Computing {n}', units=1 if n % 2 else 3,
+                type='major' if n % 2 else 'minor', recommended_year=1, recommended_sem=1,
+            )
+            if self.previous_subject:
+                Prereq.objects.create(subject=subject, prereq_subject=self.previous_subject)
+            self.previous_subject = subject
+            CurriculumSubject.objects.create(curriculum=self.curriculum, subject=subject, year_level=1, term_no=1)
+            section = Section.objects.create(
+                subject=subject, term=self.term, professor=self.professor, section_code=f'CS{n:03d}-A',
+            )
+            past_section = Section.objects.create(
+                subject=subject, term=self.past_term, professor=self.professor, section_code=f'CS{n:03d}-P',
+            )
+
+            # The fixture student passed the odd subjects, so every even one is open to them
+            # (its prerequisite is passed) and every odd one past the first is blocked; they
+            # carry CS002 this term
+            if n % 2:
+                completed = StudentSubject.objects.create(
+                    student=self.student, subject=subject, term=self.past_term, section=past_section,
+                    professor=self.professor, status='completed',
+                )
+                Grade.objects.create(
+                    student_subject=completed, subject=subject, professor=self.professor, grade='1.75',
+                )
+            elif n == 2:
+                self.student_enrollments.append(StudentSubject.objects.create(
+                    student=self.student, subject=subject, term=self.term, section=section,
+                    professor=self.professor,
+                ))
+
+            user = User.objects.create(username=f'budget_student{n}', first_name='Student', last_name=f'Number{n}')
+            student = Student.objects.create(user=user, program=self.program, curriculum=self.curriculum)
+            self.enrollments.append(StudentSubject.objects.create(
+                student=student, subject=subject, term=self.term, section=section, professor=self.professor,
+            ))
+            past = StudentSubject.objects.create(
+                student=student, subject=subject, term=self.past_term, section=past_section,
+                professor=self.professor, status='inc' if n % 5 == 0 else 'completed',
+            )
+            Grade.objects.create(
+                student_subject=past, subject=subject, professor=self.professor,
+                grade='INC' if n % 5 == 0 else '2.25', inc_posted_date=self.past_term.end_date,
+            )
+
+            application = self._application(f'Number{n}', 'transferee' if n % 2 else 'freshman', user)
+            if application.applicant_type == 'transferee':
+                TransfereeCredit.objects.create(
+                    application=application, subject_code=f'X{n}', subject_title=f'Computing {n}', units=3,
+                    grade='1.50', subject=subject, credited_by=registrar,
+                )
+
+            AuditTrail.objects.create(
+                actor=registrar, action='update_grade', entity='Grade', entity_id=n, notes=f'Updated grade {n}',
+            )
+            Archive.objects.create(
+                entity='Section', entity_id=n, data_snapshot={'id': n}, reason='Term Closed', archived_by=registrar,
+            )
+        return self
+
+
+@contextmanager
+def _counting(aliases):
+    """Capture the queries of every database, inside savepoints that are rolled back"""
+    with ExitStack() as stack:
+        captures = []
+        for alias in aliases:
+            stack.enter_context(transaction.atomic(using=alias))
+            captures.append(stack.enter_context(CaptureQueriesContext(connections[alias])))
+        queries = []
+        try:
+            yield queries
+        finally:
+            for capture in captures:
+                queries.extend(capture.captured_queries)
+            for alias in aliases:
+                transaction.set_rollback(True, using=alias)
+
+
+def _summary(queries, width=160):
+    """Statements grouped by their leading text, most repeated first (an N+1 shows up on top)"""
+    counts = Counter(query['sql'][:width] for query in queries)
+    return '\n'.join(f'  {count:>4}× {sql}' for sql, count in counts.most_common())
+
+
+def url_names(urlconf):
+    """Names of the URL patterns a URLconf declares itself (includes are covered by their own app)"""
+    resolver = get_resolver(urlconf)
+    namespace = getattr(resolver.urlconf_module, 'app_name', None)
+    prefix = f'{namespace}:' if namespace else ''
+    return {
+        prefix + pattern.name for pattern in resolver.url_patterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    }
+
+
+class QueryBudgetTestCase(TestCase):
+    """Base class for the per-app query budget tests"""
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Uploaded documents go to a scratch directory
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.enterClassContext(override_settings(DOCUMENT_STORAGE_DIR=directory.name))
+
+    def measure(self, budget, fixture):
+        """Queries one request runs, with cold caches and every write rolled back"""
+        from settingsapp.snapshot import site_settings
+
+        client = Client()
+        if budget.role:
+            client.force_login(fixture.users[budget.role])
+        cache.clear()
+        # Loaded once per process, not per request
+        site_settings.clear()
+        site_settings.values()
+
+        path = budget.path(fixture)
+        data = budget.data(fixture) if budget.data else {}
+        with _counting(list(connections)) as queries:
+            response = getattr(client, budget.method)(path, data)
+        self.assertEqual(
+            response.status_code, budget.status,
+            f'{budget.method.upper()} {path} returned {response.status_code}',
+        )
+        return queries
+
+    def assertBudgets(self, budgets):
+        """Every budget holds at N and 10N rows, and no count grows with the data"""
+        fixture = Fixture().grow(N)
+        small = {budget.label: len(self.measure(budget, fixture)) for budget in budgets}
+        fixture.grow(9 * N)
+
+        for budget in budgets:
+            queries = self.measure(budget, fixture)
+            RESULTS[budget.label] = (small[budget.label], len(queries), budget.ceiling())
+            with self.subTest(budget.label):
+                statements = _summary(queries)
+                self.assertEqual(
+                    len(queries), small[budget.label],
+                    f'{budget.label}: {small[budget.label]} queries at {N} rows, '
+                    f'{len(queries)} at {10 * N} rows (N+1?):\n{statements}',
+                )
+                self.assertLessEqual(
+                    len(queries), budget.ceiling(),
+                    f'{budget.label}: {len(queries)} queries, budget {budget.ceiling()}:\n{statements}',
+                )
+
+    def assertCovers(self, budgets, urlconf):
+        """Every named URL of `urlconf` has a budget"""
+        missing = url_names(urlconf) - {budget.name for budget in budgets}
+        self.assertFalse(missing, f'URLs without a query budget: {", ".join(sorted(missing))}')
+
+
+class QueryBudgetRunner(DiscoverRunner):
+    """DiscoverRunner that ends with the views running the most queries"""
+    report_size = 10
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        if RESULTS:
+            # Growing counts first, then the most queries
+            worst = sorted(
+                RESULTS.items(), key=lambda item: (item[1][1] - item[1][0], item[1][1]), reverse=True
+            )[:self.report_size]
+            sys.stderr.write(f'\nQuery budgets, worst offenders (queries at {N} → {10 * N} rows / budget):\n')
+            for label, (small, large, budget) in worst:
+                flag = '  ⚠ grows' if large > small else ('  ⚠ over' if large > budget else '')
+                sys.stderr.write(f'  {large:>4} ({small} → {large}) / {budget:<4} {label}{flag}\n')
+        return result
@@ -0,0 +1,169 @@
+"""
+Read replica routing for the report and staff list pages.
+
+Views decorated with `@replica.reads` (and code inside `with
+replica.reading():`) read from the "replica" database alias; everything
+else, and every write, uses "default". Locally the replica is a SQLite copy
+of the primary refreshed with the backup API (`manage.py refresh_replica`),
+which stamps the copy with the time the snapshot was taken.
+
+Reads fall back to the primary when:
+- no replica is configured, or its stamp is missing or older than
+  REPLICA_MAX_LAG seconds;
+- the user wrote something the replica does not contain yet. Any unsafe
+  request, or a write during a request, sets a cookie holding the write time
+  for REPLICA_MAX_LAG seconds, and the replica is used again once its
+  snapshot is newer than that (read-your-writes);
+- the current request has itself written.
+Sessions are always read from the primary.
+"""
+import contextvars
+import functools
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+ALIAS = 'replica'
+HEARTBEAT_TABLE = 'rci_replica_heartbeat'
+WROTE_COOKIE = 'rci_wrote_at'
+# How often each process re-reads the replica's stamp
+CHECK_INTERVAL = 1.0
+
+# Never routed to the replica, whatever the view
+PRIMARY_ONLY_APPS = {'sessions'}
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+_reading = contextvars.ContextVar('replica_reading', default=False)
+_wrote = contextvars.ContextVar('replica_wrote', default=False)
+_wrote_at = contextvars.ContextVar('replica_wrote_at', default=0.0)
+
+_heartbeat = (0.0, None)  # (checked at, snapshot time)
+
+
+def max_lag():
+    return getattr(settings, 'REPLICA_MAX_LAG', 30)
+
+
+def configured():
+    return ALIAS in settings.DATABASES
+
+
+def snapshot_time():
+    """When the replica's data was taken from the primary (epoch seconds), or None if unknown"""
+    global _heartbeat
+    checked_at, taken_at = _heartbeat
+    now = time.time()
+    if now - checked_at < CHECK_INTERVAL:
+        return taken_at
+    try:
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(f'SELECT taken_at FROM {HEARTBEAT_TABLE} WHERE id = 1')
+            row = cursor.fetchone()
+        taken_at = row[0] if row else None
+    except DatabaseError:
+        # Not refreshed yet (no stamp table) or unreachable
+        taken_at = None
+    _heartbeat = (now, taken_at)
+    return taken_at
+
+
+def usable():
+    """True when reads in the current context may go to the replica"""
+    if not _reading.get() or _wrote.get() or not configured():
+        return False
+    taken_at = snapshot_time()
+    if taken_at is None or time.time() - taken_at > max_lag():
+        return False
+    # The user's last write must already be in the snapshot
+    return taken_at >= _wrote_at.get()
+
+
+@contextmanager
+def reading():
+    """Let reads inside the block use the replica when it is fresh enough"""
+    token = _reading.set(True)
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def reads(view_func):
+    """View decorator: the view only reads, so it may be served from the replica"""
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with reading():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send designated reads to the replica; everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return ALIAS if usable() else 'default'
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated on its own
+        return db != ALIAS
+
+
+class ReplicaMiddleware:
+    """Track each user's latest write so their own changes are read back from the primary"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            wrote_at = float(request.COOKIES.get(WROTE_COOKIE, 0))
+        except ValueError:
+            wrote_at = 0.0
+        tokens = (_wrote_at.set(wrote_at), _wrote.set(False))
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get() or request.method not in SAFE_METHODS
+        finally:
+            _wrote_at.reset(tokens[0])
+            _wrote.reset(tokens[1])
+        if wrote and configured():
+            # The write has committed by now. Pinned until a later snapshot, or until the replica would be too stale anyway
+            response.set_cookie(
+                WROTE_COOKIE, f'{time.time():.3f}', max_age=max_lag(), httponly=True, samesite='Lax'
+            )
+        return response
+
+
+def refresh(source='default', target=ALIAS):
+    """Copy the primary into the replica with the SQLite backup API and stamp the snapshot time"""
+    source_connection = connections[source]
+    source_connection.ensure_connection()
+    taken_at = time.time()
+    replica = sqlite3.connect(settings.DATABASES[target]['NAME'], timeout=30)
+    try:
+        # One step reads a single consistent snapshot; WAL lets the primary keep writing meanwhile
+        source_connection.connection.backup(replica)
+        replica.execute(
+            f'CREATE TABLE IF NOT EXISTS {HEARTBEAT_TABLE} '
+            '(id INTEGER PRIMARY KEY CHECK (id = 1), taken_at REAL NOT NULL)'
+        )
+        replica.execute(f'INSERT OR REPLACE INTO {HEARTBEAT_TABLE} (id, taken_at) VALUES (1, ?)', (taken_at,))
+        replica.commit()
+    finally:
+        replica.close()
+    return taken_at
@@ -27,10 +27,13 @@ INSTALLED_APPS = [
     "admission",
     "reports",
     "staff",
+    "documents",
+    "ops",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "settingsapp.middleware.SettingsSnapshotMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
@@ -38,6 +41,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "rci.campus.CampusMiddleware",
+    "rci.replica.ReplicaMiddleware",
 ]
 
 ROOT_URLCONF = "rci.urls"
@@ -62,11 +67,73 @@ WSGI_APPLICATION = "rci.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        # Django's sqlite3 backend plus the PRAGMAs below (see rci/sqlite/base.py)
+        "ENGINE": "rci.sqlite",
         "NAME": BASE_DIR / "../db.sqlite3",
+        # Reuse connections between requests; health checks drop broken ones first
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Take the write lock at BEGIN, so busy_timeout applies instead of a mid-transaction failure
+            "transaction_mode": "IMMEDIATE",
+            "pragmas": {
+                "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+                "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+                "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+                "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)),
+                "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -20000)),
+                "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+                "auto_vacuum": os.getenv("SQLITE_AUTO_VACUUM", "INCREMENTAL"),
+            },
+        },
     }
 }
 
+# Audit trail and archives (see audit/routers.py); `migrate --database audit` creates its tables
+DATABASES["audit"] = {
+    **DATABASES["default"],
+    "NAME": os.getenv("AUDIT_DB", BASE_DIR / "../audit.sqlite3"),
+}
+
+# Campus shards (see rci/campus.py): CAMPUS_SHARDS="north=/path/north.sqlite3,south"
+# (a bare code gets ../campus_<code>.sqlite3). The default campus stays in "default".
+DEFAULT_CAMPUS = os.getenv("DEFAULT_CAMPUS", "main")
+CAMPUS_DATABASES = {DEFAULT_CAMPUS: "default"}
+for entry in filter(None, os.getenv("CAMPUS_SHARDS", "").split(",")):
+    code, _, path = (part.strip() for part in entry.partition("="))
+    DATABASES[f"campus_{code}"] = {
+        **DATABASES["default"],
+        "NAME": path or BASE_DIR / f"../campus_{code}.sqlite3",
+        # Tests get a real file per shard too, so cross-database behaviour is exercised
+        "TEST": {"NAME": BASE_DIR / f"../test_campus_{code}.sqlite3"},
+    }
+    CAMPUS_DATABASES[code] = f"campus_{code}"
+
+# Read replica (see rci/replica.py): a SQLite copy of the primary kept fresh with
+# `manage.py refresh_replica --interval 10`; reports and staff lists read from it
+REPLICA_DB = os.getenv("REPLICA_DB")
+if REPLICA_DB:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": REPLICA_DB,
+        "OPTIONS": {
+            "pragmas": {**DATABASES["default"]["OPTIONS"]["pragmas"], "query_only": "ON"},
+        },
+        # Tests run against one database
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["audit.routers.AuditRouter", "rci.campus.CampusRouter", "rci.replica.ReplicaRouter"]
+# Seconds of replica lag tolerated; also how long a user reads from the primary after writing
+REPLICA_MAX_LAG = int(os.getenv("REPLICA_MAX_LAG", 30))
+
+# Write coordinator (see rci/writer.py): "thread" funnels view write transactions
+# through one writer thread per process with group commits; "off" runs them inline
+WRITE_COORDINATOR = os.getenv("WRITE_COORDINATOR", "off")
+# Most write units committed together in one transaction
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", 32))
+# How long the writer waits for more units before committing (0 = only what is already queued)
+WRITE_GROUP_WINDOW_MS = int(os.getenv("WRITE_GROUP_WINDOW_MS", 0))
+
 AUTH_USER_MODEL = "users.User"
 
 # Authentication settings
@@ -82,3 +149,53 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "../frontend/static"]
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Prints the views with the most queries after `manage.py test` (see rci/query_budget.py)
+TEST_RUNNER = "rci.query_budget.QueryBudgetRunner"
+
+# Online backups (see ops/backup.py): `manage.py backup_database` writes <alias>-<timestamp>.sqlite3.gz here
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", BASE_DIR / "../backups"))
+# Backups kept per database
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", 14))
+
+# Monthly gzip JSONL segments for audit rows rolled out of the hot table
+AUDIT_COLD_STORAGE_DIR = Path(os.getenv("AUDIT_COLD_STORAGE_DIR", BASE_DIR / "../audit_cold"))
+
+# Rewritten on every Setting change so all worker processes reload their settings snapshot
+SETTINGS_VERSION_FILE = Path(os.getenv("SETTINGS_VERSION_FILE", BASE_DIR / "../.settings_version"))
+
+# Rewritten whenever a Program changes so every process drops its cached admission form page
+ADMISSION_PAGE_VERSION_FILE = Path(os.getenv("ADMISSION_PAGE_VERSION_FILE", BASE_DIR / "../.admission_page_version"))
+
+# One file per tracked model, rewritten when its rows change so every process retires its cached list counts
+PAGINATION_VERSION_DIR = Path(os.getenv("PAGINATION_VERSION_DIR", BASE_DIR / "../.pagination_versions"))
+
+# Rewritten after writes that change dashboard numbers so every process drops its cached dashboards
+DASHBOARD_VERSION_DIR = Path(os.getenv("DASHBOARD_VERSION_DIR", BASE_DIR / "../.dashboard_versions"))
+
+# Content-addressed uploads (TOR, PSA, ID scans): <dir>/ab/cd/<sha256>
+DOCUMENT_STORAGE_DIR = Path(os.getenv("DOCUMENT_STORAGE_DIR", BASE_DIR / "../documents"))
+
+# Largest accepted document upload, in bytes
+DOCUMENT_MAX_SIZE = int(os.getenv("DOCUMENT_MAX_SIZE", 20 * 1024 * 1024))
+
+# Codec for Archive.data_snapshot: zlib, bz2, lzma or none
+ARCHIVE_SNAPSHOT_CODEC = os.getenv("ARCHIVE_SNAPSHOT_CODEC", "zlib")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared by every worker on the host; used by the cache-first session engine
+    "sessions": {
+        "BACKEND": "rci.sqlite_cache.SQLiteCache",
+        "LOCATION": os.getenv("SESSION_CACHE_PATH", BASE_DIR / "../session_cache.sqlite3"),
+    },
+}
+
+# "db" (Django's database sessions) or "cache" (users.session_store: the database is
+# written only on login and logout)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "db")
+if SESSION_BACKEND == "cache":
+    SESSION_ENGINE = "users.session_store"
+    SESSION_CACHE_ALIAS = "sessions"
@@ -0,0 +1,121 @@
+"""
+SQLite backend with a production profile (ENGINE "rci.sqlite").
+
+Identical to Django's sqlite3 backend, plus per-connection PRAGMAs taken from
+OPTIONS["pragmas"]: WAL journaling so readers never block the writer,
+synchronous=NORMAL (safe with WAL, one fsync per checkpoint instead of per
+commit), and a busy_timeout so a second writer waits for the lock instead of
+failing with "database is locked". Persistent connections (CONN_MAX_AGE) keep
+the page cache and mmap warm between requests.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Negative means KiB: a 20 MB page cache per connection
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+    # Only takes effect on a new file (or after VACUUM); lets maintain_database reclaim space in steps
+    'auto_vacuum': 'INCREMENTAL',
+}
+
+# PRAGMAs that may be configured, and the values they accept
+ALLOWED_PRAGMAS = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'},
+    'busy_timeout': int,
+    'mmap_size': int,
+    'cache_size': int,
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY', '0', '1', '2'},
+    'wal_autocheckpoint': int,
+    'journal_size_limit': int,
+    # Read-only connections, e.g. the replica
+    'query_only': {'ON', 'OFF', 'TRUE', 'FALSE', '0', '1'},
+    'auto_vacuum': {'NONE', 'FULL', 'INCREMENTAL', '0', '1', '2'},
+}
+
+# Applied before the others: busy_timeout so switching journal_mode waits out other
+# connections too, auto_vacuum because a new file's WAL switch fixes its header
+FIRST_PRAGMAS = ['busy_timeout', 'auto_vacuum']
+
+# How SQLite reports the named settings back
+NAMED_VALUES = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+    'query_only': {'ON': 1, 'OFF': 0, 'TRUE': 1, 'FALSE': 0},
+    'auto_vacuum': {'NONE': 0, 'FULL': 1, 'INCREMENTAL': 2},
+}
+
+INTEGER_RE = re.compile(r'^-?\d+$')
+
+
+def validate_pragmas(pragmas, alias='default'):
+    """Normalized {name: value} for configured PRAGMAs; raises ImproperlyConfigured on anything unknown"""
+    cleaned = {}
+    for name, value in pragmas.items():
+        allowed = ALLOWED_PRAGMAS.get(name)
+        if allowed is None:
+            raise ImproperlyConfigured(f"DATABASES[{alias!r}]['OPTIONS']['pragmas'] has unknown PRAGMA {name!r}.")
+        text = str(value).strip().upper()
+        if allowed is int:
+            if not INTEGER_RE.match(text):
+                raise ImproperlyConfigured(f'PRAGMA {name} must be an integer, got {value!r}.')
+            cleaned[name] = int(text)
+        elif text not in allowed:
+            raise ImproperlyConfigured(f'PRAGMA {name} must be one of {sorted(allowed)}, got {value!r}.')
+        else:
+            cleaned[name] = text
+    return cleaned
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Not a sqlite3.connect() argument
+        configured = params.pop('pragmas', None)
+        self.pragmas = validate_pragmas(
+            DEFAULT_PRAGMAS if configured is None else {**DEFAULT_PRAGMAS, **configured},
+            self.alias,
+        )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        order = {name: position for position, name in enumerate(FIRST_PRAGMAS)}
+        for name in sorted(self.pragmas, key=lambda name: order.get(name, len(order))):
+            conn.execute(f'PRAGMA {name} = {self.pragmas[name]}')
+        return conn
+
+    def effective_pragmas(self):
+        """{name: value} as SQLite reports them on the current connection"""
+        self.ensure_connection()
+        effective = {}
+        for name in ALLOWED_PRAGMAS:
+            # In-memory databases return no row for file-only PRAGMAs such as mmap_size
+            row = self.connection.execute(f'PRAGMA {name}').fetchone()
+            effective[name] = row[0] if row else None
+        return effective
+
+    def pragma_mismatches(self):
+        """[(name, configured, effective)] for configured PRAGMAs SQLite did not apply"""
+        effective = self.effective_pragmas()
+        mismatches = []
+        for name, configured in self.pragmas.items():
+            if name in ('journal_mode', 'mmap_size') and self.is_in_memory_db():
+                # In-memory databases (the test database) have no file to journal or map
+                continue
+            if name == 'auto_vacuum':
+                # Existing files keep their mode until `maintain_database --enable-incremental-vacuum`
+                continue
+            expected = NAMED_VALUES.get(name, {}).get(configured, configured)
+            actual = effective[name]
+            if str(actual).upper() != str(expected).upper():
+                mismatches.append((name, configured, actual))
+        return mismatches
@@ -0,0 +1,110 @@
+"""
+Cache backend in a local SQLite file shared by every worker process on the host.
+
+Used by the cache-first session engine (users.session_store). FileBasedCache
+keeps one file per key and, once MAX_ENTRIES is reached, lists and culls the
+whole directory on every set, so session writes slow down as sessions pile
+up. Here every entry is a row keyed by its cache key: get, set and delete are
+primary-key lookups whatever the number of entries. Nothing is culled; every
+session has an expiry, and `clear_expired()` (run by cleanup_sessions)
+removes expired rows with one indexed DELETE.
+
+The file is separate from the application databases, in WAL mode, so cache
+writes never wait on their writer lock.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+TABLE = 'cache_entries'
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = os.fspath(location)
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread; a forked worker opens its own
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} '
+            f'(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID'
+        )
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_expires ON {TABLE}(expires)')
+        self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def _execute(self, sql, params=()):
+        return self._connection().execute(sql, params)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._execute(
+            f'SELECT value FROM {TABLE} WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._execute(
+            f'INSERT OR REPLACE INTO {TABLE} (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, self.pickle_protocol), self.get_backend_timeout(timeout)),
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Inserts, or replaces an expired entry; a live entry is left alone
+        cursor = self._execute(
+            f'INSERT INTO {TABLE} (key, value, expires) VALUES (?, ?, ?) '
+            f'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            f'WHERE {TABLE}.expires IS NOT NULL AND {TABLE}.expires <= ?',
+            (key, pickle.dumps(value, self.pickle_protocol), self.get_backend_timeout(timeout), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._execute(
+            f'UPDATE {TABLE} SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(f'DELETE FROM {TABLE} WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(
+            f'SELECT 1 FROM {TABLE} WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._execute(f'DELETE FROM {TABLE}')
+
+    def clear_expired(self):
+        """Delete expired entries; returns the number removed"""
+        return self._execute(f'DELETE FROM {TABLE} WHERE expires <= ?', (time.time(),)).rowcount
+
+    def close(self, **kwargs):
+        # Connections are kept per thread for the life of the process
+        pass
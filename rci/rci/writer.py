@@ -0,0 +1,169 @@
+"""
+Single-writer queue for write transactions (WRITE_COORDINATOR=thread).
+
+SQLite allows one writer at a time. When every worker thread opens its own
+write transaction they all queue on the database lock, waking up on
+busy_timeout retries in no particular order. With the coordinator on, views
+hand their write units to one writer thread per process instead:
+
+- units run in submission order, one transaction at a time;
+- whatever is queued while a transaction commits is taken as the next
+  batch and committed together (group commit), with every unit in its own
+  savepoint so one failure rolls back only that unit;
+- the caller blocks until its batch has committed and gets the unit's
+  return value or exception, so views read the same as with atomic().
+
+A unit must only touch the database (no request, messages or session); it
+runs on the writer thread with that thread's connection, in a copy of the
+caller's context (so the caller's campus applies). Each campus database has
+its own writer. on_commit callbacks registered inside a unit fire after its
+group commit.
+
+A unit on a campus shard writes only that shard, unless it is marked with
+`@writes_main` (creating an account: users live in the main database and are
+copied to the shard). Only then is a transaction, with the main database's
+write lock, opened on the main database too, so other campuses never queue
+behind it. A marked unit that fails rolls back on both databases. The two
+still commit one after the other, the main database first: if the shard's
+commit fails or the process dies in between, what is left is an account
+without its campus rows (nothing points at a missing row, and
+`sync_campus_data` re-copies the account), never campus rows whose account
+was rolled back.
+
+With the coordinator off (the default), inside an existing transaction, or
+when called from a writer thread itself, `run()` is simply
+`with atomic(<campus database>, unit): unit()`.
+"""
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+from rci import campus
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_writers = {}  # database alias -> Writer
+
+
+def writes_main(unit):
+    """Mark a unit that also writes the main database when it runs on a campus shard"""
+    unit.writes_main = True
+    return unit
+
+
+def write_aliases(alias, units):
+    """Databases `units` on `alias` write: the campus database, and the main one if a unit is marked"""
+    if alias != 'default' and any(getattr(unit, 'writes_main', False) for unit in units):
+        return [alias, 'default']
+    return [alias]
+
+
+@contextmanager
+def atomic(alias, *units):
+    """transaction.atomic() on every database `units` on `alias` write"""
+    with ExitStack() as stack:
+        # Exited in reverse, so the main database commits before the shard
+        for db in write_aliases(alias, units):
+            stack.enter_context(transaction.atomic(using=db))
+        yield
+
+
+class _Job:
+    __slots__ = ('unit', 'args', 'kwargs', 'context', 'done', 'result', 'error')
+
+    def __init__(self, unit, args, kwargs):
+        self.unit = unit
+        self.args = args
+        self.kwargs = kwargs
+        self.context = contextvars.copy_context()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Writer(threading.Thread):
+    """Runs queued write units in group commits"""
+
+    def __init__(self, alias, max_batch, window):
+        super().__init__(name=f'rci-writer-{alias}', daemon=True)
+        self.alias = alias
+        self.jobs = queue.SimpleQueue()
+        self.max_batch = max_batch
+        self.window = window
+        self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            batch = [self.jobs.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    # Take what is already waiting; optionally linger for the configured window
+                    remaining = deadline - time.monotonic()
+                    batch.append(self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            self.commit(batch)
+
+    def commit(self, batch):
+        # Same connection housekeeping Django does around each request
+        close_old_connections()
+        try:
+            with atomic(self.alias, *(job.unit for job in batch)):
+                for job in batch:
+                    try:
+                        with atomic(self.alias, job.unit):
+                            job.result = job.context.run(job.unit, *job.args, **job.kwargs)
+                    # Anything a unit raises belongs to its caller, not to the writer thread
+                    except BaseException as exc:
+                        job.error = exc
+        except BaseException as exc:
+            logger.exception('Group commit of %d write units failed', len(batch))
+            for job in batch:
+                if job.error is None:
+                    job.result, job.error = None, exc
+        finally:
+            for job in batch:
+                job.done.set()
+
+
+def enabled():
+    return getattr(settings, 'WRITE_COORDINATOR', 'off') == 'thread'
+
+
+def _get_writer(alias):
+    with _lock:
+        writer = _writers.get(alias)
+        # A forked worker inherits the object but not the thread, so start a fresh one
+        if writer is None or writer.pid != os.getpid() or not writer.is_alive():
+            writer = _writers[alias] = Writer(
+                alias,
+                max_batch=getattr(settings, 'WRITE_BATCH_MAX', 32),
+                window=getattr(settings, 'WRITE_GROUP_WINDOW_MS', 0) / 1000,
+            )
+            writer.start()
+        return writer
+
+
+def run(unit, *args, **kwargs):
+    """Run `unit(*args, **kwargs)` as one write transaction on the current campus's database and return its result"""
+    alias = campus.alias()
+    if (not enabled() or connections[alias].in_atomic_block
+            or isinstance(threading.current_thread(), Writer)):
+        with atomic(alias, unit):
+            return unit(*args, **kwargs)
+
+    job = _Job(unit, args, kwargs)
+    _get_writer(alias).jobs.put(job)
+    job.done.wait()
+    if job.error is not None:
+        raise job.error
+    return job.result
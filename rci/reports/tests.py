@@ -0,0 +1,20 @@
+from rci.query_budget import Budget, QueryBudgetTestCase
+
+# Every report but the dashboard fans out over the campus databases
+BUDGETS = [
+    Budget('reports:dashboard', 4, role='registrar'),
+    Budget('reports:enrollment', 9, role='registrar', per_campus=3),
+    Budget('reports:grades', 8, role='registrar', per_campus=2),
+    Budget('reports:inc_tracking', 7, role='registrar', per_campus=3),
+    Budget('reports:student_load', 7, role='registrar', per_campus=1),
+    Budget('reports:section_utilization', 6, role='registrar', per_campus=1),
+    Budget('reports:audit_trail', 8, role='registrar'),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'reports.urls')
@@ -2,14 +2,17 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Sum, Avg, Q, F
+from django.db.models import Count, DecimalField, Sum, Avg, Q, F
 from django.db.models.functions import Coalesce
 from enrollment.models import Student, Term, Section, StudentSubject
 from grades.models import Grade
 from academics.models import Program, Subject
 from audit.models import AuditTrail
+from audit import cold_storage, search as audit_search
 from datetime import datetime, timedelta
+import time
 from django.utils import timezone
+from rci import campus, replica
 
 
 def check_report_access(user):
@@ -18,6 +21,7 @@ def check_report_access(user):
 
 
 @login_required
+@replica.reads
 def reports_dashboard_view(request):
     """Main reports dashboard"""
     if not check_report_access(request.user):
@@ -32,6 +36,7 @@ def reports_dashboard_view(request):
 
 
 @login_required
+@replica.reads
 def enrollment_report_view(request):
     """Enrollment statistics per section, term, or program"""
     if not check_report_access(request.user):
@@ -46,36 +51,23 @@ def enrollment_report_view(request):
     terms = Term.objects.all().order_by('-start_date')
     programs = Program.objects.all().order_by('name')
 
-    # Base query
-    sections_query = Section.objects.select_related('subject', 'term', 'professor', 'subject__program')
-
-    # Apply filters
-    if term_id:
-        sections_query = sections_query.filter(term_id=term_id)
-    if program_id:
-        sections_query = sections_query.filter(subject__program_id=program_id)
-
-    # Get sections with enrollment counts
-    sections = sections_query.annotate(
-        enrolled_count=Count('student_subjects', filter=Q(student_subjects__status='enrolled'))
-    ).order_by('-term__is_active', 'subject__code')
-
-    # Calculate summary statistics
-    total_sections = sections.count()
-    total_enrolled = StudentSubject.objects.filter(status='enrolled').count()
-
-    if term_id:
-        total_enrolled = StudentSubject.objects.filter(
-            section__term_id=term_id,
-            status='enrolled'
-        ).count()
+    # Every campus in parallel, then merged
+    sections = []
+    total_enrolled = 0
+    program_counts = {}
+    for campus_sections, enrolled, by_program in campus.fan_out(_campus_enrollment, term_id, program_id).values():
+        sections += campus_sections
+        total_enrolled += enrolled
+        for name, count in by_program:
+            program_counts[name] = program_counts.get(name, 0) + count
+    sections.sort(key=lambda section: (not section.term.is_active, section.subject.code))
+    total_sections = len(sections)
 
     # Enrollment by program
-    enrollment_by_program = Student.objects.values(
-        'program__name'
-    ).annotate(
-        student_count=Count('id')
-    ).order_by('-student_count')
+    enrollment_by_program = [
+        {'program__name': name, 'student_count': count}
+        for name, count in sorted(program_counts.items(), key=lambda item: item[1], reverse=True)
+    ]
 
     context = {
         'sections': sections,
@@ -85,13 +77,39 @@ def enrollment_report_view(request):
         'selected_program': int(program_id) if program_id else None,
         'total_sections': total_sections,
         'total_enrolled': total_enrolled,
+        'average_enrolled': total_enrolled / total_sections if total_sections else 0,
         'enrollment_by_program': enrollment_by_program,
     }
 
     return render(request, 'reports/enrollment_report.html', context)
 
 
+def _campus_enrollment(term_id, program_id):
+    """One campus's sections (with enrolled counts), enrolled total and students per program"""
+    # Base query
+    sections_query = Section.objects.select_related('subject', 'term', 'professor', 'subject__program')
+
+    # Apply filters
+    if term_id:
+        sections_query = sections_query.filter(term_id=term_id)
+    if program_id:
+        sections_query = sections_query.filter(subject__program_id=program_id)
+
+    # Get sections with enrollment counts
+    sections = list(sections_query.annotate(
+        enrolled_students=Count('student_subjects', filter=Q(student_subjects__status='enrolled'))
+    ))
+
+    enrolled = StudentSubject.objects.filter(status='enrolled')
+    if term_id:
+        enrolled = enrolled.filter(section__term_id=term_id)
+
+    by_program = list(Student.objects.values_list('program__name').annotate(student_count=Count('id')))
+    return sections, enrolled.count(), by_program
+
+
 @login_required
+@replica.reads
 def grade_distribution_report_view(request):
     """Grade distribution and averages per subject"""
     if not check_report_access(request.user):
@@ -106,17 +124,17 @@ def grade_distribution_report_view(request):
     terms = Term.objects.all().order_by('-start_date')
     subjects = Subject.objects.all().order_by('code')
 
-    # Base query
-    grades_query = Grade.objects.select_related('subject', 'student_subject__term', 'student_subject__student')
-
-    # Apply filters
-    if term_id:
-        grades_query = grades_query.filter(student_subject__term_id=term_id)
-    if subject_id:
-        grades_query = grades_query.filter(subject_id=subject_id)
-
-    # Get grades
-    grades = grades_query.order_by('subject__code', 'student_subject__student__user__last_name')
+    # Every campus in parallel, then merged
+    grades = []
+    subject_totals = {}
+    for campus_grades, campus_stats in campus.fan_out(_campus_grades, term_id, subject_id).values():
+        grades += campus_grades
+        for stat in campus_stats:
+            key = (stat['subject__code'], stat['subject__title'])
+            totals = subject_totals.setdefault(key, dict.fromkeys(SUBJECT_STAT_COUNTS, 0))
+            for name in SUBJECT_STAT_COUNTS:
+                totals[name] += stat[name]
+    grades.sort(key=lambda grade: (grade.subject.code, grade.student_subject.student.user.last_name))
 
     # Calculate grade distribution
     grade_distribution = {}
@@ -162,20 +180,11 @@ def grade_distribution_report_view(request):
     if average_grade:
         average_grade = round(average_grade, 2)
 
-    # Get subject-wise statistics
-    subject_stats = Grade.objects.values(
-        'subject__code',
-        'subject__title'
-    ).annotate(
-        total_students=Count('id'),
-        passing_count=Count('id', filter=Q(student_subject__status='completed')),
-        failing_count=Count('id', filter=Q(student_subject__status='failed')),
-        inc_count=Count('id', filter=Q(student_subject__status='inc'))
-    ).order_by('subject__code')
-
-    # Apply term filter to subject stats
-    if term_id:
-        subject_stats = subject_stats.filter(student_subject__term_id=term_id)
+    # Subject-wise statistics across campuses
+    subject_stats = [
+        {'subject__code': code, 'subject__title': title, **totals}
+        for (code, title), totals in sorted(subject_totals.items())
+    ]
 
     context = {
         'grades': grades,
@@ -185,28 +194,65 @@ def grade_distribution_report_view(request):
         'selected_subject': int(subject_id) if subject_id else None,
         'grade_distribution': grade_distribution,
         'average_grade': average_grade,
-        'total_grades': grades.count(),
+        'total_grades': len(grades),
         'subject_stats': subject_stats,
     }
 
     return render(request, 'reports/grade_distribution_report.html', context)
 
 
+SUBJECT_STAT_COUNTS = ['total_students', 'passing_count', 'failing_count', 'inc_count']
+
+
+def _campus_grades(term_id, subject_id):
+    """One campus's grades and per-subject statistics"""
+    # Base query
+    grades_query = Grade.objects.select_related(
+        'subject', 'student_subject__term', 'student_subject__student__user'
+    )
+
+    # Apply filters
+    if term_id:
+        grades_query = grades_query.filter(student_subject__term_id=term_id)
+    if subject_id:
+        grades_query = grades_query.filter(subject_id=subject_id)
+
+    # Subject-wise statistics (term filter first, so it narrows the counted rows)
+    stats_query = Grade.objects.all()
+    if term_id:
+        stats_query = stats_query.filter(student_subject__term_id=term_id)
+    subject_stats = list(stats_query.values(
+        'subject__code',
+        'subject__title'
+    ).annotate(
+        total_students=Count('id'),
+        passing_count=Count('id', filter=Q(student_subject__status='completed')),
+        failing_count=Count('id', filter=Q(student_subject__status='failed')),
+        inc_count=Count('id', filter=Q(student_subject__status='inc'))
+    ))
+
+    return list(grades_query), subject_stats
+
+
 @login_required
+@replica.reads
 def inc_tracking_report_view(request):
     """INC tracking and repeat rates"""
     if not check_report_access(request.user):
         messages.error(request, 'You do not have permission to view reports.')
         return redirect('dashboard')
 
-    # Get all INC grades
-    inc_grades = Grade.objects.filter(
-        grade__iexact='INC'
-    ).select_related(
-        'student_subject__student__user',
-        'student_subject__term',
-        'subject'
-    ).order_by('inc_posted_date')
+    # Every campus in parallel, then merged
+    inc_grades = []
+    repeat_required = []
+    type_counts = {}
+    for campus_incs, campus_repeats, by_type in campus.fan_out(_campus_incs).values():
+        inc_grades += campus_incs
+        repeat_required += campus_repeats
+        for subject_type, count in by_type:
+            type_counts[subject_type] = type_counts.get(subject_type, 0) + count
+    inc_grades.sort(key=lambda grade: grade.inc_posted_date)
+    repeat_required.sort(key=lambda enrollment: enrollment.term.start_date, reverse=True)
 
     # Categorize INC grades
     active_incs = []
@@ -218,22 +264,13 @@ def inc_tracking_report_view(request):
         else:
             active_incs.append(grade)
 
-    # Get repeat required students
-    repeat_required = StudentSubject.objects.filter(
-        status='repeat_required'
-    ).select_related('student__user', 'subject', 'term').order_by('-term__start_date')
-
     # Calculate statistics
-    total_incs = inc_grades.count()
+    total_incs = len(inc_grades)
     total_expired = len(expired_incs)
     total_active = len(active_incs)
 
     # INC by subject type
-    inc_by_type = Grade.objects.filter(
-        grade__iexact='INC'
-    ).values('subject__type').annotate(
-        count=Count('id')
-    )
+    inc_by_type = [{'subject__type': subject_type, 'count': count} for subject_type, count in type_counts.items()]
 
     context = {
         'active_incs': active_incs,
@@ -248,7 +285,27 @@ def inc_tracking_report_view(request):
     return render(request, 'reports/inc_tracking_report.html', context)
 
 
+def _campus_incs():
+    """One campus's INC grades, repeat-required enrollments and INC counts by subject type"""
+    inc_grades = Grade.objects.filter(
+        grade__iexact='INC'
+    ).select_related(
+        'student_subject__student__user',
+        'student_subject__term',
+        'subject'
+    )
+
+    # Get repeat required students
+    repeat_required = StudentSubject.objects.filter(
+        status='repeat_required'
+    ).select_related('student__user', 'subject', 'term')
+
+    by_type = list(inc_grades.values_list('subject__type').annotate(count=Count('id')).order_by())
+    return list(inc_grades), list(repeat_required), by_type
+
+
 @login_required
+@replica.reads
 def student_load_report_view(request):
     """Student load summary per term"""
     if not check_report_access(request.user):
@@ -263,37 +320,10 @@ def student_load_report_view(request):
     terms = Term.objects.all().order_by('-start_date')
     programs = Program.objects.all().order_by('name')
 
-    # Base query - get students with their enrollments
-    students_query = Student.objects.select_related('user', 'program')
-
-    # Apply program filter
-    if program_id:
-        students_query = students_query.filter(program_id=program_id)
-
-    # Get student load data
+    # Get student load data from every campus
     student_loads = []
-    for student in students_query:
-        enrollments_query = StudentSubject.objects.filter(
-            student=student,
-            status='enrolled'
-        ).select_related('subject')
-
-        # Apply term filter
-        if term_id:
-            enrollments_query = enrollments_query.filter(term_id=term_id)
-
-        total_units = enrollments_query.aggregate(
-            total=Coalesce(Sum('subject__units'), 0)
-        )['total']
-
-        subject_count = enrollments_query.count()
-
-        if subject_count > 0 or not term_id:  # Show all students if no term filter
-            student_loads.append({
-                'student': student,
-                'total_units': total_units,
-                'subject_count': subject_count,
-            })
+    for campus_loads in campus.fan_out(_campus_student_loads, term_id, program_id).values():
+        student_loads += campus_loads
 
     # Sort by total units descending
     student_loads.sort(key=lambda x: x['total_units'], reverse=True)
@@ -321,7 +351,34 @@ def student_load_report_view(request):
     return render(request, 'reports/student_load_report.html', context)
 
 
+def _campus_student_loads(term_id, program_id):
+    """Units and subject count of one campus's students, in one query"""
+    enrolled = Q(student_subjects__status='enrolled')
+    if term_id:
+        enrolled &= Q(student_subjects__term_id=term_id)
+
+    students_query = Student.objects.select_related('user', 'program').annotate(
+        total_units=Coalesce(
+            Sum('student_subjects__subject__units', filter=enrolled), 0, output_field=DecimalField()
+        ),
+        subject_count=Count('student_subjects', filter=enrolled),
+    )
+
+    # Apply program filter
+    if program_id:
+        students_query = students_query.filter(program_id=program_id)
+    # Show all students if no term filter
+    if term_id:
+        students_query = students_query.filter(subject_count__gt=0)
+
+    return [
+        {'student': student, 'total_units': student.total_units, 'subject_count': student.subject_count}
+        for student in students_query
+    ]
+
+
 @login_required
+@replica.reads
 def section_utilization_report_view(request):
     """Section utilization (open vs full)"""
     if not check_report_access(request.user):
@@ -334,29 +391,23 @@ def section_utilization_report_view(request):
     # Get all terms for filter
     terms = Term.objects.all().order_by('-start_date')
 
-    # Base query
-    sections_query = Section.objects.select_related('subject', 'term', 'professor')
-
-    # Apply term filter
-    if term_id:
-        sections_query = sections_query.filter(term_id=term_id)
-
-    # Get sections with enrollment counts
-    sections = sections_query.annotate(
-        enrolled_count=Count('student_subjects')
-    ).order_by('subject__code')
+    # Get sections with enrollment counts from every campus
+    sections = []
+    for campus_sections in campus.fan_out(_campus_sections, term_id).values():
+        sections += campus_sections
+    sections.sort(key=lambda section: section.subject.code)
 
     # Calculate utilization
     section_data = []
     for section in sections:
-        utilization = (section.enrolled_count / section.capacity * 100) if section.capacity > 0 else 0
+        utilization = (section.enrolled_students / section.capacity * 100) if section.capacity > 0 else 0
         section_data.append({
             'section': section,
-            'enrolled': section.enrolled_count,
+            'enrolled': section.enrolled_students,
             'capacity': section.capacity,
-            'available': section.capacity - section.enrolled_count,
+            'available': section.capacity - section.enrolled_students,
             'utilization': round(utilization, 1),
-            'is_full': section.enrolled_count >= section.capacity,
+            'is_full': section.enrolled_students >= section.capacity,
         })
 
     # Calculate summary statistics
@@ -380,7 +431,19 @@ def section_utilization_report_view(request):
     return render(request, 'reports/section_utilization_report.html', context)
 
 
+def _campus_sections(term_id):
+    """One campus's sections with their enrollment counts"""
+    sections_query = Section.objects.select_related('subject', 'term', 'professor')
+
+    # Apply term filter
+    if term_id:
+        sections_query = sections_query.filter(term_id=term_id)
+
+    return list(sections_query.annotate(enrolled_students=Count('student_subjects')))
+
+
 @login_required
+@replica.reads
 def audit_trail_report_view(request):
     """Audit trail and system activity log"""
     if not check_report_access(request.user):
@@ -399,8 +462,8 @@ def audit_trail_report_view(request):
 
     start_date = timezone.now() - timedelta(days=days_int)
 
-    # Base query
-    audit_entries = AuditTrail.objects.select_related('actor').filter(
+    # Base query; actors come from the main database in one extra query
+    audit_entries = AuditTrail.objects.prefetch_related('actor').filter(
         created_at__gte=start_date
     )
 
@@ -409,17 +472,43 @@ def audit_trail_report_view(request):
         audit_entries = audit_entries.filter(action=action_type)
 
     # Order by most recent
-    audit_entries = audit_entries.order_by('-created_at')[:100]  # Limit to 100 most recent
+    audit_entries = list(audit_entries.order_by('-created_at')[:100])  # Limit to 100 most recent
 
     # Get action types for filter
     action_types = AuditTrail.objects.values_list('action', flat=True).distinct()
 
-    # Activity summary
-    activity_summary = AuditTrail.objects.filter(
-        created_at__gte=start_date
-    ).values('action').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    # Activity summary over every action (the action filter only narrows the entry list)
+    activity_counts = dict(
+        AuditTrail.objects.filter(
+            created_at__gte=start_date
+        ).values_list('action').annotate(
+            count=Count('id')
+        )
+    )
+
+    # Older rows live in cold segments once rolled over; only read them when the range reaches back.
+    # Counts come from the segment index; segments are read only until the newest 100 rows are found
+    if cold_storage.covers(start_date):
+        for action, count in cold_storage.action_counts(start=start_date).items():
+            activity_counts[action] = activity_counts.get(action, 0) + count
+        cold_entries = cold_storage.recent_entries(limit=100, start=start_date, action=action_type or None)
+        audit_entries = sorted(
+            audit_entries + cold_entries, key=lambda e: e.created_at, reverse=True
+        )[:100]
+
+    activity_summary = [
+        {'action': action, 'count': count}
+        for action, count in sorted(activity_counts.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+    # Full-text search across audit entries and archive snapshots
+    query = request.GET.get('q', '').strip()
+    search_hits = []
+    search_ms = None
+    if query:
+        started = time.perf_counter()
+        search_hits = audit_search.search(query, limit=50)
+        search_ms = round((time.perf_counter() - started) * 1000, 1)
 
     context = {
         'audit_entries': audit_entries,
@@ -427,6 +516,9 @@ def audit_trail_report_view(request):
         'selected_action': action_type,
         'selected_days': days,
         'activity_summary': activity_summary,
+        'query': query,
+        'search_hits': search_hits,
+        'search_ms': search_ms,
     }
 
     return render(request, 'reports/audit_trail_report.html', context)
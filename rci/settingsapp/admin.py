@@ -1,11 +1,39 @@
-# rci/settingsapp/admin.py
+from django import forms
 from django.contrib import admin
 from .models import Setting
+from .registry import REGISTRY
+
+
+class SettingAdminForm(forms.ModelForm):
+    """Rejects keys missing from the registry and values its spec cannot parse"""
+
+    class Meta:
+        model = Setting
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        key_name = cleaned_data.get('key_name')
+        value_text = cleaned_data.get('value_text')
+        if not key_name:
+            return cleaned_data
+
+        spec = REGISTRY.get(key_name)
+        if spec is None:
+            self.add_error('key_name', f"Unknown setting. Declared keys: {', '.join(sorted(REGISTRY))}")
+        elif value_text is not None:
+            try:
+                # Store the canonical text so 'Yes'/'1' and 'true' don't diverge
+                cleaned_data['value_text'] = spec.format(spec.parse(value_text))
+            except forms.ValidationError as exc:
+                self.add_error('value_text', exc)
+        return cleaned_data
 
 
 @admin.register(Setting)
 class SettingAdmin(admin.ModelAdmin):
-    list_display = ['key_name', 'value_text', 'description', 'updated_by', 'updated_at']
+    form = SettingAdminForm
+    list_display = ['key_name', 'value_text', 'setting_type', 'scope', 'description', 'updated_by', 'updated_at']
     search_fields = ['key_name', 'description']
     ordering = ['key_name']
     readonly_fields = ['updated_at']
@@ -20,6 +48,15 @@ class SettingAdmin(admin.ModelAdmin):
         }),
     )
 
+    def setting_type(self, obj):
+        spec = REGISTRY.get(obj.key_name)
+        return spec.type.__name__ if spec else 'undeclared'
+    setting_type.short_description = 'Type'
+
+    def scope(self, obj):
+        spec = REGISTRY.get(obj.key_name)
+        return spec.scope if spec else '-'
+
     def save_model(self, request, obj, form, change):
         if not obj.updated_by:
             obj.updated_by = request.user
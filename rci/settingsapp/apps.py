@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SettingsappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "settingsapp"
+
+    def ready(self):
+        from . import checks  # noqa: F401
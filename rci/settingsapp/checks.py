@@ -0,0 +1,46 @@
+from django.core.checks import Tags, Warning, register
+from django.db import DatabaseError
+
+from . import registry
+
+
+@register(Tags.database)
+def check_settings_registry(app_configs=None, databases=None, **kwargs):
+    """Warn about Setting rows that are undeclared, missing or unparseable"""
+    if not databases:
+        return []
+
+    from .models import Setting
+
+    try:
+        raw = dict(Setting.objects.values_list('key_name', 'value_text'))
+    except DatabaseError:
+        # Table not migrated yet
+        return []
+
+    _, unknown, missing, invalid = registry.parse_all(raw)
+    warnings = [
+        Warning(
+            f"Setting '{key}' is not declared in settingsapp.registry.",
+            hint='Declare it in REGISTRY or delete the row.',
+            id='settingsapp.W001',
+        )
+        for key in unknown
+    ]
+    warnings += [
+        Warning(
+            f"Setting '{key}' has no row; the default {registry.REGISTRY[key].default!r} is used.",
+            hint='Run seed_data or add the row in the admin.',
+            id='settingsapp.W002',
+        )
+        for key in missing
+    ]
+    warnings += [
+        Warning(
+            f"Setting '{key}' is invalid: {message}",
+            hint=f'The default {registry.REGISTRY[key].default!r} is used until it is fixed.',
+            id='settingsapp.W003',
+        )
+        for key, message in invalid.items()
+    ]
+    return warnings
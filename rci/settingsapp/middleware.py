@@ -0,0 +1,12 @@
+from .snapshot import site_settings
+
+
+class SettingsSnapshotMiddleware:
+    """Reload the settings snapshot when another process has changed a setting"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        site_settings.refresh_if_stale()
+        return self.get_response(request)
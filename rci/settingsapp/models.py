@@ -1,7 +1,8 @@
 # rci/settingsapp/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.core.cache import cache
+from .registry import REGISTRY, TRUE_VALUES
+from .snapshot import site_settings
 
 
 class Setting(models.Model):
@@ -37,35 +38,34 @@ class Setting(models.Model):
         return f"{self.key_name} = {self.value_text}"
 
     def save(self, *args, **kwargs):
-        """Clear cache when setting is updated"""
+        """Invalidate every process's settings snapshot once the change is committed"""
         super().save(*args, **kwargs)
-        cache.delete(f'setting_{self.key_name}')
+        # Not before: a reload inside this transaction would cache a value that may roll back
+        transaction.on_commit(site_settings.invalidate, using=kwargs.get('using'))
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(site_settings.invalidate, using=kwargs.get('using'))
+        return result
 
     @classmethod
     def get_value(cls, key_name, default=None):
-        """Get setting value with caching"""
-        cache_key = f'setting_{key_name}'
-        value = cache.get(cache_key)
-
-        if value is None:
-            try:
-                setting = cls.objects.get(key_name=key_name)
-                value = setting.value_text
-                cache.set(cache_key, value, 3600)  # Cache for 1 hour
-            except cls.DoesNotExist:
-                value = default
-
-        return value
+        """Get setting value from the in-memory snapshot"""
+        return site_settings.get(key_name, default)
 
     @classmethod
     def get_bool(cls, key_name, default=False):
-        """Get setting as boolean"""
+        """Get setting as boolean (registered keys come pre-parsed from the snapshot)"""
+        if key_name in REGISTRY:
+            return getattr(site_settings, key_name)
         value = cls.get_value(key_name, str(default))
-        return value.lower() in ('true', '1', 'yes', 'on')
+        return value.lower() in TRUE_VALUES
 
     @classmethod
     def get_int(cls, key_name, default=0):
         """Get setting as integer"""
+        if key_name in REGISTRY:
+            return getattr(site_settings, key_name)
         value = cls.get_value(key_name, str(default))
         try:
             return int(value)
@@ -75,6 +75,8 @@ class Setting(models.Model):
     @classmethod
     def get_float(cls, key_name, default=0.0):
         """Get setting as float"""
+        if key_name in REGISTRY:
+            return getattr(site_settings, key_name)
         value = cls.get_value(key_name, str(default))
         try:
             return float(value)
@@ -0,0 +1,122 @@
+"""
+Declared schema for every system setting.
+
+Each key has a type, a default, validators and a scope. The settings snapshot
+parses stored values once, at load time, so callers read typed values with
+an attribute lookup (`site_settings.freshman_unit_cap`) instead of re-parsing
+strings on every call.
+"""
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+FALSE_VALUES = ('false', '0', 'no', 'off')
+
+
+def parse_bool(text):
+    value = text.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError(f"'{text}' is not a boolean (use true/false)")
+
+
+def parse_int(text):
+    try:
+        return int(text.strip())
+    except ValueError:
+        raise ValidationError(f"'{text}' is not a whole number")
+
+
+def parse_float(text):
+    try:
+        return float(text.strip())
+    except ValueError:
+        raise ValidationError(f"'{text}' is not a number")
+
+
+PARSERS = {
+    bool: parse_bool,
+    int: parse_int,
+    float: parse_float,
+    str: str,
+}
+
+
+class SettingSpec:
+    """Type, default and validation rules for one setting key"""
+
+    def __init__(self, key, type, default, description='', scope='system', validators=()):
+        self.key = key
+        self.type = type
+        self.default = default
+        self.description = description
+        self.scope = scope
+        self.validators = list(validators)
+
+    def parse(self, text):
+        """Convert stored text to a typed value, raising ValidationError when it is invalid"""
+        value = PARSERS[self.type](text)
+        for validator in self.validators:
+            validator(value)
+        return value
+
+    def format(self, value):
+        """Text stored in Setting.value_text for a typed value"""
+        if self.type is bool:
+            return 'true' if value else 'false'
+        return str(value)
+
+
+REGISTRY = {spec.key: spec for spec in [
+    SettingSpec(
+        'admission_link_enabled', bool, True,
+        'Enable/disable admission form', scope='admission',
+    ),
+    SettingSpec(
+        'enrollment_open', bool, True,
+        'Allow or block student enrollment', scope='enrollment',
+    ),
+    SettingSpec(
+        'freshman_unit_cap', int, 30,
+        'Unit limit for freshmen (per plan.md)', scope='enrollment',
+        validators=[MinValueValidator(1), MaxValueValidator(60)],
+    ),
+    SettingSpec(
+        'passing_grade', float, 3.0,
+        'Default passing grade', scope='grades',
+        validators=[MinValueValidator(1.0), MaxValueValidator(5.0)],
+    ),
+    SettingSpec(
+        'timezone', str, 'Asia/Manila',
+        'System timezone', scope='system',
+    ),
+    SettingSpec(
+        'audit_hot_retention_days', int, 180,
+        'Days of audit trail kept in the database before rollover', scope='audit',
+        validators=[MinValueValidator(1)],
+    ),
+]}
+
+
+def parse_all(raw_values):
+    """
+    Typed values for every registered key, plus the problems found:
+    (values, unknown_keys, missing_keys, invalid {key: message}).
+    Missing or invalid keys fall back to their declared default.
+    """
+    values = {}
+    invalid = {}
+    for key, spec in REGISTRY.items():
+        if key not in raw_values:
+            values[key] = spec.default
+            continue
+        try:
+            values[key] = spec.parse(raw_values[key])
+        except ValidationError as exc:
+            invalid[key] = ' '.join(exc.messages)
+            values[key] = spec.default
+    unknown = sorted(set(raw_values) - set(REGISTRY))
+    missing = sorted(set(REGISTRY) - set(raw_values))
+    return values, unknown, missing, invalid
@@ -0,0 +1,144 @@
+"""
+Process-local snapshot of every Setting row, with cross-process invalidation.
+
+All settings are loaded with one query and served from memory. A small
+version file shared by every worker process is rewritten whenever a setting
+changes; each request compares the file's stat() signature with the one seen
+at load time (no database query), and a mismatch triggers one reload in that
+process.
+
+Registered keys (see registry.py) are parsed once per load and read as
+attributes: `site_settings.enrollment_open`.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+from . import registry
+
+logger = logging.getLogger(__name__)
+
+
+class VersionFile:
+    """Change counter stored in a file; reading its signature is a single stat() call"""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # os.replace() in bump() gives the file a new inode, so this changes even
+        # when two bumps land within the filesystem's mtime resolution
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def read(self):
+        try:
+            with open(self.path, encoding='ascii') as fh:
+                return int(fh.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        version = self.read() + 1
+        tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='ascii') as fh:
+            fh.write(str(version))
+        os.replace(tmp_path, self.path)
+        return version
+
+
+class SettingsSnapshot:
+    """In-memory copy of the settings table for this process"""
+
+    def __init__(self, version_file=None):
+        self._version_file = version_file
+        self._values = None
+        self._typed = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    @property
+    def version_file(self):
+        if self._version_file is None:
+            self._version_file = VersionFile(settings.SETTINGS_VERSION_FILE)
+        return self._version_file
+
+    def _load(self):
+        from .models import Setting
+
+        with self._lock:
+            if self._values is None:
+                signature = self.version_file.signature()
+                raw = dict(Setting.objects.values_list('key_name', 'value_text'))
+                typed, unknown, missing, invalid = registry.parse_all(raw)
+                report_problems(unknown, missing, invalid)
+                self._typed = typed
+                self._values = raw
+                self._signature = signature
+            return self._values
+
+    def values(self):
+        values = self._values
+        if values is None:
+            values = self._load()
+        return values
+
+    def typed(self):
+        """Parsed values of every registered key"""
+        typed = self._typed
+        if typed is None or self._values is None:
+            self._load()
+            typed = self._typed
+        return typed
+
+    def refresh_if_stale(self):
+        """Drop the snapshot if another process changed a setting since it was loaded"""
+        if self._values is not None and self.version_file.signature() != self._signature:
+            self._values = None
+
+    def clear(self):
+        """Forget the snapshot in this process only"""
+        self._values = None
+
+    def invalidate(self):
+        """Tell every process (including this one) to reload on its next request"""
+        self.version_file.bump()
+        self._values = None
+
+    def get(self, key_name, default=None):
+        return self.values().get(key_name, default)
+
+    def __getattr__(self, name):
+        if name not in registry.REGISTRY:
+            raise AttributeError(f"'{name}' is not a registered setting")
+        return self.typed()[name]
+
+
+_reported = set()
+
+
+def report_problems(unknown, missing, invalid):
+    """Log settings rows that do not match the registry (each problem once per process)"""
+    problems = [
+        *(f"Setting '{key}' is not declared in settingsapp.registry" for key in unknown),
+        *(f"Setting '{key}' has no row; using default {registry.REGISTRY[key].default!r}" for key in missing),
+        *(
+            f"Setting '{key}' is invalid ({message}); using default {registry.REGISTRY[key].default!r}"
+            for key, message in invalid.items()
+        ),
+    ]
+    for message in problems:
+        if message not in _reported:
+            _reported.add(message)
+            logger.warning(message)
+
+
+site_settings = SettingsSnapshot()
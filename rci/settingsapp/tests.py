@@ -1,3 +1,70 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from settingsapp import registry
+from settingsapp.admin import SettingAdminForm
+from settingsapp.models import Setting
+from settingsapp.snapshot import VersionFile, site_settings
+
+
+class SettingSnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.version_file = VersionFile(os.path.join(directory.name, 'settings_version'))
+        self.enterContext(mock.patch.object(site_settings, '_version_file', self.version_file))
+        self.addCleanup(site_settings.clear)
+        self.setting = Setting.objects.create(key_name='freshman_unit_cap', value_text='30')
+        site_settings.clear()
+        self.assertEqual(site_settings.freshman_unit_cap, 30)
+
+    def test_rolled_back_change_never_reaches_the_snapshot(self):
+        with transaction.atomic():
+            self.setting.value_text = '12'
+            self.setting.save()
+            # Still the committed value, even when read inside the transaction
+            self.assertEqual(site_settings.freshman_unit_cap, 30)
+            transaction.set_rollback(True)
+
+        self.assertEqual(site_settings.freshman_unit_cap, 30)
+        self.assertEqual(self.version_file.read(), 0)
+
+    def test_committed_change_bumps_the_version_and_reloads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.setting.value_text = '12'
+            self.setting.save()
+            self.assertEqual(site_settings.freshman_unit_cap, 30)
+
+        self.assertEqual(self.version_file.read(), 1)
+        self.assertEqual(site_settings.freshman_unit_cap, 12)
+
+
+class RegistryTests(TestCase):
+    def test_stored_text_becomes_typed_values(self):
+        values, unknown, missing, invalid = registry.parse_all({
+            'enrollment_open': ' No ', 'passing_grade': '2.5', 'freshman_unit_cap': '99', 'retired_key': 'x',
+        })
+        self.assertIs(values['enrollment_open'], False)
+        self.assertEqual(values['passing_grade'], 2.5)
+        # Out of range: reported, and the default is used meanwhile
+        self.assertEqual(values['freshman_unit_cap'], 30)
+        self.assertEqual(list(invalid), ['freshman_unit_cap'])
+        self.assertEqual(unknown, ['retired_key'])
+        self.assertIn('timezone', missing)
+        self.assertEqual(values['timezone'], 'Asia/Manila')
+
+    def test_admin_form_stores_canonical_text(self):
+        form = SettingAdminForm(data={'key_name': 'enrollment_open', 'value_text': 'Yes'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['value_text'], 'true')
+
+        form = SettingAdminForm(data={'key_name': 'freshman_unit_cap', 'value_text': 'thirty'})
+        form.is_valid()
+        self.assertIn('value_text', form.errors)
+        form = SettingAdminForm(data={'key_name': 'unit_cap', 'value_text': '30'})
+        form.is_valid()
+        self.assertIn('key_name', form.errors)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class StaffConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "staff"
+
+    def ready(self):
+        from rci import pagination
+        from admission.models import AdmissionApplication
+        from enrollment.models import Section, Student, StudentSubject, Term
+
+        # Models whose cached list totals must reset when rows change
+        pagination.track(Student, Section, Term, StudentSubject, AdmissionApplication)
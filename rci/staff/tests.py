@@ -1,3 +1,178 @@
-from django.test import TestCase
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from enrollment import search as student_search
+from enrollment.models import Section
+from rci import pagination, replica
+from rci.query_budget import Budget, Fixture, QueryBudgetTestCase
+
+BUDGETS = [
+    Budget('staff:students_list', 7, role='registrar'),
+    Budget('staff:student_detail', 9, role='registrar', args=lambda fixture: [fixture.student.pk]),
+    Budget('staff:sections_list', 7, role='registrar'),
+    Budget('staff:section_detail', 9, role='registrar', args=lambda fixture: [fixture.enrollments[0].section_id]),
+    Budget('staff:terms_list', 6, role='registrar'),
+    Budget('staff:term_detail', 9, role='registrar', args=lambda fixture: [fixture.term.pk]),
+    Budget('staff:enrollments_overview', 7, role='registrar'),
+    Budget('staff:applications_list', 6, role='admission'),
+    Budget('staff:application_detail', 5, role='admission', args=lambda fixture: [fixture.application.pk]),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'staff.urls')
+
+
+class CursorPaginationTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(
+            DOCUMENT_STORAGE_DIR=directory.name, PAGINATION_VERSION_DIR=directory.name,
+        ))
+        cache.clear()
+        self.fixture = Fixture().grow(7)
+        self.factory = RequestFactory()
+        # Half the sections share a capacity value, so the id breaks ties
+        Section.objects.filter(pk__in=list(Section.objects.order_by('pk').values_list('pk', flat=True))[::2]).update(
+            capacity=30
+        )
+        self.sections = Section.objects.all()
+
+    def pages(self, ordering, per_page=3):
+        cursor = None
+        while True:
+            request = self.factory.get('/sections/', {'cursor': cursor} if cursor else {})
+            page = pagination.paginate(request, self.sections, ordering, per_page=per_page)
+            yield page
+            if not page.has_next:
+                return
+            self.assertIn('cursor=', page.next_url)
+            cursor = page.next_cursor
+
+    def test_walks_every_row_once_in_order(self):
+        for ordering in (['capacity', 'id'], ['-capacity', '-id'], ['-created_at', '-id']):
+            with self.subTest(ordering):
+                seen = [section.pk for page in self.pages(ordering) for section in page]
+                self.assertEqual(seen, list(self.sections.order_by(*ordering).values_list('pk', flat=True)))
+
+    def test_rows_added_before_the_cursor_do_not_shift_later_pages(self):
+        ordering = ['-created_at', '-id']
+        pages = self.pages(ordering)
+        first = [section.pk for section in next(pages)]
+        Section.objects.create(
+            subject=self.fixture.open_subject, term=self.fixture.term, professor=self.fixture.professor,
+            section_code='GE100-B',
+        )
+        rest = [section.pk for page in pages for section in page]
+        self.assertEqual(len(set(first + rest)), len(first + rest))
+        self.assertEqual(len(first + rest), self.sections.count() - 1)
+
+    def test_malformed_cursor_shows_the_first_page(self):
+        first = [section.pk for section in next(self.pages(['capacity', 'id']))]
+        for cursor in (
+            'not-base64!', pagination.encode_cursor([1]), pagination.encode_cursor({'a': 1}),
+            # Values that do not fit the ordering fields
+            pagination.encode_cursor(['abc', 1]), pagination.encode_cursor([None, 1]),
+            pagination.encode_cursor([[30], 1]),
+        ):
+            with self.subTest(cursor):
+                request = self.factory.get('/sections/', {'cursor': cursor})
+                page = pagination.paginate(request, self.sections, ['capacity', 'id'], per_page=3)
+                self.assertEqual([section.pk for section in page], first)
+
+    def test_counts_are_cached_until_a_tracked_model_changes(self):
+        self.assertEqual(pagination.cached_count(self.sections), 15)
+        with self.captureOnCommitCallbacks(execute=True):
+            Section.objects.filter(pk=self.fixture.open_section.pk).delete()
+            # Retired only once the delete commits
+            self.assertEqual(pagination.cached_count(self.sections), 15)
+        # A queryset delete sends post_delete, which retires the cached count
+        self.assertEqual(pagination.cached_count(self.sections), 14)
+
+        # Writes without signals are only seen after the cache timeout
+        Section.objects.filter(section_code='CS001-A').update(section_code='CS001-Z')
+        self.assertEqual(pagination.cached_count(Section.objects.filter(section_code='CS001-Z')), 1)
+        Section.objects.bulk_create([Section(
+            subject=self.fixture.open_subject, term=self.fixture.term, professor=self.fixture.professor,
+            section_code='GE100-C',
+        )])
+        self.assertEqual(pagination.cached_count(self.sections), 14)
+
+    def test_a_change_in_another_process_retires_cached_counts(self):
+        self.assertEqual(pagination.cached_count(self.sections), 15)
+        Section.objects.bulk_create([Section(
+            subject=self.fixture.open_subject, term=self.fixture.term, professor=self.fixture.professor,
+            section_code='GE100-C',
+        )])
+        # Another worker saved a section: only the shared version file changes
+        pagination._version_file(Section).bump()
+        self.assertEqual(pagination.cached_count(self.sections), 16)
+
+    def test_a_change_during_the_count_is_not_cached_under_the_new_version(self):
+        count = QuerySet.count
+
+        def count_while_another_worker_writes(queryset):
+            total = count(queryset)
+            Section.objects.bulk_create([Section(
+                subject=self.fixture.open_subject, term=self.fixture.term, professor=self.fixture.professor,
+                section_code='GE100-C',
+            )])
+            pagination._version_file(Section).bump()
+            return total
+
+        with mock.patch.object(QuerySet, 'count', count_while_another_worker_writes):
+            self.assertEqual(pagination.cached_count(self.sections), 15)
+        self.assertEqual(pagination.cached_count(self.sections), 16)
+
+
+class ReplicaRoutingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(replica, 'configured', return_value=True))
+        # Earlier writes on this thread (fixtures, other tests) are not this request's
+        self.addCleanup(replica._wrote.reset, replica._wrote.set(False))
+        self.factory = RequestFactory()
+
+    def test_replica_is_used_only_when_fresh_enough(self):
+        now = time.time()
+        with mock.patch.object(replica, 'snapshot_time', return_value=now - 5):
+            self.assertFalse(replica.usable())
+            with replica.reading():
+                self.assertTrue(replica.usable())
+                # The user's own write is newer than the snapshot
+                token = replica._wrote_at.set(now)
+                self.assertFalse(replica.usable())
+                replica._wrote_at.reset(token)
+        with mock.patch.object(replica, 'snapshot_time', return_value=now - replica.max_lag() - 1):
+            with replica.reading():
+                self.assertFalse(replica.usable())
+
+    def respond(self, request, view):
+        # No fresh snapshot, so reads stay on the primary the test database has
+        with mock.patch.object(replica, 'snapshot_time', return_value=None):
+            return replica.ReplicaMiddleware(replica.reads(view))(request)
+
+    def test_searching_does_not_pin_the_user_to_the_primary(self):
+        def search_view(request):
+            student_search.search_ids('ana')
+            return HttpResponse()
+
+        response = self.respond(self.factory.get('/students/', {'search': 'ana'}), search_view)
+        self.assertNotIn(replica.WROTE_COOKIE, response.cookies)
+
+        response = self.respond(self.factory.post('/students/'), lambda request: HttpResponse())
+        self.assertIn(replica.WROTE_COOKIE, response.cookies)
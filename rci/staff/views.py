@@ -5,10 +5,12 @@ from django.contrib import messages
 from django.db.models import Q, Count
 from django.utils import timezone
 from enrollment.models import Student, Section, Term, StudentSubject
+from enrollment import search as student_search
 from academics.models import Subject, Program, Curriculum
 from admission.models import AdmissionApplication
 from users.models import User
 from audit.models import AuditTrail
+from rci import pagination, replica
 
 
 def check_staff_access(user):
@@ -24,6 +26,7 @@ def check_admission_access(user):
 # ==================== STUDENTS MANAGEMENT ====================
 
 @login_required
+@replica.reads
 def students_list_view(request):
     """View all students with search and filtering"""
     if not check_staff_access(request.user):
@@ -32,16 +35,6 @@ def students_list_view(request):
 
     students = Student.objects.select_related('user', 'program', 'curriculum').all()
 
-    # Search functionality
-    search = request.GET.get('search', '')
-    if search:
-        students = students.filter(
-            Q(user__first_name__icontains=search) |
-            Q(user__last_name__icontains=search) |
-            Q(user__username__icontains=search) |
-            Q(student_id__icontains=search)
-        )
-
     # Filter by program
     program_filter = request.GET.get('program', '')
     if program_filter:
@@ -52,10 +45,20 @@ def students_list_view(request):
     if status_filter:
         students = students.filter(status=status_filter)
 
+    # Search results keep their rank order; otherwise newest first
+    search = request.GET.get('search', '')
+    if search:
+        page = pagination.paginate_ids(request, students, student_search.ranked_ids(students, search))
+    else:
+        page = pagination.paginate(request, students, ['-created_at', '-id'])
+
+    if pagination.wants_rows(request):
+        return render(request, 'staff/partials/students_rows.html', {'page': page})
+
     programs = Program.objects.all()
 
     context = {
-        'students': students,
+        'page': page,
         'programs': programs,
         'search': search,
         'selected_program': program_filter,
@@ -65,6 +68,7 @@ def students_list_view(request):
 
 
 @login_required
+@replica.reads
 def student_detail_view(request, student_id):
     """View detailed student information"""
     if not check_staff_access(request.user):
@@ -102,6 +106,7 @@ def student_detail_view(request, student_id):
 # ==================== SECTIONS MANAGEMENT ====================
 
 @login_required
+@replica.reads
 def sections_list_view(request):
     """View all sections with filtering"""
     if not check_staff_access(request.user):
@@ -109,7 +114,7 @@ def sections_list_view(request):
         return redirect('dashboard')
 
     sections = Section.objects.select_related('subject', 'term', 'professor').annotate(
-        enrolled_count=Count('enrollments')
+        enrolled_students=Count('student_subjects')
     ).all()
 
     # Filter by term
@@ -122,10 +127,14 @@ def sections_list_view(request):
     if status_filter:
         sections = sections.filter(status=status_filter)
 
+    page = pagination.paginate(request, sections, ['section_code', 'id'])
+    if pagination.wants_rows(request):
+        return render(request, 'staff/partials/sections_rows.html', {'page': page})
+
     terms = Term.objects.all().order_by('-start_date')
 
     context = {
-        'sections': sections,
+        'page': page,
         'terms': terms,
         'selected_term': term_filter,
         'selected_status': status_filter,
@@ -134,6 +143,7 @@ def sections_list_view(request):
 
 
 @login_required
+@replica.reads
 def section_detail_view(request, section_id):
     """View section details and enrolled students"""
     if not check_staff_access(request.user):
@@ -161,6 +171,7 @@ def section_detail_view(request, section_id):
 # ==================== TERM MANAGEMENT ====================
 
 @login_required
+@replica.reads
 def terms_list_view(request):
     """View all terms"""
     if not check_staff_access(request.user):
@@ -168,17 +179,22 @@ def terms_list_view(request):
         return redirect('dashboard')
 
     terms = Term.objects.annotate(
-        sections_count=Count('sections'),
-        enrollments_count=Count('sections__enrollments')
-    ).order_by('-start_date')
+        sections_count=Count('sections', distinct=True),
+        enrollments_count=Count('sections__student_subjects')
+    )
+
+    page = pagination.paginate(request, terms, ['-start_date', '-id'])
+    if pagination.wants_rows(request):
+        return render(request, 'staff/partials/terms_rows.html', {'page': page})
 
     context = {
-        'terms': terms,
+        'page': page,
     }
     return render(request, 'staff/terms_list.html', context)
 
 
 @login_required
+@replica.reads
 def term_detail_view(request, term_id):
     """View term details"""
     if not check_staff_access(request.user):
@@ -188,7 +204,7 @@ def term_detail_view(request, term_id):
     term = get_object_or_404(Term, id=term_id)
 
     sections = Section.objects.filter(term=term).select_related('subject', 'professor').annotate(
-        enrolled_count=Count('enrollments')
+        enrolled_students=Count('student_subjects')
     )
 
     enrollments = StudentSubject.objects.filter(term=term).select_related(
@@ -213,6 +229,7 @@ def term_detail_view(request, term_id):
 # ==================== ENROLLMENT OVERVIEW ====================
 
 @login_required
+@replica.reads
 def enrollments_overview_view(request):
     """Overview of all enrollments"""
     if not check_staff_access(request.user):
@@ -221,7 +238,7 @@ def enrollments_overview_view(request):
 
     enrollments = StudentSubject.objects.select_related(
         'student__user', 'subject', 'section', 'term'
-    ).order_by('-created_at')
+    )
 
     # Filter by term
     term_filter = request.GET.get('term', '')
@@ -236,19 +253,16 @@ def enrollments_overview_view(request):
     # Search by student
     search = request.GET.get('search', '')
     if search:
-        enrollments = enrollments.filter(
-            Q(student__user__first_name__icontains=search) |
-            Q(student__user__last_name__icontains=search) |
-            Q(student__student_id__icontains=search)
-        )
+        enrollments = enrollments.filter(student_id__in=student_search.search_ids(search))
 
-    terms = Term.objects.all().order_by('-start_date')
+    page = pagination.paginate(request, enrollments, ['-created_at', '-id'])
+    if pagination.wants_rows(request):
+        return render(request, 'staff/partials/enrollments_rows.html', {'page': page})
 
-    # Limit to recent 100 by default
-    enrollments = enrollments[:100]
+    terms = Term.objects.all().order_by('-start_date')
 
     context = {
-        'enrollments': enrollments,
+        'page': page,
         'terms': terms,
         'selected_term': term_filter,
         'search': search,
@@ -259,23 +273,28 @@ def enrollments_overview_view(request):
 # ==================== APPLICATIONS MANAGEMENT ====================
 
 @login_required
+@replica.reads
 def applications_list_view(request):
     """View all admission applications"""
     if not check_admission_access(request.user):
         messages.error(request, "You don't have permission to access this page.")
         return redirect('dashboard')
 
-    applications = AdmissionApplication.objects.select_related('program').order_by('-submitted_at')
+    applications = AdmissionApplication.objects.select_related('program')
 
-    # Filter by status
+    # Filter by status (applications have no workflow state; these follow the review flag and account)
     status_filter = request.GET.get('status', '')
-    if status_filter:
-        applications = applications.filter(status=status_filter)
+    if status_filter == 'review':
+        applications = applications.filter(needs_registrar_review=True)
+    elif status_filter == 'account_created':
+        applications = applications.filter(generated_user__isnull=False)
+    elif status_filter == 'pending':
+        applications = applications.filter(generated_user__isnull=True)
 
     # Filter by type
     type_filter = request.GET.get('type', '')
     if type_filter:
-        applications = applications.filter(student_type=type_filter)
+        applications = applications.filter(applicant_type=type_filter)
 
     # Search
     search = request.GET.get('search', '')
@@ -286,8 +305,12 @@ def applications_list_view(request):
             Q(email__icontains=search)
         )
 
+    page = pagination.paginate(request, applications, ['-application_date', '-id'])
+    if pagination.wants_rows(request):
+        return render(request, 'staff/partials/applications_rows.html', {'page': page})
+
     context = {
-        'applications': applications,
+        'page': page,
         'selected_status': status_filter,
         'selected_type': type_filter,
         'search': search,
@@ -296,6 +319,7 @@ def applications_list_view(request):
 
 
 @login_required
+@replica.reads
 def application_detail_view(request, application_id):
     """View application details"""
     if not check_admission_access(request.user):
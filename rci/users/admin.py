@@ -6,19 +6,19 @@ from .models import User
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
-    list_display = ['username', 'email', 'first_name', 'last_name', 'role', 'is_staff', 'is_active']
-    list_filter = ['role', 'is_staff', 'is_active', 'date_joined']
+    list_display = ['username', 'email', 'first_name', 'last_name', 'role', 'campus', 'is_staff', 'is_active']
+    list_filter = ['role', 'campus', 'is_staff', 'is_active', 'date_joined']
     search_fields = ['username', 'first_name', 'last_name', 'email']
     ordering = ['-date_joined']
 
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Role Information', {
-            'fields': ('role',)
+            'fields': ('role', 'campus')
         }),
     )
 
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Role Information', {
-            'fields': ('role',)
+            'fields': ('role', 'campus')
         }),
     )
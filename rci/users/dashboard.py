@@ -0,0 +1,160 @@
+"""
+Dashboard data per role.
+
+The dashboard is every user's landing page, so each role's numbers come from
+one query and are cached: per student or professor for personal dashboards,
+and once for everyone on the staff and admission dashboards.
+
+The cache is per process, so invalidation goes through version files shared
+by every worker, as for the settings snapshot. Each cache key carries the
+stat() signature of its version file; the signal handlers in users.signals
+rewrite the affected files after a commit. Personal dashboards are spread over
+PERSONAL_BUCKETS files, so one student's enrollment retires only a fraction
+of the others. Writes that skip signals (bulk_create, update) call
+`invalidate()` themselves (admission.bulk), or are covered by the timeouts.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Count
+
+from academics.models import Subject
+from admission.models import AdmissionApplication
+from enrollment.models import Section, Student, StudentSubject
+from rci import campus
+from settingsapp.snapshot import VersionFile
+
+PERSONAL_TIMEOUT = 120
+GLOBAL_TIMEOUT = 30
+PERSONAL_BUCKETS = 64
+
+STAFF_ROLES = ['registrar', 'dean', 'admin']
+
+
+# Version file names. Student rows and the staff/admission counts come from the campus's own database
+def staff_scope(code=None):
+    return f'staff.{code or campus.current()}'
+
+
+def admission_scope(code=None):
+    return f'admission.{code or campus.current()}'
+
+
+def student_scope(student_id):
+    return f'student.{campus.current()}.{student_id % PERSONAL_BUCKETS}'
+
+
+def professor_scope(user_id):
+    return f'professor.{user_id % PERSONAL_BUCKETS}'
+
+
+def version_file(scope):
+    return VersionFile(os.path.join(settings.DASHBOARD_VERSION_DIR, scope))
+
+
+def invalidate(*scopes):
+    for scope in set(scopes):
+        version_file(scope).bump()
+
+
+def _cached(scope, key, timeout, compute):
+    # Hashed so the key is safe for every cache backend (stat tuples contain spaces)
+    signature = hashlib.md5(f'{version_file(scope).signature()}'.encode('utf-8')).hexdigest()
+    key = f'dashboard:{key}:{signature}'
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, timeout)
+    return data
+
+
+def count_all(**querysets):
+    """Count several querysets in one statement: SELECT (SELECT COUNT(*) ...), (...)"""
+    parts, params = [], []
+    for queryset in querysets.values():
+        sql, query_params = queryset.order_by().values('pk').query.sql_with_params()
+        parts.append(f'(SELECT COUNT(*) FROM ({sql}) counted)')
+        params.extend(query_params)
+    model = next(iter(querysets.values())).model
+    with connections[router.db_for_read(model)].cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(parts), params)
+        return dict(zip(querysets, cursor.fetchone()))
+
+
+def student_data(student):
+    def compute():
+        # Status counts and the enrolled list come from the same rows
+        rows = list(
+            StudentSubject.objects.filter(student=student).values(
+                'status', 'subject__code', 'subject__title', 'subject__units',
+                'section__section_code', 'term__name',
+            ).order_by('subject__code')
+        )
+        counts = {status: 0 for status, _ in StudentSubject.STATUS_CHOICES}
+        for row in rows:
+            counts[row['status']] += 1
+        return {
+            'enrolled_subjects': [row for row in rows if row['status'] == 'enrolled'],
+            'completed_count': counts['completed'],
+            'failed_count': counts['failed'],
+            'inc_count': counts['inc'],
+        }
+
+    return _cached(student_scope(student.pk), f'student:{campus.current()}:{student.pk}', PERSONAL_TIMEOUT, compute)
+
+
+def professor_data(user):
+    def compute():
+        sections = list(
+            Section.objects.filter(professor=user).annotate(
+                enrolled=Count('student_subjects')
+            ).values(
+                'id', 'section_code', 'subject__code', 'subject__title', 'term__name',
+                'capacity', 'status', 'enrolled',
+            ).order_by('section_code')
+        )
+        labels = dict(Section.STATUS_CHOICES)
+        for section in sections:
+            section['status_display'] = labels.get(section['status'], section['status'])
+        return {
+            'sections': sections,
+            'total_students': sum(section['enrolled'] for section in sections),
+        }
+
+    return _cached(professor_scope(user.pk), f'professor:{user.pk}', PERSONAL_TIMEOUT, compute)
+
+
+def staff_data():
+    return _cached(staff_scope(), f'staff:{campus.current()}', GLOBAL_TIMEOUT, lambda: count_all(
+        total_students=Student.objects.filter(status='active'),
+        total_enrollments=StudentSubject.objects.filter(status='enrolled'),
+        total_sections=Section.objects.all(),
+        total_subjects=Subject.objects.filter(active=True),
+    ))
+
+
+def admission_data():
+    return _cached(admission_scope(), f'admission:{campus.current()}', GLOBAL_TIMEOUT, lambda: count_all(
+        pending_applications=AdmissionApplication.objects.filter(needs_registrar_review=True),
+        total_students=Student.objects.all(),
+        active_students=Student.objects.filter(status='active'),
+    ))
+
+
+def context_for(user):
+    """(fragment template, context) for the user's dashboard"""
+    if user.role == 'student':
+        student = Student.objects.filter(user=user).first()
+        if student is None:
+            return 'dashboard/student.html', {'error': 'Student profile not found'}
+        return 'dashboard/student.html', {'student': student, **student_data(student)}
+    if user.role == 'professor':
+        return 'dashboard/professor.html', professor_data(user)
+    if user.role in STAFF_ROLES:
+        return 'dashboard/staff.html', staff_data()
+    if user.role == 'admission':
+        return 'dashboard/admission.html', admission_data()
+    return None, {}
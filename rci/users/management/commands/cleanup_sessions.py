@@ -0,0 +1,30 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users import session_store
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions from the database (in small batches) and the session cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        cache_first = settings.SESSION_ENGINE == 'users.session_store'
+
+        self.stdout.write('🧹 Removing expired session rows...')
+        if cache_first:
+            rows = session_store.SessionStore.clear_expired(batch_size=options['batch_size'])
+            self.stdout.write(f'   {rows} rows deleted')
+            entries = session_store.clear_expired_cache()
+            self.stdout.write(f'🗂️  {entries} expired cache entries deleted')
+        else:
+            import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'✓ Session cleanup finished in {elapsed:.1f}s'))
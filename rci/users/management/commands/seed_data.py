@@ -8,6 +8,7 @@ from academics.models import Program, Curriculum, Subject, Prereq, CurriculumSub
 from enrollment.models import Term, Section, Student, StudentSubject
 from grades.models import Grade
 from settingsapp.models import Setting
+from settingsapp.registry import REGISTRY
 from audit.models import AuditTrail
 
 
@@ -698,20 +699,13 @@ class Command(BaseCommand):
         # ==================== SYSTEM SETTINGS ====================
         self.stdout.write('\n⚙️  Creating System Settings...')
 
-        settings_data = [
-            ('admission_link_enabled', 'true', 'Enable/disable admission form'),
-            ('enrollment_open', 'true', 'Allow or block student enrollment'),
-            ('freshman_unit_cap', '30', 'Unit limit for freshmen (per plan.md)'),
-            ('passing_grade', '3.00', 'Default passing grade'),
-            ('timezone', 'Asia/Manila', 'System timezone'),
-        ]
-
-        for key_name, value_text, description in settings_data:
+        # One row per key declared in the settings registry, seeded with its default
+        for spec in REGISTRY.values():
             Setting.objects.get_or_create(
-                key_name=key_name,
+                key_name=spec.key,
                 defaults={
-                    'value_text': value_text,
-                    'description': description,
+                    'value_text': spec.format(spec.default),
+                    'description': spec.description,
                     'updated_by': admin_user
                 }
             )
@@ -12,6 +12,8 @@ class User(AbstractUser):
         ("admin", "Admin"),
     ]
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="student")
+    # Code from CAMPUS_DATABASES; blank is the default campus
+    campus = models.CharField(max_length=20, blank=True, default="", db_index=True)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
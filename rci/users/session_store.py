@@ -0,0 +1,82 @@
+"""
+Cache-first session engine (SESSION_BACKEND=cache).
+
+Sessions live in the SESSION_CACHE_ALIAS cache, a SQLite file on local disk
+shared by every worker process (rci.sqlite_cache). The database is written only when a user
+logs in (the first save after login rotates the key) and on logout (flush
+deletes the row). Everything in between, such as flash messages, the
+admission credentials handoff, anonymous sessions, goes to the cache only,
+so ordinary requests never wait on the SQLite writer.
+
+If a cache entry is lost, the session falls back to the row written at
+login: the user stays signed in and only transient data is gone.
+"""
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+KEY_PREFIX = 'rci.sessions.'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Set when the key was rotated or flushed; the next signed-in save creates the database row
+        self._write_through = False
+
+    def cycle_key(self):
+        # login() and password changes rotate the key
+        self._write_through = True
+        super().cycle_key()
+
+    def flush(self):
+        # logout(), or login() replacing another user's session
+        super().flush()
+        self._write_through = True
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if self._write_through and SESSION_KEY in data:
+            # The key is new since the rotation, so this is always an insert
+            super().save(must_create=True)
+            self._write_through = False
+            return
+        if must_create:
+            if not self._cache.add(self.cache_key, data, self.get_expiry_age()):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+
+    @classmethod
+    def clear_expired(cls, batch_size=1000):
+        """Delete expired database rows in small transactions; returns the number removed"""
+        model = cls.get_model_class()
+        removed = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now()).values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return removed
+            # Short transactions keep the write lock free for requests in between
+            with transaction.atomic():
+                removed += model.objects.filter(session_key__in=keys).delete()[0]
+
+
+def clear_expired_cache(alias=None):
+    """
+    Remove expired entries from the session cache; returns the number removed.
+    Only caches that can sweep themselves (rci.sqlite_cache) are cleared; others expire on read.
+    """
+    cache = caches[alias or settings.SESSION_CACHE_ALIAS]
+    if not hasattr(cache, 'clear_expired'):
+        return 0
+    return cache.clear_expired()
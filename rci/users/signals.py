@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from academics.models import Subject
+from admission.models import AdmissionApplication
+from enrollment.models import Section, Student, StudentSubject
+from rci import campus
+from . import dashboard
+
+
+def _forget(using, *scopes):
+    # After commit (of the database written to), so a dashboard rendered mid-transaction can't cache the old numbers again
+    transaction.on_commit(lambda: dashboard.invalidate(*scopes), using=using)
+
+
+@receiver([post_save, post_delete], sender=StudentSubject)
+def enrollment_changed(sender, instance, using, **kwargs):
+    """Refresh the student's, the professor's and the staff dashboards"""
+    _forget(
+        using,
+        dashboard.student_scope(instance.student_id),
+        dashboard.professor_scope(instance.professor_id),
+        dashboard.staff_scope(),
+    )
+
+
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, using, **kwargs):
+    _forget(using, dashboard.professor_scope(instance.professor_id), dashboard.staff_scope())
+
+
+@receiver([post_save, post_delete], sender=Student)
+def student_changed(sender, instance, using, **kwargs):
+    _forget(using, dashboard.student_scope(instance.pk), dashboard.staff_scope(), dashboard.admission_scope())
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def subject_changed(sender, instance, using, **kwargs):
+    # Subjects are shared by every campus
+    _forget(using, *[dashboard.staff_scope(code) for code in campus.campuses()])
+
+
+@receiver([post_save, post_delete], sender=AdmissionApplication)
+def application_changed(sender, instance, using, **kwargs):
+    _forget(using, *[dashboard.admission_scope(code) for code in campus.campuses()])
@@ -1,3 +1,162 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from enrollment.models import Student, StudentSubject
+from rci.query_budget import ROLES, Budget, Fixture, QueryBudgetTestCase
+from rci.sqlite_cache import SQLiteCache
+from users import dashboard, usernames
+from users.models import User
+
+BUDGETS = [
+    Budget('login', 2),
+    Budget('login', 4, role='student', status=302, label='login (signed in)'),
+    Budget('logout', 6, role='student', status=302),
+    Budget('users:login', 2),
+    Budget('users:logout', 6, role='student', status=302),
+    *(Budget(name, 6, role=role) for name in ('home', 'dashboard') for role in ROLES),
+    *(Budget(name, 7, role=role) for name in ('profile', 'users:profile') for role in ROLES),
+]
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def test_query_budgets(self):
+        self.assertBudgets(BUDGETS)
+
+    def test_every_url_has_a_budget(self):
+        self.assertCovers(BUDGETS, 'rci.urls')
+        self.assertCovers(BUDGETS, 'users.urls')
+
+
+class UsernameAllocationTests(TestCase):
+    def make(self, *names):
+        for name in names:
+            User.objects.create(username=name)
+
+    def test_lowest_free_suffix(self):
+        self.make('ana.cruz', 'ana.cruz1', 'ana.cruz3')
+        self.assertEqual(usernames.next_username('ana.cruz'), 'ana.cruz2')
+
+    def test_overlapping_bases_and_other_names_do_not_count(self):
+        # 'ana.cruz' starts with 'ana.cru', and 'ana.cruzado' is not a suffixed 'ana.cruz'
+        self.make('ana.cru', 'ana.cruz', 'ana.cruzado')
+        self.assertEqual(usernames.allocate(['ana.cru', 'ana.cruz', 'ana.cruz']), ['ana.cru1', 'ana.cruz1', 'ana.cruz2'])
+
+    def test_base_username_drops_disallowed_characters(self):
+        self.assertEqual(usernames.base_username('Juan', 'Dela Cruz, Jr'), 'juan.delacruzjr')
+
+    def racing(self, times):
+        """next_username() whose name another request inserts right after it is allocated"""
+        next_username = usernames.next_username
+        taken = []
+
+        def allocate(base):
+            username = next_username(base)
+            if len(taken) < times:
+                User.objects.create(username=username)
+                taken.append(username)
+            return username
+
+        return mock.patch.object(usernames, 'next_username', allocate)
+
+    def test_retries_when_a_concurrent_insert_takes_the_name(self):
+        with self.racing(times=1):
+            user = usernames.create_with_username('ana.cruz', lambda username: User.objects.create(username=username))
+        self.assertEqual(user.username, 'ana.cruz1')
+
+    def test_bulk_create_reallocates_the_batch_on_collision(self):
+        allocate = usernames.allocate
+        calls = []
+
+        def racing_allocate(bases):
+            names = allocate(bases)
+            if not calls:
+                User.objects.create(username=names[1])
+            calls.append(names)
+            return names
+
+        users = [User(first_name='Ana'), User(first_name='Ana')]
+        with mock.patch.object(usernames, 'allocate', racing_allocate):
+            created = usernames.bulk_create_users(users, ['ana.cruz', 'ana.cruz'])
+
+        self.assertEqual(calls[0], ['ana.cruz', 'ana.cruz1'])
+        self.assertEqual([user.username for user in created], ['ana.cruz', 'ana.cruz2'])
+
+    def test_gives_up_after_max_attempts(self):
+        with self.racing(times=usernames.MAX_ATTEMPTS), self.assertRaises(usernames.UsernameUnavailable):
+            usernames.create_with_username('ana.cruz', lambda username: User.objects.create(username=username))
+
+
+class DashboardCacheTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(
+            DOCUMENT_STORAGE_DIR=directory.name, DASHBOARD_VERSION_DIR=directory.name,
+        ))
+        cache.clear()
+        self.fixture = Fixture().grow(3)
+
+    def test_committed_enrollment_change_retires_the_cached_numbers(self):
+        student = self.fixture.student
+        enrolled = len(dashboard.student_data(student)['enrolled_subjects'])
+        total = dashboard.staff_data()['total_enrollments']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentSubject.objects.filter(student=student, status='enrolled').first().delete()
+            self.assertEqual(len(dashboard.student_data(student)['enrolled_subjects']), enrolled)
+
+        self.assertEqual(len(dashboard.student_data(student)['enrolled_subjects']), enrolled - 1)
+        self.assertEqual(dashboard.staff_data()['total_enrollments'], total - 1)
+
+    def test_a_change_in_another_process_retires_the_cached_numbers(self):
+        total = dashboard.admission_data()['total_students']
+        Student.objects.bulk_create([Student(
+            user=User.objects.create(username='late.student'), program=self.fixture.program,
+            curriculum=self.fixture.curriculum,
+        )])
+        self.assertEqual(dashboard.admission_data()['total_students'], total)
+
+        # Another worker's commit only rewrites the shared version file
+        dashboard.invalidate(dashboard.admission_scope())
+        self.assertEqual(dashboard.admission_data()['total_students'], total + 1)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SQLiteCache(os.path.join(directory.name, 'sessions.sqlite3'), {})
+
+    def test_get_set_add_delete(self):
+        self.cache.set('a', {'user': 1}, 60)
+        self.assertEqual(self.cache.get('a'), {'user': 1})
+        self.assertFalse(self.cache.add('a', 'other', 60))
+        self.assertTrue(self.cache.add('b', 'new', 60))
+        self.assertTrue(self.cache.delete('a'))
+        self.assertIsNone(self.cache.get('a'))
+        self.assertFalse(self.cache.delete('a'))
+
+    def test_expired_entries_are_invisible_until_swept(self):
+        self.cache.set('gone', 1, 60)
+        self.cache.set('kept', 2, 60)
+        self.cache.set('forever', 3, None)
+        with mock.patch('time.time', return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get('gone'))
+            self.assertFalse(self.cache.has_key('gone'))
+            # add() may take over an expired key
+            self.assertTrue(self.cache.add('kept', 'again', 60))
+            self.assertEqual(self.cache.clear_expired(), 1)
+        self.assertEqual(self.cache.get('forever'), 3)
+        self.assertEqual(self.cache.get('kept'), 'again')
+
+    def test_nothing_is_culled_as_entries_grow(self):
+        for n in range(500):
+            self.cache.set(f'session-{n}', n, 60)
+        self.assertEqual(sum(self.cache.has_key(f'session-{n}') for n in range(500)), 500)
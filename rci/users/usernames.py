@@ -0,0 +1,114 @@
+"""
+Username allocation for generated accounts (first.last, first.last1, first.last2, ...).
+
+All usernames sharing a base are fetched with one index range query and the
+lowest free suffix is picked in memory, instead of probing candidates one
+query at a time. Two concurrent submissions can still pick the same name, so
+inserts go through a savepoint and are retried with a fresh allocation when
+the unique constraint rejects them.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import User
+
+MAX_ATTEMPTS = 5
+
+# Distinct bases looked up per query when allocating a batch
+BASES_PER_QUERY = 200
+
+# Characters Django's username validator rejects (spaces in "dela cruz", commas, ...)
+DISALLOWED = re.compile(r'[^\w.@+-]')
+
+
+class UsernameUnavailable(Exception):
+    """Every attempt to insert a freshly allocated username collided"""
+
+
+def base_username(first_name, last_name):
+    return DISALLOWED.sub('', f'{first_name.lower()}.{last_name.lower()}')
+
+
+def _prefix_range(base):
+    # Usernames starting with `base` sort between base and base + U+FFFF, so this
+    # is a range scan on the unique index (LIKE/startswith cannot use it on SQLite)
+    return Q(username__gte=base, username__lt=base + '\uffff')
+
+
+def _used_suffixes(bases):
+    """base -> set of taken numeric suffixes (0 stands for the bare base)"""
+    used = {base: set() for base in bases}
+    bases = sorted(used)
+    patterns = {base: re.compile(rf'{re.escape(base)}(\d*)') for base in bases}
+
+    for start in range(0, len(bases), BASES_PER_QUERY):
+        chunk = bases[start:start + BASES_PER_QUERY]
+        condition = Q()
+        for base in chunk:
+            condition |= _prefix_range(base)
+        for username in User.objects.filter(condition).values_list('username', flat=True):
+            # A username can fall in several ranges ('ana.cruz' is inside 'ana.cru'); check each
+            for base in chunk:
+                if username.startswith(base):
+                    match = patterns[base].fullmatch(username)
+                    if match:
+                        used[base].add(int(match.group(1) or 0))
+    return used
+
+
+def _next_free(used):
+    suffix = 0
+    while suffix in used:
+        suffix += 1
+    used.add(suffix)
+    return suffix
+
+
+def _with_suffix(base, suffix):
+    return f'{base}{suffix}' if suffix else base
+
+
+def allocate(bases):
+    """Free usernames for a list of bases (repeats get consecutive suffixes), in order"""
+    used = _used_suffixes(set(bases))
+    return [_with_suffix(base, _next_free(used[base])) for base in bases]
+
+
+def next_username(base):
+    return allocate([base])[0]
+
+
+def create_with_username(base, create):
+    """
+    Call `create(username)` with a freshly allocated username, retrying when a
+    concurrent insert took the same name first. Returns whatever `create` returns.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        username = next_username(base)
+        try:
+            with transaction.atomic():
+                return create(username)
+        except IntegrityError:
+            if not User.objects.filter(username=username).exists():
+                raise
+    raise UsernameUnavailable(f"Could not allocate a username for '{base}'")
+
+
+def bulk_create_users(users, bases):
+    """
+    Assign allocated usernames to unsaved `users` (parallel to `bases`) and bulk_create them,
+    re-allocating the whole batch if another writer took one of the names meanwhile.
+    """
+    for _ in range(MAX_ATTEMPTS):
+        for user, username in zip(users, allocate(bases)):
+            user.username = username
+        try:
+            with transaction.atomic():
+                return User.objects.bulk_create(users)
+        except IntegrityError:
+            taken = User.objects.filter(username__in=[user.username for user in users])
+            if not taken.exists():
+                raise
+    raise UsernameUnavailable(f'Could not allocate usernames for a batch of {len(users)}')
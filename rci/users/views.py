@@ -5,6 +5,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
 
+from . import dashboard
+
 
 def login_view(request):
     """Login view for all user roles"""
@@ -47,46 +49,12 @@ def logout_view(request):
 def dashboard_view(request):
     """Role-based dashboard for all user types"""
     user = request.user
+    role_template, data = dashboard.context_for(user)
     context = {
         'user': user,
+        'role_template': role_template,
+        **data,
     }
-
-    # Add role-specific context data
-    if user.role == 'student':
-        try:
-            student = user.student_profile
-            context['student'] = student
-            context['enrolled_subjects'] = student.student_subjects.filter(
-                status='enrolled'
-            ).select_related('subject', 'section', 'term')
-            context['completed_count'] = student.student_subjects.filter(status='completed').count()
-            context['failed_count'] = student.student_subjects.filter(status='failed').count()
-            context['inc_count'] = student.student_subjects.filter(status='inc').count()
-        except Exception as e:
-            context['error'] = 'Student profile not found'
-
-    elif user.role == 'professor':
-        from enrollment.models import Section
-        context['sections'] = Section.objects.filter(
-            professor=user
-        ).select_related('subject', 'term')
-        context['total_students'] = sum([section.enrolled_count for section in context['sections']])
-
-    elif user.role in ['registrar', 'dean', 'admin']:
-        from enrollment.models import Student, StudentSubject, Section
-        from academics.models import Subject
-
-        context['total_students'] = Student.objects.filter(status='active').count()
-        context['total_enrollments'] = StudentSubject.objects.filter(status='enrolled').count()
-        context['total_sections'] = Section.objects.count()
-        context['total_subjects'] = Subject.objects.filter(active=True).count()
-
-    elif user.role == 'admission':
-        from enrollment.models import Student
-        context['pending_applications'] = 0  # Placeholder for future admission module
-        context['total_students'] = Student.objects.count()
-        context['active_students'] = Student.objects.filter(status='active').count()
-
     return render(request, 'dashboard.html', context)
 
 